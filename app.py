@@ -1,15 +1,57 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Request, Response, g, render_template, request, jsonify, stream_with_context
+from werkzeug.datastructures import FileStorage
 import os
-from werkzeug.utils import secure_filename
-import PyPDF2
-import re
+import io
+import json
+import codecs
+import shutil
+import tempfile
+import concurrent.futures
+import sys
+import time
 from datetime import datetime
-import requests
+from hf_client import HuggingFaceClient, HF_API_BASE as DEFAULT_HF_API_BASE
+from circuit_breaker import CircuitOpenError, OPEN, HALF_OPEN
+from deadline import DeadlineExceeded, start_deadline, end_deadline, remaining as remaining_budget, wait as wait_for_result
+from classification_cache import ClassificationCache, make_cache_key
+from near_duplicates import NearDuplicateIndex, fingerprint
+from keyword_matcher import match_keywords, first_matching_group, CLASSIFICATION_GROUPS, RESPONSE_GROUPS
+from text_preprocessing import preprocess_text
+from pdf_extraction import extract_pdf_text, import_pypdf, EXTRACTION_MODES
+from job_queue import JobQueue, JobStore, JobQueueFull, FINISHED_STATUSES
+from metrics import MetricsRegistry, SIZE_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE, start_trace, finish_trace, server_timing
+from mail_archive import archive_kind, iter_messages, MAX_MESSAGE_BYTES
+
+ARCHIVE_PATH = '/classify/archive'
+
+class UploadRequest(Request):
+    """
+    Uploads ficam em memória; só acima de UPLOAD_SPOOL_THRESHOLD são
+    despejados em um arquivo temporário único (apagado automaticamente)
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(
+            max_size=app.config['UPLOAD_SPOOL_THRESHOLD'],
+            dir=app.config['UPLOAD_FOLDER']
+        )
+    
+    @property
+    def max_content_length(self):
+        """MAX_CONTENT_LENGTH, exceto em /classify/archive (caixas de email exportadas)"""
+        if self.path == ARCHIVE_PATH:
+            return app.config['ARCHIVE_MAX_CONTENT_LENGTH']
+        return super().max_content_length
 
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = 'uploads'
+app.request_class = UploadRequest
+app.config['UPLOAD_FOLDER'] = 'uploads'  # Usada só para uploads acima do limite de memória
+app.config['UPLOAD_SPOOL_THRESHOLD'] = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', str(2 * 1024 * 1024)))  # 2MB
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+app.config['ARCHIVE_MAX_CONTENT_LENGTH'] = int(os.getenv('ARCHIVE_MAX_CONTENT_LENGTH', str(512 * 1024 * 1024))) or None  # Só /classify/archive: 512MB; 0 = sem limite
 app.config['ALLOWED_EXTENSIONS'] = {'txt', 'pdf'}
+app.config['PDF_EXTRACTION_MODE'] = os.getenv('PDF_EXTRACTION_MODE', 'early')  # 'early' ou 'full'
+app.config['MAX_BATCH_SIZE'] = int(os.getenv('MAX_BATCH_SIZE', '500'))  # Emails por requisição em /classify/batch
 
 # Criar pasta de uploads se não existir
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -17,103 +59,249 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # Configuração da API do Hugging Face (opcional - pode usar sem token)
 HF_API_TOKEN = os.getenv('HF_API_TOKEN', '')  # Pode deixar vazio para testes
 
+# Rótulos usados na classificação zero-shot
+CANDIDATE_LABELS = ["email produtivo de trabalho", "email improdutivo social"]
+
+# Endpoint da Inference API (ex.: http://localhost:8089/models com o fake_hf_server.py)
+HF_API_BASE = os.getenv('HF_API_BASE', DEFAULT_HF_API_BASE)
+
+# Cliente compartilhado (pool de conexões + micro-lotes)
+HF_MAX_BATCH_SIZE = int(os.getenv('HF_MAX_BATCH_SIZE', '8'))
+HF_MAX_WAIT = float(os.getenv('HF_MAX_WAIT_MS', '10')) / 1000
+HF_TIMEOUT = float(os.getenv('HF_TIMEOUT', '30'))  # Segundos por chamada HTTP
+HF_BREAKER_THRESHOLD = int(os.getenv('HF_BREAKER_THRESHOLD', '5'))  # Falhas seguidas que abrem o circuito
+HF_BREAKER_RESET = float(os.getenv('HF_BREAKER_RESET', '30'))  # Segundos até a chamada de teste (meio-aberto)
+hf_client = HuggingFaceClient(
+    api_token=HF_API_TOKEN,
+    api_base=HF_API_BASE,
+    max_batch_size=HF_MAX_BATCH_SIZE,
+    max_wait=HF_MAX_WAIT,
+    timeout=HF_TIMEOUT,
+    pool_size=int(os.getenv('HF_POOL_SIZE', '10')),
+    breaker_threshold=HF_BREAKER_THRESHOLD,
+    breaker_reset=HF_BREAKER_RESET
+)
+
+# Orçamento de tempo por requisição: passado o prazo, a resposta usa o
+# resultado por palavras-chave (já calculado) em vez de esperar a API.
+# Pode ser trocado por requisição com ?budget_ms=...; 0 = sem prazo.
+# Jobs (POST /jobs) rodam fora da requisição e não têm prazo.
+REQUEST_BUDGET_MS = int(os.getenv('REQUEST_BUDGET_MS', '2000'))
+GENERATION_TIMEOUT = 15  # Limite da geração de texto (GPT-2), dentro do orçamento
+
+# Backend de classificação: 'huggingface' (API remota), 'local' (modelo em
+# processo, com a API só quando a confiança for baixa) ou 'keywords'
+CLASSIFIER_BACKENDS = ('huggingface', 'local', 'keywords')
+CLASSIFIER_BACKEND = os.getenv('CLASSIFIER_BACKEND', 'huggingface')
+LOCAL_MODEL_PATH = os.getenv('LOCAL_MODEL_PATH', os.path.join('models', 'local_classifier.npz'))  # local_classifier.DEFAULT_MODEL_PATH
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv('LOCAL_CONFIDENCE_THRESHOLD', '0.75'))
+
+# Modelo local (treinado com: python local_classifier.py)
+def load_local_model(path):
+    """Modelo local, se já treinado (NumPy só é importado quando há um modelo)"""
+    if not os.path.exists(path):
+        return None
+    from local_classifier import LocalClassifier
+    return LocalClassifier.load(path)
+
+local_model = load_local_model(LOCAL_MODEL_PATH)
+
+# Cache de classificações (LRU + TTL, persistência opcional em SQLite)
+CACHE_ENABLED = os.getenv('CLASSIFICATION_CACHE_ENABLED', '1') != '0'
+classification_cache = ClassificationCache(
+    max_entries=int(os.getenv('CLASSIFICATION_CACHE_SIZE', '10000')),
+    ttl=int(os.getenv('CLASSIFICATION_CACHE_TTL', '86400')),
+    db_path=os.getenv('CLASSIFICATION_CACHE_DB') or None
+) if CACHE_ENABLED else None
+
+# Emails quase idênticos (mesmo modelo, nomes/números diferentes): um representante por grupo vai ao classificador
+NEAR_DUPLICATE_ENABLED = os.getenv('NEAR_DUPLICATE_ENABLED', '1') != '0'
+near_duplicates = NearDuplicateIndex(
+    max_distance=int(os.getenv('NEAR_DUPLICATE_DISTANCE', '4')),  # Bits diferentes (de 64) aceitos
+    max_clusters=int(os.getenv('NEAR_DUPLICATE_MAX_CLUSTERS', '10000')),
+    ttl=int(os.getenv('CLASSIFICATION_CACHE_TTL', '86400'))
+) if NEAR_DUPLICATE_ENABLED else None
+
+# Métricas (GET /metrics, formato Prometheus) e Server-Timing por requisição
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+metrics = MetricsRegistry('email_classifier', enabled=METRICS_ENABLED)
+HF_API_CALLS = metrics.counter('hf_api_calls_total', 'Chamadas à API do Hugging Face', ('operation', 'result'))
+CLASSIFICATION_FALLBACKS = metrics.counter(
+    'classification_fallback_total', 'Classificações desviadas do backend pedido', ('reason',)
+)
+CLASSIFICATION_SECONDS = metrics.histogram(
+    'classification_seconds', 'Duração do pipeline de classificação (segundos)', ('backend', 'cached')
+)
+INPUT_CHARS = metrics.histogram('input_chars', 'Tamanho dos emails classificados (caracteres)', buckets=SIZE_BUCKETS)
+HTTP_REQUESTS = metrics.counter('http_requests_total', 'Requisições HTTP', ('endpoint', 'status'))
+HTTP_SECONDS = metrics.histogram('http_request_seconds', 'Duração das requisições HTTP (segundos)', ('endpoint',))
+
+# Fila de jobs (POST /jobs): PDFs grandes e chamadas lentas não prendem a requisição
+JOB_DEFAULT_PRIORITY = 10  # Menor número sai primeiro
+JOB_EVENTS_TIMEOUT = int(os.getenv('JOB_EVENTS_TIMEOUT', '300'))  # Duração máxima de um stream SSE (s)
+
+# Caixas de email exportadas (POST /classify/archive e mail_archive.py)
+ARCHIVE_WORKERS = int(os.getenv('ARCHIVE_WORKERS', '8'))  # Classificações em paralelo por arquivo
+ARCHIVE_MAX_MESSAGE_BYTES = int(os.getenv('ARCHIVE_MAX_MESSAGE_BYTES', str(MAX_MESSAGE_BYTES)))  # Mensagens maiores são cortadas
+
 def allowed_file(filename):
     """Verifica se o arquivo tem extensão permitida"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def extract_text_from_pdf(pdf_path):
-    """Extrai texto de um arquivo PDF"""
+def extract_text_from_pdf(pdf_source, mode='full'):
+    """Extrai texto de um PDF (caminho ou arquivo binário, ex.: BytesIO)"""
+    return extract_text_from_pdf_with_stats(pdf_source, mode)[0]
+
+def extract_text_from_pdf_with_stats(pdf_source, mode=None):
+    """
+    Extrai texto de um PDF e retorna também as estatísticas da extração
+    (tempo por página, páginas puladas no modo 'early')
+    """
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ''
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
+        return extract_pdf_text(pdf_source, mode or app.config['PDF_EXTRACTION_MODE'])
     except Exception as e:
         raise Exception(f"Erro ao ler PDF: {str(e)}")
 
-def preprocess_text(text):
-    """Pré-processa o texto do email (NLP básico)"""
-    # Remover espaços extras
-    text = re.sub(r'\s+', ' ', text).strip()
+def read_text_stream(stream, encoding='utf-8', chunk_size=64 * 1024):
+    """Decodifica um arquivo binário aos poucos (sem cópia intermediária em disco)"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
     
-    # Remover caracteres especiais mantendo pontuação básica
-    text = re.sub(r'[^\w\s\.\,\!\?\-]', '', text)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        parts.append(decoder.decode(chunk))
+    
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+def extract_text_from_upload(file, pdf_mode=None):
+    """
+    Extrai o texto de um upload direto do stream da requisição.
+    Retorna (texto, estatísticas da extração do PDF ou None)
+    """
+    stream = file.stream
+    stream.seek(0)
+    
+    if file.filename.lower().endswith('.pdf'):
+        # O leitor de PDF precisa de acesso aleatório: o stream já é
+        # pesquisável (memória ou temporário); senão, copiar para BytesIO
+        if not stream.seekable():
+            stream = io.BytesIO(stream.read())
+        with metrics.span('pdf_extraction'):
+            return extract_text_from_pdf_with_stats(stream, pdf_mode)
+    
+    with metrics.span('text_decode'):
+        return read_text_stream(stream), None  # .txt
+
+def parse_zero_shot_result(result):
+    """Converte a resposta zero-shot da API em (categoria, confiança)"""
+    top_label = result['labels'][0]
+    confidence = result['scores'][0]
+    
+    # Determinar categoria
+    if "produtivo" in top_label.lower() and "improdutivo" not in top_label.lower():
+        category = "Produtivo"
+    else:
+        category = "Improdutivo"
     
-    return text
+    return category, confidence
+
+class DegradedClassification(tuple):
+    """
+    (categoria, confiança) por palavras-chave usada no lugar da API (erro,
+    circuito aberto ou prazo esgotado): vale para esta resposta, mas não
+    entra no cache
+    """
+
+def is_degraded(classification):
+    return isinstance(classification, DegradedClassification)
+
+def api_failure_reason(error):
+    """Motivo do fallback: 'deadline' (orçamento esgotado), 'circuit_open' ou 'hf_error'"""
+    if isinstance(error, DeadlineExceeded):
+        return 'deadline'
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    return 'hf_error'
 
 def classify_with_huggingface_api(email_text):
     """
     Classifica email usando Hugging Face Inference API (GRATUITA)
     Modelo: facebook/bart-large-mnli (zero-shot classification)
+    A requisição é agrupada com chamadas concorrentes em um micro-lote.
+    O resultado por palavras-chave é calculado enquanto a API responde e
+    vale se ela falhar, estiver com o circuito aberto ou estourar o prazo.
     """
-    API_URL = "https://api-inference.huggingface.co/models/facebook/bart-large-mnli"
+    if remaining_budget(HF_TIMEOUT) <= 0:
+        HF_API_CALLS.inc(operation='zero_shot', result='deadline')
+        CLASSIFICATION_FALLBACKS.inc(reason='deadline')
+        return DegradedClassification(classify_email_simple(email_text))
     
-    headers = {}
-    if HF_API_TOKEN:
-        headers["Authorization"] = f"Bearer {HF_API_TOKEN}"
+    # Limitar tamanho para API
+    future = hf_client.submit_zero_shot(email_text[:512], CANDIDATE_LABELS)
+    fallback = DegradedClassification(classify_email_simple(email_text))
     
-    # Preparar payload para classificação zero-shot
-    payload = {
-        "inputs": email_text[:512],  # Limitar tamanho para API
-        "parameters": {
-            "candidate_labels": ["email produtivo de trabalho", "email improdutivo social"]
-        }
-    }
+    try:
+        with metrics.span('hf_api'):
+            result = wait_for_result(future)
+        classification = parse_zero_shot_result(result)
+        HF_API_CALLS.inc(operation='zero_shot', result='success')
+        return classification
+    
+    except Exception as e:
+        reason = api_failure_reason(e)
+        print(f"Erro ao classificar com API ({reason}): {e}")
+        HF_API_CALLS.inc(operation='zero_shot', result='error' if reason == 'hf_error' else reason)
+        CLASSIFICATION_FALLBACKS.inc(reason=reason)
+        # Fallback para método baseado em keywords
+        return fallback
+
+def classify_many_with_huggingface_api(email_texts):
+    """
+    Classifica vários emails com o mínimo de chamadas à API
+    (lotes de até HF_MAX_BATCH_SIZE entradas por requisição),
+    com o mesmo prazo e fallback de classify_with_huggingface_api
+    """
+    if not email_texts:
+        return []
+    
+    if remaining_budget(HF_TIMEOUT) <= 0:
+        HF_API_CALLS.inc(len(email_texts), operation='zero_shot_many', result='deadline')
+        CLASSIFICATION_FALLBACKS.inc(len(email_texts), reason='deadline')
+        return [DegradedClassification(classify_email_simple(text)) for text in email_texts]
+    
+    future = hf_client.submit_zero_shot_many([text[:512] for text in email_texts], CANDIDATE_LABELS)
+    fallback = [DegradedClassification(classify_email_simple(text)) for text in email_texts]
     
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            # Processar resposta
-            top_label = result['labels'][0]
-            confidence = result['scores'][0]
-            
-            # Determinar categoria
-            if "produtivo" in top_label.lower():
-                category = "Produtivo"
-            else:
-                category = "Improdutivo"
-            
-            return category, confidence
-        
-        else:
-            print(f"Erro API Hugging Face: {response.status_code}")
-            # Fallback para método baseado em keywords
-            return classify_email_simple(email_text)
+        with metrics.span('hf_api'):
+            results = wait_for_result(future)
+        classifications = [parse_zero_shot_result(result) for result in results]
+        HF_API_CALLS.inc(len(email_texts), operation='zero_shot_many', result='success')
+        return classifications
     
     except Exception as e:
-        print(f"Erro ao conectar com API: {e}")
+        reason = api_failure_reason(e)
+        print(f"Erro ao classificar lote com API ({reason}): {e}")
+        HF_API_CALLS.inc(len(email_texts), operation='zero_shot_many',
+                         result='error' if reason == 'hf_error' else reason)
+        CLASSIFICATION_FALLBACKS.inc(len(email_texts), reason=reason)
         # Fallback para método baseado em keywords
-        return classify_email_simple(email_text)
+        return fallback
 
 def classify_email_simple(text):
     """
     Classificação baseada em palavras-chave (FALLBACK)
     Usado quando API não está disponível
     """
-    text_lower = text.lower()
+    # Palavras-chave pré-compiladas (sem diferenciar acentos)
+    with metrics.span('keywords'):
+        hits = match_keywords(text, CLASSIFICATION_GROUPS)
     
-    # Palavras-chave para emails produtivos
-    productive_keywords = [
-        'suporte', 'problema', 'erro', 'ajuda', 'dúvida', 'solicitação',
-        'urgente', 'status', 'atualização', 'prazo', 'pendência', 'requisição',
-        'sistema', 'acesso', 'senha', 'login', 'configuração', 'bug',
-        'relatório', 'documento', 'análise', 'aprovação', 'revisão',
-        'reunião', 'projeto', 'tarefa', 'demanda', 'ticket'
-    ]
-    
-    # Palavras-chave para emails improdutivos
-    unproductive_keywords = [
-        'feliz', 'parabéns', 'aniversário', 'natal', 'ano novo', 'obrigado',
-        'agradecimento', 'festa', 'celebração', 'feriado', 'abraço', 'beijo'
-    ]
-    
-    productive_score = sum(1 for keyword in productive_keywords if keyword in text_lower)
-    unproductive_score = sum(1 for keyword in unproductive_keywords if keyword in text_lower)
+    productive_score = len(hits['produtivo'])
+    unproductive_score = len(hits['improdutivo'])
     
     if productive_score > unproductive_score:
         confidence = productive_score / (productive_score + unproductive_score + 1)
@@ -122,15 +310,82 @@ def classify_email_simple(text):
         confidence = max(0.5, unproductive_score / (productive_score + unproductive_score + 1))
         return "Improdutivo", confidence
 
+def classify_with_local_model(email_text):
+    """
+    Classifica com o modelo local (microssegundos, sem rede).
+    Resultados com confiança baixa vão para a API do Hugging Face.
+    """
+    if local_model is None:
+        return classify_with_huggingface_api(email_text)
+    
+    with metrics.span('local_model'):
+        category, confidence = local_model.classify(email_text)
+    if confidence < LOCAL_CONFIDENCE_THRESHOLD:
+        CLASSIFICATION_FALLBACKS.inc(reason='local_low_confidence')
+        return classify_with_huggingface_api(email_text)
+    
+    return category, confidence
+
+def classify_text(processed_text, backend=None):
+    """Classifica um email com o backend escolhido (padrão: CLASSIFIER_BACKEND)"""
+    backend = backend or CLASSIFIER_BACKEND
+    
+    if backend == 'local':
+        return classify_with_local_model(processed_text)
+    if backend == 'keywords':
+        return classify_email_simple(processed_text)
+    return classify_with_huggingface_api(processed_text)
+
+def classify_many(processed_texts, backend=None):
+    """Versão em lote de classify_text (uma chamada à API para o restante)"""
+    backend = backend or CLASSIFIER_BACKEND
+    
+    if backend == 'keywords':
+        return [classify_email_simple(text) for text in processed_texts]
+    
+    if backend == 'local' and local_model is not None:
+        with metrics.span('local_model'):
+            results = [local_model.classify(text) for text in processed_texts]
+        uncertain = [i for i, (_, confidence) in enumerate(results) if confidence < LOCAL_CONFIDENCE_THRESHOLD]
+        CLASSIFICATION_FALLBACKS.inc(len(uncertain), reason='local_low_confidence')
+        remote = classify_many_with_huggingface_api([processed_texts[i] for i in uncertain])
+        for i, result in zip(uncertain, remote):
+            results[i] = result
+        return results
+    
+    return classify_many_with_huggingface_api(processed_texts)
+
+def get_requested_backend():
+    """Backend pedido na requisição (?backend=...), validado"""
+    return validate_backend(request.args.get('backend') or request.form.get('backend'))
+
+def get_requested_pdf_mode():
+    """Modo de extração de PDF pedido no formulário (None = padrão da configuração)"""
+    pdf_mode = request.form.get('pdf_mode')
+    if pdf_mode and pdf_mode not in EXTRACTION_MODES:
+        raise ValueError(f"pdf_mode inválido: {pdf_mode}. Use: {', '.join(EXTRACTION_MODES)}")
+    return pdf_mode or None
+
+def validate_backend(backend):
+    """Backend informado (ou o padrão); ValueError se desconhecido"""
+    backend = backend or CLASSIFIER_BACKEND
+    if backend not in CLASSIFIER_BACKENDS:
+        raise ValueError(f"Backend inválido: {backend}. Use: {', '.join(CLASSIFIER_BACKENDS)}")
+    return backend
+
 def generate_response_with_ai(category, email_text):
     """
     Gera resposta usando Hugging Face (modelo de geração de texto)
+    A resposta predefinida é montada antes e vale se a API falhar, estiver
+    com o circuito aberto ou não couber no que resta do orçamento
     """
-    API_URL = "https://api-inference.huggingface.co/models/gpt2"
+    # Fallback para respostas predefinidas
+    fallback = generate_response(category, email_text)
     
-    headers = {}
-    if HF_API_TOKEN:
-        headers["Authorization"] = f"Bearer {HF_API_TOKEN}"
+    timeout = remaining_budget(GENERATION_TIMEOUT)
+    if timeout <= 0:
+        HF_API_CALLS.inc(operation='text_generation', result='deadline')
+        return fallback
     
     if category == "Produtivo":
         prompt = f"Resposta profissional para email de trabalho: {email_text[:100]}\n\nResposta:"
@@ -138,34 +393,28 @@ def generate_response_with_ai(category, email_text):
         prompt = f"Resposta cordial para mensagem social: {email_text[:100]}\n\nResposta:"
     
     try:
-        response = requests.post(
-            API_URL,
-            headers=headers,
-            json={"inputs": prompt, "parameters": {"max_length": 100}},
-            timeout=15
-        )
+        result = hf_client.text_generation(prompt, {"max_length": 100}, timeout=timeout)
+        HF_API_CALLS.inc(operation='text_generation', result='success')
         
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                generated_text = result[0].get('generated_text', '')
-                # Extrair apenas a resposta gerada
-                if 'Resposta:' in generated_text:
-                    return generated_text.split('Resposta:')[1].strip()
-    except:
-        pass
+        if isinstance(result, list) and len(result) > 0:
+            generated_text = result[0].get('generated_text', '')
+            # Extrair apenas a resposta gerada
+            if 'Resposta:' in generated_text:
+                return generated_text.split('Resposta:')[1].strip()
+    except Exception as e:
+        reason = api_failure_reason(e)
+        HF_API_CALLS.inc(operation='text_generation', result='error' if reason == 'hf_error' else reason)
     
-    # Fallback para respostas predefinidas
-    return generate_response(category, email_text)
+    return fallback
 
 def generate_response(category, email_text):
     """
     Gera uma resposta automática baseada na categoria (FALLBACK)
     """
     if category == "Produtivo":
-        text_lower = email_text.lower()
+        template = first_matching_group(email_text, RESPONSE_GROUPS)
         
-        if any(word in text_lower for word in ['status', 'andamento', 'atualização']):
+        if template == 'resposta_status':
             return """Prezado(a),
 
 Recebemos sua solicitação de atualização sobre o caso em andamento.
@@ -177,7 +426,7 @@ Tempo estimado de resposta: 24-48 horas úteis.
 Atenciosamente,
 Equipe de Suporte"""
         
-        elif any(word in text_lower for word in ['problema', 'erro', 'bug', 'defeito']):
+        elif template == 'resposta_problema':
             return """Prezado(a),
 
 Identificamos que você está reportando um problema técnico.
@@ -189,7 +438,7 @@ Por favor, mantenha este email como referência. Número do ticket: #TK-{timesta
 Atenciosamente,
 Equipe de Suporte Técnico""".format(timestamp=datetime.now().strftime('%Y%m%d%H%M'))
         
-        elif any(word in text_lower for word in ['dúvida', 'pergunta', 'como', 'ajuda']):
+        elif template == 'resposta_duvida':
             return """Prezado(a),
 
 Recebemos sua dúvida e estamos preparando uma resposta detalhada.
@@ -226,34 +475,255 @@ def index():
     """Página principal"""
     return render_template('index.html')
 
+def get_cached_classification(processed_text, backend):
+    """Retorna (chave, resultado em cache ou None)"""
+    if classification_cache is None:
+        return None, None
+    
+    key = make_cache_key(processed_text, CANDIDATE_LABELS + [backend])
+    with metrics.span('cache'):
+        return key, classification_cache.get(key)
+
+def get_near_duplicate(processed_text, backend):
+    """Retorna (grupo de quase idênticos ou None, resultado do grupo ou None)"""
+    if near_duplicates is None:
+        return None, None
+    
+    with metrics.span('near_duplicate'):
+        value = fingerprint(processed_text)
+        if value is None:
+            return None, None
+        return near_duplicates.assign(value, backend)
+
+def remember_near_duplicate(cluster_id, backend, classification):
+    """Guarda (categoria, confiança, resposta) do representante para o grupo"""
+    if near_duplicates is not None and cluster_id is not None:
+        near_duplicates.set_result(cluster_id, classification, backend)
+
+def store_classification(key, category, confidence, processed_text, degraded=False):
+    """
+    Gera a resposta automática e guarda o resultado no cache
+    (resultados degradados, do fallback da API, não são guardados)
+    """
+    # Gerar resposta automática
+    with metrics.span('response'):
+        suggested_response = generate_response(category, processed_text)
+    
+    if classification_cache is not None and not degraded:
+        classification_cache.set(key, category, confidence, suggested_response)
+    
+    return suggested_response
+
+def build_classification_result(email_text, backend=None):
+    """
+    Executa o pipeline completo (pré-processamento, classificação e resposta)
+    e monta o dicionário de resultado usado pelos endpoints
+    """
+    started = time.perf_counter()
+    INPUT_CHARS.observe(len(email_text))
+    
+    # Pré-processar texto (NLP)
+    with metrics.span('preprocess'):
+        processed_text = preprocess_text(email_text)
+    
+    # Emails idênticos já classificados não vão de novo para a API
+    backend = backend or CLASSIFIER_BACKEND
+    key, cached = get_cached_classification(processed_text, backend)
+    if cached is not None:
+        CLASSIFICATION_SECONDS.observe(time.perf_counter() - started, backend=backend, cached='true')
+        return format_classification_result(email_text, *cached, cached=True)
+    
+    # Quase idêntico a um email já classificado: mesmo resultado
+    cluster_id, near = get_near_duplicate(processed_text, backend)
+    if near is not None:
+        CLASSIFICATION_SECONDS.observe(time.perf_counter() - started, backend=backend, cached='near_duplicate')
+        return format_classification_result(email_text, *near, cached=True, near_duplicate=True)
+    
+    # Classificar email usando IA (backend escolhido)
+    classification = classify_text(processed_text, backend)
+    category, confidence = classification
+    degraded = is_degraded(classification)
+    suggested_response = store_classification(key, category, confidence, processed_text, degraded)
+    if not degraded:
+        remember_near_duplicate(cluster_id, backend, (category, confidence, suggested_response))
+    
+    CLASSIFICATION_SECONDS.observe(time.perf_counter() - started, backend=backend, cached='false')
+    return format_classification_result(email_text, category, confidence, suggested_response,
+                                        degraded=degraded)
+
+def format_classification_result(email_text, category, confidence, suggested_response, cached=False,
+                                 near_duplicate=False, degraded=False):
+    """
+    Monta o dicionário de resultado. `degraded`: palavras-chave no lugar
+    da API (erro, circuito aberto ou prazo); não fica no cache
+    """
+    return {
+        'success': True,
+        'category': category,
+        'confidence': round(confidence * 100, 2),
+        'suggested_response': suggested_response,
+        'email_preview': email_text[:200] + '...' if len(email_text) > 200 else email_text,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'ai_powered': True,  # Indica que usou IA
+        'cached': cached,
+        'near_duplicate': near_duplicate,  # Resultado de um email quase idêntico
+        'degraded': degraded
+    }
+
+def parse_batch_items(body, mimetype):
+    """
+    Lê o corpo de /classify/batch: array JSON ou NDJSON (um email por linha).
+    Cada item pode ser uma string ou um objeto com 'email_text' (e 'id' opcional).
+    """
+    content_type = (mimetype or '').lower()
+    
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines'):
+        items = []
+        for line in body.splitlines():
+            if line.strip():
+                items.append(json.loads(line))
+    else:
+        items = json.loads(body)
+        # Aceitar também {"emails": [...]}
+        if isinstance(items, dict):
+            items = items.get('emails')
+    
+    if not isinstance(items, list):
+        raise ValueError('Envie um array JSON de emails ou NDJSON')
+    
+    return items
+
+def parse_batch_payload():
+    """parse_batch_items aplicado à requisição Flask atual"""
+    return parse_batch_items(request.get_data(as_text=True), request.mimetype)
+
+class BatchClassification:
+    """
+    Um lote de /classify/batch: valida e pré-processa os itens, resolve o
+    que estiver no cache e junta os textos que ainda precisam ser
+    classificados (textos repetidos ou quase idênticos no lote são
+    classificados uma vez)
+    """
+    
+    def __init__(self, items, backend):
+        self.backend = backend
+        self.results = [None] * len(items)
+        self.ids = []
+        self.misses = {}  # chave -> texto pré-processado
+        self.waiting = []  # (posição, texto original, chave, quase idêntico?)
+        self.cluster_keys = {}  # grupo de quase idênticos -> chave do representante
+        
+        for index, item in enumerate(items):
+            item_id = index
+            try:
+                if isinstance(item, dict):
+                    item_id = item.get('id', index)
+                    email_text = item.get('email_text')
+                else:
+                    email_text = item
+                
+                if not isinstance(email_text, str) or email_text.strip() == '':
+                    raise ValueError('Nenhum conteúdo de email fornecido')
+                
+                INPUT_CHARS.observe(len(email_text))
+                with metrics.span('preprocess'):
+                    processed_text = preprocess_text(email_text)
+                key, cached = get_cached_classification(processed_text, backend)
+                if cached is not None:
+                    self.results[index] = format_classification_result(email_text, *cached, cached=True)
+                else:
+                    self.add_miss(index, email_text, processed_text, key or processed_text)
+            except Exception as e:
+                # Um email inválido não invalida o lote inteiro
+                self.results[index] = {
+                    'success': False,
+                    'error': str(e)
+                }
+            self.ids.append(item_id)
+    
+    def add_miss(self, index, email_text, processed_text, key):
+        """Item fora do cache: reaproveita um quase idêntico ou entra na lista a classificar"""
+        near_duplicate = False
+        if key not in self.misses:
+            cluster_id, near = get_near_duplicate(processed_text, self.backend)
+            if near is not None:
+                self.results[index] = format_classification_result(
+                    email_text, *near, cached=True, near_duplicate=True
+                )
+                return
+            
+            if cluster_id in self.cluster_keys:
+                # Quase idêntico a outro email do lote: usa o resultado do representante
+                key = self.cluster_keys[cluster_id]
+                near_duplicate = True
+            else:
+                self.misses[key] = processed_text
+                if cluster_id is not None:
+                    self.cluster_keys[cluster_id] = key
+        
+        self.waiting.append((index, email_text, key, near_duplicate))
+    
+    @property
+    def pending_texts(self):
+        """Textos pré-processados que precisam ir para o classificador"""
+        return list(self.misses.values())
+    
+    def complete(self, classifications):
+        """Recebe as classificações de pending_texts (mesma ordem) e monta os resultados"""
+        resolved = {}
+        degraded = set()  # Chaves classificadas pelo fallback da API
+        for (key, processed_text), classification in zip(self.misses.items(), classifications):
+            category, confidence = classification
+            if is_degraded(classification):
+                degraded.add(key)
+            suggested_response = store_classification(key, category, confidence, processed_text,
+                                                      key in degraded)
+            resolved[key] = (category, confidence, suggested_response)
+        
+        for cluster_id, key in self.cluster_keys.items():
+            if key not in degraded:
+                remember_near_duplicate(cluster_id, self.backend, resolved[key])
+        
+        for index, email_text, key, near_duplicate in self.waiting:
+            self.results[index] = format_classification_result(
+                email_text, *resolved[key], near_duplicate=near_duplicate, degraded=key in degraded
+            )
+        
+        for result, item_id in zip(self.results, self.ids):
+            result['id'] = item_id
+        
+        return self.results
+
 @app.route('/classify', methods=['POST'])
 def classify():
     """Endpoint para classificar emails usando IA"""
     try:
         email_text = None
+        pdf_stats = None
+        
+        # Leitura do corpo da requisição (upload)
+        with metrics.span('upload'):
+            files, form = request.files, request.form
         
         # Verificar se há arquivo enviado
-        if 'file' in request.files:
-            file = request.files['file']
+        if 'file' in files:
+            file = files['file']
             
             if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
+                # Extrair texto baseado no tipo de arquivo (sem salvar em disco)
+                try:
+                    pdf_mode = get_requested_pdf_mode()
+                except ValueError as e:
+                    return jsonify({
+                        'success': False,
+                        'error': str(e)
+                    }), 400
                 
-                # Extrair texto baseado no tipo de arquivo
-                if filename.endswith('.pdf'):
-                    email_text = extract_text_from_pdf(filepath)
-                else:  # .txt
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        email_text = f.read()
-                
-                # Remover arquivo após processamento
-                os.remove(filepath)
+                email_text, pdf_stats = extract_text_from_upload(file, pdf_mode)
         
         # Verificar se há texto direto
-        elif 'email_text' in request.form:
-            email_text = request.form['email_text']
+        elif 'email_text' in form:
+            email_text = form['email_text']
         
         if not email_text or email_text.strip() == '':
             return jsonify({
@@ -261,24 +731,19 @@ def classify():
                 'error': 'Nenhum conteúdo de email fornecido'
             }), 400
         
-        # Pré-processar texto (NLP)
-        processed_text = preprocess_text(email_text)
-        
-        # Classificar email usando IA (Hugging Face API)
-        category, confidence = classify_with_huggingface_api(processed_text)
+        try:
+            backend = get_requested_backend()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        # Gerar resposta automática
-        suggested_response = generate_response(category, processed_text)
+        result = build_classification_result(email_text, backend)
+        if pdf_stats is not None:
+            result['pdf_extraction'] = pdf_stats
         
-        return jsonify({
-            'success': True,
-            'category': category,
-            'confidence': round(confidence * 100, 2),
-            'suggested_response': suggested_response,
-            'email_preview': email_text[:200] + '...' if len(email_text) > 200 else email_text,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'ai_powered': True  # Indica que usou IA
-        })
+        return jsonify(result)
     
     except Exception as e:
         return jsonify({
@@ -286,14 +751,423 @@ def classify():
             'error': str(e)
         }), 500
 
+@app.route('/classify/batch', methods=['POST'])
+def classify_batch():
+    """
+    Endpoint para classificar vários emails em uma única requisição.
+    Os resultados são retornados na mesma ordem da entrada.
+    """
+    try:
+        backend = get_requested_backend()
+        items = parse_batch_payload()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Payload inválido: {str(e)}'
+        }), 400
+    
+    if len(items) > app.config['MAX_BATCH_SIZE']:
+        return jsonify({
+            'success': False,
+            'error': f"Lote muito grande ({len(items)} emails). Máximo: {app.config['MAX_BATCH_SIZE']}"
+        }), 413
+    
+    # Resolver pelo cache e classificar o restante com o mínimo de chamadas à API
+    batch = BatchClassification(items, backend)
+    results = batch.complete(classify_many(batch.pending_texts, backend))
+    
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results
+    })
+
+def classify_archive_message(message, backend):
+    """Classifica uma mensagem do arquivo (mail_archive.ArchiveMessage): linha 'result' do NDJSON"""
+    fields = message.parse()
+    email_text = fields.pop('email_text')
+    if not email_text or not email_text.strip():
+        raise ValueError('Email sem conteúdo')
+    
+    return {
+        'type': 'result',
+        'index': message.index,
+        'source': message.source,
+        **fields,
+        'truncated': message.truncated,
+        **build_classification_result(email_text, backend)
+    }
+
+def classify_archive(messages, backend=None, workers=ARCHIVE_WORKERS, progress=None):
+    """
+    Classifica as mensagens de mail_archive.iter_messages em paralelo e gera
+    cada resultado assim que fica pronto (fora de ordem; use 'index').
+    O arquivo é lido conforme os workers liberam vaga: no máximo 2 * workers
+    mensagens ficam em memória. Termina com uma linha 'summary'.
+    Roda sem o orçamento da requisição (as threads não herdam o prazo).
+    `progress()` (ex.: stream.tell) informa os bytes já lidos do arquivo.
+    """
+    started = time.perf_counter()
+    summary = {'type': 'summary', 'total': 0, 'classified': 0, 'errors': 0, 'categories': {}}
+    pending = {}  # future -> mensagem
+    
+    def finished(future):
+        message = pending.pop(future)
+        try:
+            line = future.result()
+        except Exception as e:
+            summary['errors'] += 1
+            line = {'type': 'error', 'index': message.index, 'source': message.source, 'error': str(e)}
+        else:
+            summary['classified'] += 1
+            summary['categories'][line['category']] = summary['categories'].get(line['category'], 0) + 1
+        if progress is not None:
+            line['bytes_read'] = progress()
+        return line
+    
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='archive')
+    try:
+        try:
+            for message in messages:
+                summary['total'] += 1
+                pending[executor.submit(classify_archive_message, message, backend)] = message
+                if len(pending) >= 2 * workers:
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        yield finished(future)
+        except Exception as e:
+            # Arquivo corrompido (ex.: zip inválido): o que já foi lido é entregue
+            summary['errors'] += 1
+            yield {'type': 'error', 'error': f'Erro ao ler o arquivo: {str(e)}'}
+        
+        for future in concurrent.futures.as_completed(list(pending)):
+            yield finished(future)
+    finally:
+        # Cliente desconectado: mensagens ainda na fila não são classificadas
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    if progress is not None:
+        summary['bytes_read'] = progress()
+    yield summary
+
+def spool_request_body(chunk_size=1024 * 1024):
+    """
+    Corpo bruto da requisição em um arquivo temporário (memória até
+    UPLOAD_SPOOL_THRESHOLD, depois disco, como os uploads). É lido por
+    inteiro antes da resposta: clientes HTTP só leem a resposta depois de
+    enviar o corpo, e responder antes travaria os dois lados.
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=app.config['UPLOAD_SPOOL_THRESHOLD'],
+        dir=app.config['UPLOAD_FOLDER']
+    )
+    shutil.copyfileobj(request.stream, spool, chunk_size)
+    spool.seek(0)
+    return spool
+
+@app.route(ARCHIVE_PATH, methods=['POST'])
+def classify_archive_endpoint():
+    """
+    Classifica uma caixa de email exportada (.mbox, .eml ou .zip), enviada
+    como upload 'file' ou no corpo (?filename=caixa.mbox). Resposta em NDJSON:
+    uma linha por email assim que classificado e um resumo no fim.
+    O limite de MAX_CONTENT_LENGTH não vale aqui (ARCHIVE_MAX_CONTENT_LENGTH).
+    """
+    try:
+        backend = get_requested_backend()
+        file = request.files.get('file')
+        filename = file.filename if file else request.args.get('filename', '')
+        if not filename:
+            raise ValueError('Nenhum arquivo enviado (campo "file" ou corpo com ?filename=...)')
+        archive_kind(filename)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    stream = file.stream if file else spool_request_body()
+    stream.seek(0)
+    messages = iter_messages(stream, filename, ARCHIVE_MAX_MESSAGE_BYTES)
+    
+    def lines():
+        try:
+            for line in classify_archive(messages, backend, progress=stream.tell):
+                yield json.dumps(line, ensure_ascii=False) + '\n'
+        finally:
+            stream.close()
+    
+    # stream_with_context: o upload (file.stream) só é fechado no fim da resposta
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def run_classification_job(payload, file_data):
+    """Executa um job da fila: extrai o texto (se houver arquivo) e classifica"""
+    pdf_stats = None
+    
+    if file_data is not None:
+        file = FileStorage(io.BytesIO(file_data), filename=payload['filename'])
+        email_text, pdf_stats = extract_text_from_upload(file, payload.get('pdf_mode'))
+    else:
+        email_text = payload.get('email_text')
+    
+    if not email_text or email_text.strip() == '':
+        raise ValueError('Nenhum conteúdo de email fornecido')
+    
+    result = build_classification_result(email_text, payload.get('backend'))
+    if pdf_stats is not None:
+        result['pdf_extraction'] = pdf_stats
+    
+    return result
+
+job_queue = JobQueue(
+    run_classification_job,
+    JobStore(os.getenv('JOBS_DB', 'jobs.db')),
+    workers=int(os.getenv('JOB_WORKERS', '4')),
+    max_pending=int(os.getenv('JOB_QUEUE_MAX', '1000')),
+    retention=int(os.getenv('JOB_RETENTION', '3600'))
+)
+
+# Estado do cache e da fila de jobs, lido a cada GET /metrics
+metrics.gauge('jobs_pending', 'Jobs aguardando um worker', lambda: job_queue.stats()['pending'])
+metrics.gauge('jobs', 'Jobs por status', lambda: job_queue.store.counts(), labelname='status')
+if classification_cache is not None:
+    metrics.gauge('cache_entries', 'Entradas no cache de classificações', lambda: classification_cache.stats()['entries'])
+    metrics.gauge('cache_hit_rate', 'Taxa de acertos do cache', lambda: classification_cache.stats()['hit_rate'])
+if near_duplicates is not None:
+    metrics.gauge('near_duplicate_clusters', 'Grupos de emails quase idênticos', lambda: near_duplicates.stats()['clusters'])
+    metrics.gauge('near_duplicate_hit_rate', 'Emails resolvidos por um quase idêntico',
+                  lambda: near_duplicates.stats()['hit_rate'])
+
+def circuit_states(client):
+    """Estado dos circuit breakers por modelo: 0 = fechado, 1 = meio-aberto, 2 = aberto"""
+    values = {HALF_OPEN: 1, OPEN: 2}
+    return {model: values.get(stats['state'], 0) for model, stats in client.breaker_stats().items()}
+
+metrics.gauge('hf_circuit_state', 'Circuit breaker da API (0 = fechado, 1 = meio-aberto, 2 = aberto)',
+              lambda: circuit_states(hf_client), labelname='model')
+
+def job_links(job_id):
+    return {
+        'status_url': f'/jobs/{job_id}',
+        'events_url': f'/jobs/{job_id}/events'
+    }
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Enfileira uma classificação (mesmos campos de /classify, mais
+    'priority' opcional) e retorna o ID do job imediatamente
+    """
+    try:
+        backend = get_requested_backend()
+        priority = request.form.get('priority', JOB_DEFAULT_PRIORITY, type=int)
+        payload = {'backend': backend}
+        file_data = None
+        
+        file = request.files.get('file')
+        if file and file.filename != '' and allowed_file(file.filename):
+            payload['filename'] = file.filename
+            payload['pdf_mode'] = get_requested_pdf_mode()
+            file.stream.seek(0)
+            file_data = file.stream.read()
+        elif request.form.get('email_text', '').strip():
+            payload['email_text'] = request.form['email_text']
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Nenhum conteúdo de email fornecido'
+            }), 400
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        job_id = job_queue.submit(payload, file_data, priority)
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        **job_links(job_id)
+    }), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status do job; inclui 'result' quando concluído ou 'error' se falhou"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job não encontrado'
+        }), 404
+    
+    return jsonify({'success': True, **job, **job_links(job_id)})
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Server-sent events: um evento 'status' a cada mudança, até o job
+    terminar. Prende a conexão; com workers síncronos do gunicorn prefira
+    o polling de /jobs/<id>.
+    """
+    if job_queue.get(job_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job não encontrado'
+        }), 404
+    
+    def stream():
+        last_status = None
+        last_sent = time.monotonic()
+        deadline = last_sent + JOB_EVENTS_TIMEOUT
+        
+        while time.monotonic() < deadline:
+            job = job_queue.get(job_id)
+            if job is None:
+                break
+            
+            if job['status'] != last_status:
+                last_status = job['status']
+                last_sent = time.monotonic()
+                yield f"event: status\ndata: {json.dumps(job)}\n\n"
+                if last_status in FINISHED_STATUSES:
+                    break
+            elif time.monotonic() - last_sent >= 15:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+            
+            # Acordado na hora por jobs deste processo; os demais, a cada 0,5s
+            job_queue.wait_for_change(0.5)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def parse_budget(value):
+    """Orçamento pedido (?budget_ms=...) em segundos; ValueError se inválido"""
+    budget_ms = REQUEST_BUDGET_MS if value in (None, '') else int(value)
+    if budget_ms < 0:
+        raise ValueError(f"budget_ms inválido: {value}")
+    return budget_ms / 1000
+
+@app.before_request
+def start_request_deadline():
+    try:
+        budget = parse_budget(request.args.get('budget_ms'))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': f"budget_ms inválido: {request.args.get('budget_ms')}"
+        }), 400
+    g.deadline_token = start_deadline(budget)
+
+@app.teardown_request
+def finish_request_deadline(error=None):
+    if 'deadline_token' in g:
+        end_deadline(g.pop('deadline_token'))
+
+@app.before_request
+def start_request_metrics():
+    if metrics.enabled:
+        g.metrics_started = time.perf_counter()
+        g.metrics_trace = start_trace()
+
+@app.after_request
+def finish_request_metrics(response):
+    """Duração da requisição e, no cabeçalho Server-Timing, o tempo de cada etapa"""
+    if metrics.enabled and 'metrics_trace' in g:
+        trace = finish_trace(g.pop('metrics_trace'))
+        endpoint = request.endpoint or 'not_found'
+        HTTP_SECONDS.observe(time.perf_counter() - g.metrics_started, endpoint=endpoint)
+        HTTP_REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+        if trace:
+            response.headers['Server-Timing'] = server_timing(trace)
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas no formato texto do Prometheus"""
+    if not metrics.enabled:
+        return jsonify({'success': False, 'error': 'Métricas desativadas (METRICS_ENABLED=0)'}), 404
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/health')
 def health():
     """Endpoint de health check"""
-    return jsonify({
+    return jsonify(health_status())
+
+def health_status():
+    """Conteúdo do health check (compartilhado com o modo ASGI)"""
+    return {
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'ai_enabled': True
-    })
+        'ai_enabled': True,
+        'classifier_backend': CLASSIFIER_BACKEND,
+        'local_model_loaded': local_model is not None,
+        'cache': classification_cache.stats() if classification_cache is not None else None,
+        'near_duplicates': near_duplicates.stats() if near_duplicates is not None else None,
+        'request_budget_ms': REQUEST_BUDGET_MS,
+        'hf_api_base': HF_API_BASE,
+        'circuit_breakers': hf_client.breaker_stats(),
+        'jobs': job_queue.stats()
+    }
+
+# ===============================================
+# INICIALIZAÇÃO (cold start)
+# ===============================================
+
+WARMUP_TEXT = (
+    "Olá, equipe. Preciso de uma atualização sobre o status do chamado 4521 "
+    "aberto na semana passada; o sistema continua apresentando erro no login. "
+    "Podem verificar com urgência? Obrigado e um ótimo fim de semana!"
+)
+
+def warmup():
+    """
+    Prepara o que a primeira requisição pagaria: importações adiadas
+    (PyPDF2, requests, NumPy), regex de palavras-chave e templates.
+    Não abre conexões nem inicia threads, então pode rodar no processo
+    mestre do gunicorn antes do fork (preload_app). Retorna ms por etapa.
+    """
+    processed = preprocess_text(WARMUP_TEXT)
+    steps = [
+        ('pdf', import_pypdf),
+        ('hf_client', lambda: hf_client.session),
+        ('keywords', lambda: (match_keywords(processed, CLASSIFICATION_GROUPS),
+                              first_matching_group(processed, RESPONSE_GROUPS))),
+        ('templates', lambda: app.jinja_env.get_template('index.html')),
+    ]
+    if near_duplicates is not None:
+        steps.append(('near_duplicates', lambda: fingerprint(processed)))
+    
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    return timings
+
+def after_fork():
+    """Em cada worker, após o fork (preload_app): conexões SQLite próprias"""
+    job_queue.store.reopen()
+    if classification_cache is not None:
+        classification_cache.reopen()
 
 if __name__ == '__main__':
+    if '--startup-report' in sys.argv:
+        import startup_report
+        sys.exit(startup_report.main(sys.argv[sys.argv.index('--startup-report') + 1:]))
+    
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,607 @@
+"""
+Ponto de entrada ASGI (modo assíncrono)
+Mesmas rotas e mesmo formato JSON do app Flask (wsgi.py). A chamada ao
+Hugging Face é assíncrona e a extração de arquivos roda fora do event
+loop, então um único processo atende centenas de classificações ao mesmo
+tempo enquanto elas esperam a rede.
+
+Execução:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextlib
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from flask import render_template
+from starlette.applications import Starlette
+from starlette.datastructures import QueryParams
+from starlette.exceptions import HTTPException
+from starlette.formparsers import MultiPartException
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from async_hf_client import AsyncHuggingFaceClient
+from deadline import start_deadline, end_deadline, remaining as remaining_budget, wait_async
+from mail_archive import archive_kind, iter_messages
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, start_trace, current_trace, finish_trace, server_timing
+from text_preprocessing import preprocess_text
+from app import (
+    app as flask_app,
+    metrics, HF_API_CALLS, CLASSIFICATION_FALLBACKS, CLASSIFICATION_SECONDS, INPUT_CHARS,
+    HTTP_REQUESTS, HTTP_SECONDS,
+    HF_API_TOKEN, HF_API_BASE, HF_MAX_BATCH_SIZE, HF_MAX_WAIT, HF_TIMEOUT, HF_BREAKER_THRESHOLD, HF_BREAKER_RESET,
+    CANDIDATE_LABELS, parse_budget, api_failure_reason, circuit_states, DegradedClassification, is_degraded,
+    LOCAL_CONFIDENCE_THRESHOLD, local_model,
+    EXTRACTION_MODES, BatchClassification,
+    allowed_file, read_text_stream, extract_text_from_pdf_with_stats,
+    parse_zero_shot_result, classify_email_simple,
+    validate_backend, get_cached_classification, store_classification,
+    get_near_duplicate, remember_near_duplicate,
+    format_classification_result, parse_batch_items, health_status,
+    job_queue, job_links, JobQueueFull, FINISHED_STATUSES, JOB_DEFAULT_PRIORITY, JOB_EVENTS_TIMEOUT,
+    ARCHIVE_PATH, ARCHIVE_MAX_MESSAGE_BYTES, classify_archive,
+)
+
+# Cliente assíncrono compartilhado (pool de conexões + micro-lotes)
+async_hf_client = AsyncHuggingFaceClient(
+    api_token=HF_API_TOKEN,
+    api_base=HF_API_BASE,
+    max_batch_size=HF_MAX_BATCH_SIZE,
+    max_wait=HF_MAX_WAIT,
+    timeout=HF_TIMEOUT,
+    breaker_threshold=HF_BREAKER_THRESHOLD,
+    breaker_reset=HF_BREAKER_RESET
+)
+
+# Neste modo quem chama a API é o cliente assíncrono: substitui o gauge do app (que lia o síncrono)
+metrics.gauge('hf_circuit_state', 'Circuit breaker da API (0 = fechado, 1 = meio-aberto, 2 = aberto)',
+              lambda: circuit_states(async_hf_client), labelname='model', replace=True)
+
+
+def error_response(message, status_code):
+    return JSONResponse({
+        'success': False,
+        'error': message
+    }, status_code=status_code)
+
+
+# ===============================================
+# CLASSIFICAÇÃO ASSÍNCRONA
+# ===============================================
+
+async def classify_with_huggingface_api_async(email_text):
+    """classify_with_huggingface_api sem bloquear o event loop (mesmo prazo e fallback)"""
+    # Fallback para método baseado em keywords (calculado antes de esperar a API)
+    fallback = DegradedClassification(classify_email_simple(email_text))
+    if remaining_budget(HF_TIMEOUT) <= 0:
+        HF_API_CALLS.inc(operation='zero_shot', result='deadline')
+        CLASSIFICATION_FALLBACKS.inc(reason='deadline')
+        return fallback
+
+    try:
+        # Limitar tamanho para API
+        with metrics.span('hf_api'):
+            result = await wait_async(async_hf_client.zero_shot(email_text[:512], CANDIDATE_LABELS))
+        classification = parse_zero_shot_result(result)
+        HF_API_CALLS.inc(operation='zero_shot', result='success')
+        return classification
+
+    except Exception as e:
+        reason = api_failure_reason(e)
+        print(f"Erro ao classificar com API ({reason}): {e}")
+        HF_API_CALLS.inc(operation='zero_shot', result='error' if reason == 'hf_error' else reason)
+        CLASSIFICATION_FALLBACKS.inc(reason=reason)
+        return fallback
+
+
+async def classify_many_with_huggingface_api_async(email_texts):
+    """classify_many_with_huggingface_api sem bloquear o event loop (mesmo prazo e fallback)"""
+    if not email_texts:
+        return []
+
+    fallback = [DegradedClassification(classify_email_simple(text)) for text in email_texts]
+    if remaining_budget(HF_TIMEOUT) <= 0:
+        HF_API_CALLS.inc(len(email_texts), operation='zero_shot_many', result='deadline')
+        CLASSIFICATION_FALLBACKS.inc(len(email_texts), reason='deadline')
+        return fallback
+
+    try:
+        with metrics.span('hf_api'):
+            results = await wait_async(
+                async_hf_client.zero_shot_many([text[:512] for text in email_texts], CANDIDATE_LABELS)
+            )
+        classifications = [parse_zero_shot_result(result) for result in results]
+        HF_API_CALLS.inc(len(email_texts), operation='zero_shot_many', result='success')
+        return classifications
+
+    except Exception as e:
+        reason = api_failure_reason(e)
+        print(f"Erro ao classificar lote com API ({reason}): {e}")
+        HF_API_CALLS.inc(len(email_texts), operation='zero_shot_many',
+                         result='error' if reason == 'hf_error' else reason)
+        CLASSIFICATION_FALLBACKS.inc(len(email_texts), reason=reason)
+        return fallback
+
+
+async def classify_text_async(processed_text, backend):
+    """Versão assíncrona de app.classify_text"""
+    if backend == 'keywords':
+        return classify_email_simple(processed_text)
+
+    if backend == 'local' and local_model is not None:
+        with metrics.span('local_model'):
+            category, confidence = local_model.classify(processed_text)
+        if confidence >= LOCAL_CONFIDENCE_THRESHOLD:
+            return category, confidence
+        CLASSIFICATION_FALLBACKS.inc(reason='local_low_confidence')
+
+    return await classify_with_huggingface_api_async(processed_text)
+
+
+async def classify_many_async(processed_texts, backend):
+    """Versão assíncrona de app.classify_many"""
+    if backend == 'keywords':
+        return [classify_email_simple(text) for text in processed_texts]
+
+    if backend == 'local' and local_model is not None:
+        with metrics.span('local_model'):
+            results = [local_model.classify(text) for text in processed_texts]
+        uncertain = [i for i, (_, confidence) in enumerate(results) if confidence < LOCAL_CONFIDENCE_THRESHOLD]
+        CLASSIFICATION_FALLBACKS.inc(len(uncertain), reason='local_low_confidence')
+        remote = await classify_many_with_huggingface_api_async([processed_texts[i] for i in uncertain])
+        for i, result in zip(uncertain, remote):
+            results[i] = result
+        return results
+
+    return await classify_many_with_huggingface_api_async(processed_texts)
+
+
+async def build_classification_result_async(email_text, backend):
+    """Versão assíncrona de app.build_classification_result"""
+    started = time.perf_counter()
+    INPUT_CHARS.observe(len(email_text))
+
+    # Pré-processar texto (NLP)
+    with metrics.span('preprocess'):
+        processed_text = preprocess_text(email_text)
+
+    # Emails idênticos já classificados não vão de novo para a API
+    key, cached = get_cached_classification(processed_text, backend)
+    if cached is not None:
+        CLASSIFICATION_SECONDS.observe(time.perf_counter() - started, backend=backend, cached='true')
+        return format_classification_result(email_text, *cached, cached=True)
+
+    # Quase idêntico a um email já classificado: mesmo resultado
+    cluster_id, near = get_near_duplicate(processed_text, backend)
+    if near is not None:
+        CLASSIFICATION_SECONDS.observe(time.perf_counter() - started, backend=backend, cached='near_duplicate')
+        return format_classification_result(email_text, *near, cached=True, near_duplicate=True)
+
+    classification = await classify_text_async(processed_text, backend)
+    category, confidence = classification
+    degraded = is_degraded(classification)
+
+    # A resposta vem de modelos prontos (microssegundos): roda no próprio loop
+    suggested_response = store_classification(key, category, confidence, processed_text, degraded)
+    if not degraded:
+        remember_near_duplicate(cluster_id, backend, (category, confidence, suggested_response))
+
+    CLASSIFICATION_SECONDS.observe(time.perf_counter() - started, backend=backend, cached='false')
+    return format_classification_result(email_text, category, confidence, suggested_response,
+                                        degraded=degraded)
+
+
+async def extract_text_from_upload_async(upload, pdf_mode):
+    """Extrai o texto do upload em uma thread (PDF e decodificação são CPU)"""
+    stream = upload.file
+    stream.seek(0)
+
+    if upload.filename.lower().endswith('.pdf'):
+        with metrics.span('pdf_extraction'):
+            return await asyncio.to_thread(extract_text_from_pdf_with_stats, stream, pdf_mode)
+
+    with metrics.span('text_decode'):
+        return await asyncio.to_thread(read_text_stream, stream), None  # .txt
+
+
+# ===============================================
+# CORPO DA REQUISIÇÃO
+# ===============================================
+
+# Partes por formulário, como o Werkzeug (max_form_parts)
+MAX_FORM_PARTS = 1000
+
+
+class BodyTooLarge(Exception):
+    """Corpo da requisição acima do limite (413)"""
+
+
+def limited_request(request, limit):
+    """
+    A mesma requisição, mas com o corpo contado enquanto é lido:
+    BodyTooLarge acima de `limit` bytes (None = sem limite), com ou sem
+    Content-Length (corpos chunked também)
+    """
+    if not limit:
+        return request
+    if int(request.headers.get('content-length') or 0) > limit:
+        raise BodyTooLarge()
+
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message['type'] == 'http.request':
+            received += len(message.get('body', b''))
+            if received > limit:
+                raise BodyTooLarge()
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def read_form(request, limit):
+    """
+    Formulário com os limites do Flask: campos e arquivos de até `limit`
+    bytes (o padrão do Starlette é 1MB por campo) e MAX_FORM_PARTS partes.
+    BodyTooLarge acima do limite; ValueError se o formulário for inválido.
+    """
+    try:
+        return await limited_request(request, limit).form(
+            max_files=MAX_FORM_PARTS, max_fields=MAX_FORM_PARTS, max_part_size=limit or sys.maxsize
+        )
+    except HTTPException as e:
+        raise ValueError(f'Formulário inválido: {e.detail}')
+    except MultiPartException as e:
+        raise ValueError(f'Formulário inválido: {e}')
+
+
+# ===============================================
+# ROTAS
+# ===============================================
+
+# A página é estática: renderizada uma vez com o mesmo template do Flask
+with flask_app.test_request_context('/'):
+    INDEX_HTML = render_template('index.html')
+
+
+async def index(request):
+    """Página principal"""
+    return HTMLResponse(INDEX_HTML)
+
+
+async def classify(request):
+    """Endpoint para classificar emails usando IA"""
+    try:
+        # Leitura do corpo da requisição (upload)
+        with metrics.span('upload'):
+            form = await read_form(request, flask_app.config['MAX_CONTENT_LENGTH'])
+    except BodyTooLarge:
+        return error_response('Arquivo muito grande', 413)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        email_text = None
+        pdf_stats = None
+
+        # Verificar se há arquivo enviado
+        upload = form.get('file')
+        if upload is not None and not isinstance(upload, str):
+            if upload.filename and allowed_file(upload.filename):
+                pdf_mode = form.get('pdf_mode')
+                if pdf_mode and pdf_mode not in EXTRACTION_MODES:
+                    return error_response(f"pdf_mode inválido: {pdf_mode}. Use: {', '.join(EXTRACTION_MODES)}", 400)
+
+                email_text, pdf_stats = await extract_text_from_upload_async(upload, pdf_mode)
+
+        # Verificar se há texto direto
+        elif 'email_text' in form:
+            email_text = form['email_text']
+
+        if not email_text or email_text.strip() == '':
+            return error_response('Nenhum conteúdo de email fornecido', 400)
+
+        try:
+            backend = validate_backend(request.query_params.get('backend') or form.get('backend'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        result = await build_classification_result_async(email_text, backend)
+        if pdf_stats is not None:
+            result['pdf_extraction'] = pdf_stats
+
+        return JSONResponse(result)
+
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+async def classify_batch(request):
+    """Endpoint para classificar vários emails em uma única requisição"""
+    try:
+        backend = validate_backend(request.query_params.get('backend'))
+        body = (await limited_request(request, flask_app.config['MAX_CONTENT_LENGTH']).body()).decode('utf-8')
+        items = parse_batch_items(body, request.headers.get('content-type', '').split(';')[0])
+    except BodyTooLarge:
+        return error_response('Payload muito grande', 413)
+    except Exception as e:
+        return error_response(f'Payload inválido: {str(e)}', 400)
+
+    if len(items) > flask_app.config['MAX_BATCH_SIZE']:
+        return error_response(
+            f"Lote muito grande ({len(items)} emails). Máximo: {flask_app.config['MAX_BATCH_SIZE']}", 413
+        )
+
+    # Resolver pelo cache e classificar o restante com o mínimo de chamadas à API
+    batch = BatchClassification(items, backend)
+    results = batch.complete(await classify_many_async(batch.pending_texts, backend))
+
+    return JSONResponse({
+        'success': True,
+        'count': len(results),
+        'results': results
+    })
+
+
+async def spool_request_body_async(request, limit):
+    """
+    Corpo bruto da requisição em um arquivo temporário (memória até
+    UPLOAD_SPOOL_THRESHOLD, depois disco). BodyTooLarge acima de `limit`.
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=flask_app.config['UPLOAD_SPOOL_THRESHOLD'],
+        dir=flask_app.config['UPLOAD_FOLDER']
+    )
+    try:
+        async for chunk in limited_request(request, limit).stream():
+            spool.write(chunk)
+    except BodyTooLarge:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def classify_archive_endpoint(request):
+    """
+    Classifica uma caixa de email exportada (.mbox, .eml ou .zip), enviada
+    como upload 'file' ou no corpo (?filename=caixa.mbox). Resposta em NDJSON,
+    como no Flask; limite de ARCHIVE_MAX_CONTENT_LENGTH (não MAX_CONTENT_LENGTH).
+    """
+    limit = flask_app.config['ARCHIVE_MAX_CONTENT_LENGTH']
+    try:
+        upload = None
+        backend = request.query_params.get('backend')
+        if request.headers.get('content-type', '').startswith('multipart/form-data'):
+            form = await read_form(request, limit)
+            backend = backend or form.get('backend')
+            upload = form.get('file')
+            if isinstance(upload, str):
+                upload = None
+
+        backend = validate_backend(backend)
+        filename = upload.filename if upload is not None else request.query_params.get('filename', '')
+        if not filename:
+            raise ValueError('Nenhum arquivo enviado (campo "file" ou corpo com ?filename=...)')
+        archive_kind(filename)
+
+        stream = upload.file if upload is not None else await spool_request_body_async(request, limit)
+    except BodyTooLarge:
+        return error_response('Arquivo muito grande', 413)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    stream.seek(0)
+    messages = iter_messages(stream, filename, ARCHIVE_MAX_MESSAGE_BYTES)
+
+    def lines():
+        # Gerador síncrono: o Starlette o percorre em uma thread, fora do event loop
+        try:
+            for line in classify_archive(messages, backend, progress=stream.tell):
+                yield json.dumps(line, ensure_ascii=False) + '\n'
+        finally:
+            stream.close()
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+async def submit_job(request):
+    """
+    Enfileira uma classificação (mesmos campos de /classify, mais
+    'priority' opcional) e retorna o ID do job imediatamente
+    """
+    try:
+        form = await read_form(request, flask_app.config['MAX_CONTENT_LENGTH'])
+        backend = validate_backend(request.query_params.get('backend') or form.get('backend'))
+        try:
+            priority = int(form.get('priority', JOB_DEFAULT_PRIORITY))
+        except ValueError:
+            priority = JOB_DEFAULT_PRIORITY
+        payload = {'backend': backend}
+        file_data = None
+
+        upload = form.get('file')
+        if upload is not None and not isinstance(upload, str) and upload.filename and allowed_file(upload.filename):
+            pdf_mode = form.get('pdf_mode')
+            if pdf_mode and pdf_mode not in EXTRACTION_MODES:
+                raise ValueError(f"pdf_mode inválido: {pdf_mode}. Use: {', '.join(EXTRACTION_MODES)}")
+            payload['filename'] = upload.filename
+            payload['pdf_mode'] = pdf_mode or None
+            file_data = await upload.read()
+        elif (form.get('email_text') or '').strip():
+            payload['email_text'] = form['email_text']
+        else:
+            return error_response('Nenhum conteúdo de email fornecido', 400)
+    except BodyTooLarge:
+        return error_response('Arquivo muito grande', 413)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        # Os workers da fila são threads do app (como no Flask); o SQLite fica fora do event loop
+        job_id = await asyncio.to_thread(job_queue.submit, payload, file_data, priority)
+    except JobQueueFull as e:
+        return error_response(str(e), 503)
+
+    return JSONResponse({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        **job_links(job_id)
+    }, status_code=202)
+
+
+async def job_status(request):
+    """Status do job; inclui 'result' quando concluído ou 'error' se falhou"""
+    job_id = request.path_params['job_id']
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        return error_response('Job não encontrado', 404)
+
+    return JSONResponse({'success': True, **job, **job_links(job_id)})
+
+
+async def job_events(request):
+    """
+    Server-sent events: um evento 'status' a cada mudança, até o job
+    terminar (mesmo formato do Flask)
+    """
+    job_id = request.path_params['job_id']
+    if await asyncio.to_thread(job_queue.get, job_id) is None:
+        return error_response('Job não encontrado', 404)
+
+    async def stream():
+        last_status = None
+        last_sent = time.monotonic()
+        deadline = last_sent + JOB_EVENTS_TIMEOUT
+
+        while time.monotonic() < deadline:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job is None:
+                break
+
+            if job['status'] != last_status:
+                last_status = job['status']
+                last_sent = time.monotonic()
+                yield f"event: status\ndata: {json.dumps(job)}\n\n"
+                if last_status in FINISHED_STATUSES:
+                    break
+            elif time.monotonic() - last_sent >= 15:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+
+            # Polling a cada 0,5s: esperar em job_queue.wait_for_change prenderia uma thread por conexão
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+async def health(request):
+    """Endpoint de health check"""
+    status = health_status()
+    status['server'] = 'asgi'
+    status['circuit_breakers'] = async_hf_client.breaker_stats()
+    return JSONResponse(status)
+
+
+async def metrics_endpoint(request):
+    """Métricas no formato texto do Prometheus"""
+    if not metrics.enabled:
+        return error_response('Métricas desativadas (METRICS_ENABLED=0)', 404)
+    return Response(metrics.render(), headers={'Content-Type': METRICS_CONTENT_TYPE})
+
+
+class RequestMetricsMiddleware:
+    """Duração das requisições e cabeçalho Server-Timing (como no app Flask)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not metrics.enabled:
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        token = start_trace()
+        status = {'code': 500}
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                # Etapas medidas até aqui (o corpo já foi processado)
+                timing = server_timing(current_trace())
+                if timing:
+                    message.setdefault('headers', []).append((b'server-timing', timing.encode('latin-1')))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            finish_trace(token)
+            endpoint = getattr(scope.get('endpoint'), '__name__', 'not_found')
+            HTTP_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+            HTTP_REQUESTS.inc(endpoint=endpoint, status=str(status['code']))
+
+
+class RequestDeadlineMiddleware:
+    """Orçamento de tempo da requisição (?budget_ms=..., padrão REQUEST_BUDGET_MS)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        value = QueryParams(scope['query_string']).get('budget_ms')
+        try:
+            budget = parse_budget(value)
+        except ValueError:
+            return await error_response(f"budget_ms inválido: {value}", 400)(scope, receive, send)
+
+        token = start_deadline(budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_deadline(token)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    print(f"🚀 Modo ASGI iniciado [{datetime.now().strftime('%H:%M:%S')}]")
+    yield
+    await async_hf_client.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/classify', classify, methods=['POST']),
+        Route('/classify/batch', classify_batch, methods=['POST']),
+        Route(ARCHIVE_PATH, classify_archive_endpoint, methods=['POST']),
+        Route('/jobs', submit_job, methods=['POST']),
+        Route('/jobs/{job_id}', job_status),
+        Route('/jobs/{job_id}/events', job_events),
+        Route('/health', health),
+        Route('/metrics', metrics_endpoint),
+        Mount('/static', StaticFiles(directory='static'), name='static'),
+    ],
+    middleware=[Middleware(RequestMetricsMiddleware), Middleware(RequestDeadlineMiddleware)],
+    lifespan=lifespan
+)
@@ -0,0 +1,180 @@
+"""
+Versão assíncrona do cliente da Hugging Face Inference API (modo ASGI)
+Mesmo comportamento de hf_client.HuggingFaceClient, sobre httpx.AsyncClient
+"""
+
+import asyncio
+
+import httpx
+
+from circuit_breaker import CircuitBreaker
+from hf_client import HF_API_BASE, ZERO_SHOT_MODEL, TEXT_GENERATION_MODEL, HuggingFaceAPIError
+
+
+class AsyncHuggingFaceClient:
+    """
+    Cliente assíncrono com pool de conexões (keep-alive).
+
+    Chamadas concorrentes de zero_shot() são reunidas em micro-lotes;
+    cada lote é enviado em uma tarefa própria, então centenas de
+    classificações podem estar em andamento no mesmo processo.
+    """
+
+    def __init__(self, api_token='', api_base=HF_API_BASE, max_batch_size=8,
+                 max_wait=0.01, timeout=30, pool_size=100, breaker_threshold=5, breaker_reset=30):
+        self.api_base = api_base.rstrip('/')
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+        # Circuit breaker por modelo (só o event loop acessa o dicionário)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._breakers = {}
+
+        headers = {"Authorization": f"Bearer {api_token}"} if api_token else {}
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+        self._queue = None
+        self._worker = None
+        self._tasks = set()
+
+    def model_url(self, model):
+        """URL do modelo na Inference API"""
+        return f"{self.api_base}/{model}"
+
+    def breaker(self, model):
+        """Circuit breaker do modelo (criado no primeiro uso)"""
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(
+                model, failure_threshold=self.breaker_threshold, reset_timeout=self.breaker_reset
+            )
+        return breaker
+
+    def breaker_stats(self):
+        """Estado dos circuit breakers, por modelo (exposto no /health)"""
+        return {model: breaker.stats() for model, breaker in list(self._breakers.items())}
+
+    async def post(self, model, payload, timeout=None):
+        """
+        POST para o modelo; lança HuggingFaceAPIError se status != 200 e
+        CircuitOpenError (sem tocar a rede) se o modelo vem falhando
+        """
+        breaker = self.breaker(model)
+        breaker.before_call()
+        try:
+            response = await self.client.post(
+                self.model_url(model),
+                json=payload,
+                timeout=timeout or self.timeout
+            )
+
+            if response.status_code != 200:
+                raise HuggingFaceAPIError(response.status_code)
+
+            result = response.json()
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        breaker.record_success()
+        return result
+
+    async def zero_shot_many(self, texts, candidate_labels):
+        """Classificação zero-shot de vários textos (lotes de max_batch_size)"""
+        chunks = [texts[i:i + self.max_batch_size] for i in range(0, len(texts), self.max_batch_size)]
+
+        async def send(chunk):
+            result = await self.post(ZERO_SHOT_MODEL, {
+                "inputs": chunk if len(chunk) > 1 else chunk[0],
+                "parameters": {"candidate_labels": list(candidate_labels)}
+            })
+
+            # Uma única entrada retorna um objeto; várias retornam uma lista
+            if isinstance(result, dict):
+                result = [result]
+
+            if len(result) != len(chunk):
+                raise HuggingFaceAPIError(200, 'resposta com tamanho inesperado')
+
+            return result
+
+        results = []
+        for result in await asyncio.gather(*(send(chunk) for chunk in chunks)):
+            results.extend(result)
+        return results
+
+    async def text_generation(self, prompt, parameters=None, timeout=None):
+        """Geração de texto (ex.: GPT-2)"""
+        return await self.post(TEXT_GENERATION_MODEL, {
+            "inputs": prompt,
+            "parameters": parameters or {}
+        }, timeout=timeout)
+
+    async def zero_shot(self, text, candidate_labels):
+        """Classificação zero-shot de um texto, agrupada em um micro-lote"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run_batcher())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, tuple(candidate_labels), future))
+        return await future
+
+    async def _collect_batch(self):
+        """Espera o primeiro item e junta os que chegarem dentro de max_wait"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        # get_nowait + sleep curto: wait_for(get()) pode perder itens ao cancelar
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, 0.001))
+
+        return batch
+
+    async def _send_group(self, labels, items):
+        """Envia um micro-lote e entrega o resultado de cada chamador"""
+        futures = [future for _, future in items]
+        try:
+            results = await self.zero_shot_many([text for text, _ in items], labels)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_batcher(self):
+        while True:
+            batch = await self._collect_batch()
+
+            # Agrupar por conjunto de rótulos (cada grupo é uma chamada)
+            groups = {}
+            for text, labels, future in batch:
+                groups.setdefault(labels, []).append((text, future))
+
+            for labels, items in groups.items():
+                task = asyncio.create_task(self._send_group(labels, items))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self):
+        """Encerra o micro-lote e fecha as conexões"""
+        if self._worker is not None:
+            self._worker.cancel()
+        await self.client.aclose()
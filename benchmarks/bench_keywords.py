@@ -0,0 +1,86 @@
+"""
+Microbenchmark: classify_email_simple + generate_response
+Varredura antiga (listas recriadas e um `in` por palavra-chave, em cada
+função) x motor pré-compilado de keyword_matcher (uma passada por email;
+Aho-Corasick com pyahocorasick instalado, senão regex)
+
+Uso:
+    python benchmarks/bench_keywords.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import keyword_matcher  # noqa: E402
+from keyword_matcher import (  # noqa: E402
+    KEYWORD_GROUPS, CLASSIFICATION_GROUPS, RESPONSE_GROUPS, match_keywords, first_matching_group
+)
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'exemplos')
+
+
+def legacy_scan(text):
+    """Implementação anterior: uma varredura completa por palavra-chave"""
+    # classify_email_simple
+    text_lower = text.lower()
+    productive = sum(1 for k in list(KEYWORD_GROUPS['produtivo']) if k in text_lower)
+    unproductive = sum(1 for k in list(KEYWORD_GROUPS['improdutivo']) if k in text_lower)
+
+    # generate_response
+    text_lower = text.lower()
+    template = None
+    for group in RESPONSE_GROUPS:
+        if any(word in text_lower for word in KEYWORD_GROUPS[group]):
+            template = group
+            break
+    return productive, unproductive, template
+
+
+def compiled_engine(text):
+    """Implementação atual (como no app: texto novo, classificação e resposta)"""
+    keyword_matcher._last_scan.text = None  # Sem a análise da execução anterior
+    hits = match_keywords(text, CLASSIFICATION_GROUPS)
+    productive, unproductive = len(hits['produtivo']), len(hits['improdutivo'])
+
+    template = first_matching_group(text, RESPONSE_GROUPS)
+    return productive, unproductive, template
+
+
+def load_corpus():
+    texts = []
+    for name in sorted(os.listdir(EXEMPLOS_DIR)):
+        with open(os.path.join(EXEMPLOS_DIR, name), encoding='utf-8') as f:
+            texts.append(f.read())
+    return '\n\n'.join(texts)
+
+
+# Texto longo com poucas palavras-chave (ex.: histórico de conversa, anexos colados)
+FILLER = "Segue abaixo o conteúdo conforme combinado anteriormente com a equipe do setor. "
+
+
+def build_texts(size):
+    """Corpus denso (exemplos repetidos) e esparso (texto neutro + um exemplo)"""
+    base = load_corpus()
+    dense = (base * (size // len(base) + 1))[:size]
+    sparse = (FILLER * (size // len(FILLER) + 1))[:max(0, size - len(base))] + base
+    return {'denso': dense, 'esparso': sparse[:size]}
+
+
+def main():
+    print(f"Motor: {'Aho-Corasick (pyahocorasick)' if keyword_matcher.ahocorasick else 'regex'}")
+    print(f"{'corpus':>8} {'tamanho':>10} {'antigo (ms)':>12} {'atual (ms)':>12} {'ganho':>8}")
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        for corpus, text in build_texts(size).items():
+            runs = max(3, 2_000_000 // size)
+
+            legacy = min(timeit.repeat(lambda: legacy_scan(text), number=runs, repeat=3)) / runs
+            current = min(timeit.repeat(lambda: compiled_engine(text), number=runs, repeat=3)) / runs
+
+            print(f"{corpus:>8} {size:>10} {legacy * 1000:>12.3f} {current * 1000:>12.3f} {legacy / current:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Corpora sintéticos para os benchmarks, gerados a partir de exemplos/
+- Textos de email de qualquer tamanho (exemplos repetidos)
+- PDFs com N páginas de texto (gerados à mão, sem dependências)
+- Mensagens MIME para o servidor IMAP falso
+"""
+
+import os
+import zlib
+from email.message import EmailMessage
+from email.policy import SMTP
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'exemplos')
+
+KB = 1024
+MB = 1024 * KB
+
+
+def load_templates():
+    """Textos de exemplos/ (nome do arquivo -> conteúdo)"""
+    templates = {}
+    for name in sorted(os.listdir(EXEMPLOS_DIR)):
+        with open(os.path.join(EXEMPLOS_DIR, name), encoding='utf-8') as f:
+            templates[name] = f.read()
+    return templates
+
+
+def make_email_text(size, template=None):
+    """Texto de email com `size` caracteres (um modelo, ou todos, repetidos)"""
+    templates = load_templates()
+    base = templates[template] if template else '\n\n'.join(templates.values())
+    return (base * (size // len(base) + 1))[:size]
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(pages, lines_per_page=40):
+    """PDF com `pages` páginas de texto (linhas dos exemplos) como bytes"""
+    lines = [line for line in make_email_text(64 * KB).splitlines() if line.strip()]
+    # Fonte padrão do PDF (WinAnsi): só caracteres latin-1
+    lines = [line.encode('latin-1', 'replace').decode('latin-1') for line in lines]
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # Pages: preenchido depois, com os filhos
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    kids = []
+    for page in range(pages):
+        start = page * lines_per_page
+        page_lines = [lines[(start + i) % len(lines)] for i in range(lines_per_page)]
+        content = 'BT /F1 10 Tf 50 800 Td 12 TL\n' + ''.join(
+            f'({_pdf_escape(line[:90])}) \'\n' for line in page_lines
+        ) + 'ET'
+        stream = zlib.compress(content.encode('latin-1'))
+
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_id = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id
+        )
+        kids.append(len(objects))
+
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % kid for kid in kids), pages
+    )
+
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def make_message(index, body_size=2 * KB, attachment_size=0):
+    """Email MIME (bytes, CRLF) com corpo de `body_size` e anexo opcional"""
+    templates = list(load_templates())
+    template = templates[index % len(templates)]
+
+    message = EmailMessage()
+    message['Subject'] = f'Mensagem {index} ({template})'
+    message['From'] = f'remetente{index}@exemplo.com'
+    message['To'] = 'suporte@exemplo.com'
+    message['Message-ID'] = f'<bench-{index}@exemplo.com>'
+    message.set_content(make_email_text(body_size, template))
+    if attachment_size:
+        message.add_attachment(os.urandom(attachment_size), maintype='application',
+                               subtype='octet-stream', filename=f'anexo{index}.bin')
+    return message.as_bytes(policy=SMTP)
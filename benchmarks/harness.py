@@ -0,0 +1,113 @@
+"""
+Medição dos benchmarks e comparação com a linha de base
+- ops/s, latência p50/p99 (ms) e pico de memória (tracemalloc, em execução separada)
+- Resultados em JSON; regressões = mais lento ou com mais memória que a
+  linha de base além da tolerância
+"""
+
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+
+class Case:
+    """
+    Um benchmark: `run(*args)` é medido; `setup()` (opcional, fora da medição)
+    prepara os argumentos de cada execução.
+    """
+
+    def __init__(self, name, run, setup=None, group=None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: ())
+        self.group = group or name.split('[')[0]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(case, min_time=1.0, min_runs=5, max_runs=10_000):
+    """Executa o caso até min_time segundos (pelo menos min_runs vezes)"""
+    # Aquecimento (imports, caches, pools de processos) fora da medição
+    case.run(*case.setup())
+
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_runs and (len(latencies) < min_runs or time.perf_counter() - started < min_time):
+        args = case.setup()
+        begin = time.perf_counter()
+        case.run(*args)
+        latencies.append(time.perf_counter() - begin)
+
+    # Pico de memória: uma execução à parte (o tracemalloc deixa tudo mais lento)
+    args = case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'runs': len(latencies),
+        'ops_per_sec': len(latencies) / sum(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_kb': peak / 1024,
+    }
+
+
+def environment():
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def save_results(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, tolerance=0.15):
+    """
+    Compara com a linha de base. Retorna {nome: (razão de ops/s, razão de
+    memória, regressão?)} para os casos presentes nas duas.
+    """
+    comparison = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        speed = result['ops_per_sec'] / previous['ops_per_sec'] if previous['ops_per_sec'] else 1.0
+        memory = result['peak_kb'] / previous['peak_kb'] if previous['peak_kb'] else 1.0
+        regression = speed < 1 - tolerance or memory > 1 + tolerance
+        comparison[name] = (speed, memory, regression)
+    return comparison
+
+
+def format_row(name, result, comparison=None):
+    row = (f"{name:<42} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>10.3f} "
+           f"{result['p99_ms']:>10.3f} {result['peak_kb']:>11.1f}")
+    if comparison:
+        speed, memory, regression = comparison
+        row += f"  {speed:>5.2f}x {memory:>5.2f}x" + ('  ⚠️  REGRESSÃO' if regression else '')
+    return row
+
+
+HEADER = f"{'caso':<42} {'ops/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'pico (KB)':>11}"
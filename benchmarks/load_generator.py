@@ -0,0 +1,220 @@
+"""
+Gerador de carga para o /classify (ou /classify/batch) de um servidor rodando
+- Reenvia os emails de exemplos/ (ou de --corpus) a uma taxa alvo (--rps)
+- Laço aberto: as chegadas seguem o relógio (constantes ou Poisson), não
+  esperam respostas anteriores; a latência conta a partir do horário
+  programado, então um servidor lento não "esconde" a fila que ele criou
+- Relatório: vazão, erros por status, latência p50/p90/p99/máx e a fração
+  de respostas vindas do cache ou de um email quase idêntico
+
+Sem a API real: rode o servidor apontando para o fake_hf_server.py
+    python fake_hf_server.py --latency 0.2 --max-rps 50 &
+    HF_API_BASE=http://localhost:8089/models CLASSIFICATION_CACHE_ENABLED=0 \\
+        NEAR_DUPLICATE_ENABLED=0 gunicorn wsgi:app -b :5000 &
+    python benchmarks/load_generator.py --rps 20 --duration 30
+
+O corpus é pequeno: com cache e quase idênticos ativos, quase tudo é
+respondido sem a API (veja as colunas cached/near_duplicate).
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from harness import percentile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, '..', 'exemplos')
+
+
+def load_corpus(path):
+    """Textos dos .txt da pasta"""
+    texts = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith('.txt'):
+            with open(os.path.join(path, name), encoding='utf-8') as f:
+                texts.append(f.read())
+    if not texts:
+        raise SystemExit(f"Nenhum .txt em {path}")
+    return texts
+
+
+def arrival_times(rps, duration, poisson, rng):
+    """Horários (s desde o início) das requisições: intervalo fixo ou exponencial"""
+    at = 0.0
+    while True:
+        at += rng.expovariate(rps) if poisson else 1.0 / rps
+        if at >= duration:
+            return
+        yield at
+
+
+class LoadGenerator:
+    def __init__(self, url, texts, endpoint='classify', batch_size=50, params=None,
+                 timeout=30, max_in_flight=200):
+        self.url = url.rstrip('/') + ('/classify/batch' if endpoint == 'batch' else '/classify')
+        self.texts = texts
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.params = params or {}
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._next_text = 0
+
+        self.latencies = []  # Segundos, do horário programado até a resposta
+        self.service_times = []  # Segundos, do envio até a resposta
+        self.statuses = {}
+        self.dropped = 0
+        self.emails = 0
+        self.cached = 0
+        self.near_duplicate = 0
+
+    def session(self):
+        """Uma sessão (keep-alive) por thread"""
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def next_texts(self, count):
+        with self._lock:
+            start = self._next_text
+            self._next_text += count
+        return [self.texts[(start + i) % len(self.texts)] for i in range(count)]
+
+    def send(self, scheduled):
+        sent = time.perf_counter()
+        try:
+            if self.endpoint == 'batch':
+                payload = [{'id': str(i), 'email_text': text}
+                           for i, text in enumerate(self.next_texts(self.batch_size))]
+                response = self.session().post(self.url, json=payload, params=self.params, timeout=self.timeout)
+                results = response.json().get('results', []) if response.status_code == 200 else []
+            else:
+                data = {'email_text': self.next_texts(1)[0]}
+                response = self.session().post(self.url, data=data, params=self.params, timeout=self.timeout)
+                results = [response.json()] if response.status_code == 200 else []
+            status = str(response.status_code)
+        except requests.RequestException as e:
+            status, results = type(e).__name__, []
+
+        finished = time.perf_counter()
+        with self._lock:
+            self._in_flight -= 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status == '200':
+                self.latencies.append(finished - scheduled)
+                self.service_times.append(finished - sent)
+            for result in results:
+                self.emails += 1
+                self.cached += bool(result.get('cached'))
+                self.near_duplicate += bool(result.get('near_duplicate'))
+
+    def run(self, rps, duration, poisson=False, seed=None):
+        rng = random.Random(seed)
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='load')
+        started = time.perf_counter()
+
+        for at in arrival_times(rps, duration, poisson, rng):
+            delay = started + at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            with self._lock:
+                # Cliente saturado: a chegada é perdida (não atrasa as próximas)
+                if self._in_flight >= self.max_in_flight:
+                    self.dropped += 1
+                    continue
+                self._in_flight += 1
+            executor.submit(self.send, started + at)
+
+        executor.shutdown(wait=True)
+        return time.perf_counter() - started
+
+    def report(self, elapsed, rps):
+        ok = len(self.latencies)
+        sent = sum(self.statuses.values())
+
+        def ms(values, fraction):
+            return round(percentile(values, fraction) * 1000, 2) if values else None
+
+        return {
+            'url': self.url,
+            'target_rps': rps,
+            'elapsed_s': round(elapsed, 2),
+            'sent': sent,
+            'dropped': self.dropped,
+            'statuses': dict(sorted(self.statuses.items())),
+            'throughput_rps': round(ok / elapsed, 2) if elapsed else 0.0,
+            'emails_per_s': round(self.emails / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                'p50': ms(self.latencies, 0.5), 'p90': ms(self.latencies, 0.9),
+                'p99': ms(self.latencies, 0.99), 'max': ms(self.latencies, 1.0)
+            },
+            'service_ms': {'p50': ms(self.service_times, 0.5), 'p99': ms(self.service_times, 0.99)},
+            'cached': round(self.cached / self.emails, 4) if self.emails else 0.0,
+            'near_duplicate': round(self.near_duplicate / self.emails, 4) if self.emails else 0.0,
+        }
+
+
+def print_report(report):
+    latency = report['latency_ms']
+    print(f"\n📊 {report['url']} — alvo {report['target_rps']} req/s por {report['elapsed_s']}s")
+    print(f"   Enviadas: {report['sent']}  perdidas (cliente saturado): {report['dropped']}")
+    print(f"   Status: {', '.join(f'{status}: {count}' for status, count in report['statuses'].items()) or '-'}")
+    print(f"   Vazão: {report['throughput_rps']} req/s ({report['emails_per_s']} emails/s)")
+    print(f"   Latência (ms): p50 {latency['p50']}  p90 {latency['p90']}  p99 {latency['p99']}  máx {latency['max']}")
+    print(f"   Tempo de serviço (ms): p50 {report['service_ms']['p50']}  p99 {report['service_ms']['p99']}")
+    print(f"   Do cache: {report['cached']:.1%}  quase idênticos: {report['near_duplicate']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Carga em laço aberto no /classify')
+    parser.add_argument('--url', default='http://localhost:5000', help='Servidor do classificador')
+    parser.add_argument('--endpoint', choices=('classify', 'batch'), default='classify')
+    parser.add_argument('--batch-size', type=int, default=50, help='Emails por requisição (--endpoint batch)')
+    parser.add_argument('--rps', type=float, default=10, help='Requisições por segundo')
+    parser.add_argument('--duration', type=float, default=30, help='Segundos de carga')
+    parser.add_argument('--poisson', action='store_true', help='Chegadas de Poisson (padrão: intervalo fixo)')
+    parser.add_argument('--max-in-flight', type=int, default=200, help='Requisições simultâneas no cliente')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Pasta com os .txt reenviados')
+    parser.add_argument('--backend', help='?backend= em cada requisição')
+    parser.add_argument('--budget-ms', type=int, help='?budget_ms= em cada requisição')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help='Grava o relatório em JSON')
+    args = parser.parse_args()
+
+    params = {'backend': args.backend, 'budget_ms': args.budget_ms}
+    generator = LoadGenerator(
+        args.url, load_corpus(args.corpus), endpoint=args.endpoint, batch_size=args.batch_size,
+        params={name: value for name, value in params.items() if value is not None},
+        timeout=args.timeout, max_in_flight=args.max_in_flight
+    )
+
+    print(f"🚀 {args.rps} req/s por {args.duration}s em {generator.url} "
+          f"({'Poisson' if args.poisson else 'intervalo fixo'}, {len(generator.texts)} emails no corpus)")
+    elapsed = generator.run(args.rps, args.duration, args.poisson, args.seed)
+    report = generator.report(elapsed, args.rps)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    errors = sum(count for status, count in report['statuses'].items() if status != '200')
+    sys.exit(1 if errors or report['dropped'] else 0)
+
+
+if __name__ == '__main__':
+    main()
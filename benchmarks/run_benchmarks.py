@@ -0,0 +1,205 @@
+"""
+Benchmarks dos caminhos críticos de classificação e sincronização
+- preprocess_text, classify_email_simple, generate_response (1KB a 5MB)
+- extract_text_from_pdf (1 a 500 páginas, modos 'early' e 'full')
+- /classify de ponta a ponta (cliente de teste do Flask, backend 'keywords')
+- EmailSynchronizer.process_emails contra o servidor IMAP falso
+
+Uso:
+    python benchmarks/run_benchmarks.py                    # tudo
+    python benchmarks/run_benchmarks.py --quick            # tamanhos menores
+    python benchmarks/run_benchmarks.py -k pdf -k classify # só casos com esses trechos no nome
+    python benchmarks/run_benchmarks.py --save-baseline    # grava benchmarks/baseline.json
+
+Com benchmarks/baseline.json presente, cada caso é comparado com ele
+(razões de ops/s e de memória) e o comando termina com código 1 se houver
+regressão acima de --tolerance. Gere a linha de base na mesma máquina.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+# Antes de importar o app: sem rede, sem cache, sem arquivos no projeto
+TMP_DIR = tempfile.mkdtemp(prefix='bench-')
+os.environ.setdefault('CLASSIFIER_BACKEND', 'keywords')
+os.environ['CLASSIFICATION_CACHE_ENABLED'] = '0'
+os.environ.setdefault('JOBS_DB', os.path.join(TMP_DIR, 'jobs.db'))
+
+import app as email_app  # noqa: E402
+from classification_log import ClassificationLog  # noqa: E402
+from email_sync import EmailConfig, EmailSynchronizer  # noqa: E402
+from fake_imap_server import FakeImapServer  # noqa: E402
+from processed_index import ProcessedIndex  # noqa: E402
+
+from corpus import KB, MB, make_email_text, make_message, make_pdf  # noqa: E402
+from harness import Case, HEADER, compare, format_row, load_results, measure, save_results  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+TEXT_SIZES = {'1KB': KB, '100KB': 100 * KB, '1MB': MB, '5MB': 5 * MB}
+PDF_PAGES = (1, 10, 100, 500)
+SYNC_MAILBOXES = {'100x2KB': (100, 2 * KB, 0), '50x20KB+anexo500KB': (50, 20 * KB, 500 * KB)}
+
+QUICK_TEXT_SIZES = {'1KB': KB, '100KB': 100 * KB}
+QUICK_PDF_PAGES = (1, 10)
+QUICK_SYNC_MAILBOXES = {'20x2KB': (20, 2 * KB, 0)}
+
+
+def text_cases(sizes):
+    cases = []
+    for label, size in sizes.items():
+        text = make_email_text(size)
+        processed = email_app.preprocess_text(text)
+        cases += [
+            Case(f'preprocess_text[{label}]', email_app.preprocess_text, lambda text=text: (text,)),
+            Case(f'classify_email_simple[{label}]', email_app.classify_email_simple,
+                 lambda processed=processed: (processed,)),
+            Case(f'generate_response[{label}]', email_app.generate_response,
+                 lambda processed=processed: ('Produtivo', processed)),
+        ]
+    return cases
+
+
+def pdf_cases(pages_list):
+    cases = []
+    for pages in pages_list:
+        pdf = make_pdf(pages)
+        for mode in ('early', 'full'):
+            cases.append(Case(
+                f'extract_text_from_pdf[{pages}p,{mode}]',
+                email_app.extract_text_from_pdf,
+                lambda pdf=pdf, mode=mode: (io.BytesIO(pdf), mode)
+            ))
+    return cases
+
+
+def classify_endpoint_cases(sizes, pages_list):
+    client = email_app.app.test_client()
+
+    def post(data):
+        response = client.post('/classify', data=data, content_type='multipart/form-data')
+        assert response.status_code == 200, response.get_data(as_text=True)[:200]
+
+    cases = []
+    for label, size in sizes.items():
+        text = make_email_text(size)
+        cases.append(Case(f'/classify[texto {label}]', post,
+                          lambda text=text: ({'email_text': text, 'backend': 'keywords'},)))
+
+    for pages in pages_list[:2]:
+        pdf = make_pdf(pages)
+        cases.append(Case(f'/classify[pdf {pages}p]', post, lambda pdf=pdf: ({
+            'file': (io.BytesIO(pdf), 'email.pdf'), 'backend': 'keywords'
+        },)))
+    return cases
+
+
+def keyword_classify_batch(emails):
+    """Classificador local (sem o servidor Flask) para isolar a sincronização"""
+    results = []
+    for email_data in emails:
+        text = email_app.preprocess_text(email_data['full_text'])
+        category, confidence = email_app.classify_email_simple(text)
+        results.append({'category': category, 'confidence': confidence,
+                        'suggested_response': email_app.generate_response(category, text)})
+    return results
+
+
+def sync_cases(mailboxes):
+    cases = []
+    for label, (count, body_size, attachment_size) in mailboxes.items():
+        server = FakeImapServer(port=0).start()
+        for index in range(count):
+            server.deliver(make_message(index, body_size, attachment_size), mailbox=label)
+
+        config = EmailConfig()
+        config.IMAP_SERVER, config.IMAP_PORT, config.IMAP_SSL = '127.0.0.1', server.port, False
+        config.MAILBOX = label
+        config.LOG_FSYNC = 'never'
+        state = {}
+
+        def setup(config=config, state=state):
+            # Índice vazio a cada execução: todos os emails são "novos"
+            previous = state.pop('sync', None)
+            if previous is not None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    previous.disconnect()
+
+            log = ClassificationLog(os.path.join(TMP_DIR, 'classifications.jsonl'), fsync='never')
+            sync = EmailSynchronizer(config, ProcessedIndex(':memory:'), log)
+            sync.classify_batch = keyword_classify_batch
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync.connect_imap()
+            state['sync'] = sync
+            return (sync,)
+
+        def run(sync, count=count):
+            with contextlib.redirect_stdout(io.StringIO()):
+                processed = sync.process_emails()
+            assert processed == count, processed
+
+        cases.append(Case(f'process_emails[{label}]', run, setup))
+    return cases
+
+
+def build_cases(quick):
+    sizes = QUICK_TEXT_SIZES if quick else TEXT_SIZES
+    pages = QUICK_PDF_PAGES if quick else PDF_PAGES
+    mailboxes = QUICK_SYNC_MAILBOXES if quick else SYNC_MAILBOXES
+    return (text_cases(sizes) + pdf_cases(pages) + classify_endpoint_cases(sizes, pages)
+            + sync_cases(mailboxes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de classificação e sincronização')
+    parser.add_argument('--quick', action='store_true', help='Só os tamanhos menores')
+    parser.add_argument('-k', dest='filters', action='append', default=[],
+                        help='Rodar só casos cujo nome contém este trecho (pode repetir)')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Segundos medidos por caso')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Arquivo da linha de base')
+    parser.add_argument('--save-baseline', action='store_true', help='Grava os resultados como linha de base')
+    parser.add_argument('--output', help='Grava os resultados em JSON')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Variação aceita antes de acusar regressão (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        baseline = load_results(args.baseline)
+        print(f"📏 Comparando com {args.baseline} (colunas: ops/s e memória relativas)\n")
+
+    cases = [case for case in build_cases(args.quick)
+             if not args.filters or any(f in case.name for f in args.filters)]
+
+    print(HEADER)
+    results = {}
+    regressions = []
+    for case in cases:
+        result = measure(case, min_time=args.min_time)
+        results[case.name] = result
+
+        comparison = compare({case.name: result}, baseline, args.tolerance).get(case.name)
+        if comparison and comparison[2]:
+            regressions.append(case.name)
+        print(format_row(case.name, result, comparison), flush=True)
+
+    if args.output:
+        save_results(args.output, results)
+    if args.save_baseline:
+        save_results(args.baseline, results)
+        print(f"\n💾 Linha de base gravada em {args.baseline}")
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} regressões: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
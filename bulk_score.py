@@ -0,0 +1,207 @@
+"""
+Pontuação em massa de emails (re-rotulação offline)
+Mesmo resultado de classify_email_simple, calculado para milhares de textos
+de uma vez com operações vetorizadas em NumPy
+
+Uso:
+    python bulk_score.py arquivo_de_emails/ resultados.csv
+    python bulk_score.py arquivo_de_emails/ resultados.parquet   (requer pyarrow)
+"""
+
+import argparse
+import csv
+import email
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+from itertools import islice
+
+import numpy as np
+
+from keyword_matcher import compiled_keywords, find_keywords, CLASSIFICATION_GROUPS
+from text_preprocessing import preprocess_text
+
+CHUNK_SIZE = 10000  # Textos por bloco (limita a memória em corpora grandes)
+
+_KEYWORDS = compiled_keywords(CLASSIFICATION_GROUPS)
+_COLUMNS = {kw[0]: column for column, kw in enumerate(_KEYWORDS)}  # Sem acento -> coluna
+_PRODUCTIVE = np.array([1.0 if 'produtivo' in kw[2] else 0.0 for kw in _KEYWORDS])
+_UNPRODUCTIVE = np.array([1.0 if 'improdutivo' in kw[2] else 0.0 for kw in _KEYWORDS])
+
+
+def keyword_presence(texts):
+    """
+    Matriz booleana (textos x palavras-chave), com a mesma busca de
+    classify_email_simple (keyword_matcher.find_keywords: uma passada por
+    texto, com ou sem acento, composto ou decomposto)
+    """
+    presence = np.zeros((len(texts), len(_KEYWORDS)), dtype=bool)
+
+    for row, text in enumerate(texts):
+        for keyword in find_keywords(text):
+            column = _COLUMNS.get(keyword)
+            if column is not None:
+                presence[row, column] = True
+
+    return presence
+
+
+def score_texts(texts):
+    """
+    Classifica uma lista de textos. Retorna (categorias, confianças,
+    pontuação produtiva, pontuação improdutiva) como arrays NumPy.
+    """
+    presence = keyword_presence(texts).astype(np.float64)
+
+    productive = presence @ _PRODUCTIVE
+    unproductive = presence @ _UNPRODUCTIVE
+    total = productive + unproductive + 1
+
+    is_productive = productive > unproductive
+    confidence = np.where(
+        is_productive,
+        productive / total,
+        np.maximum(0.5, unproductive / total)
+    )
+    categories = np.where(is_productive, 'Produtivo', 'Improdutivo')
+
+    return categories, confidence, productive.astype(np.int64), unproductive.astype(np.int64)
+
+
+def _score_chunk(chunk):
+    categories, confidence, productive, unproductive = score_texts(chunk)
+    return list(zip(categories.tolist(), confidence.tolist(), productive.tolist(), unproductive.tolist()))
+
+
+def score_iter(texts, chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Versão em blocos para iteradores grandes, opcionalmente em vários
+    processos. Gera (categoria, confiança, pontuação produtiva, pontuação
+    improdutiva) na ordem da entrada.
+    """
+    iterator = iter(texts)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _score_chunk(chunk)
+        return
+
+    # No máximo 2 blocos por processo em andamento (memória limitada)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ===============================================
+# LEITURA DE ARQUIVOS
+# ===============================================
+
+def read_email_file(path):
+    """Texto de um .txt ou de um .eml (mesmo formato do sincronizador)"""
+    if path.endswith('.eml'):
+        with open(path, 'rb') as f:
+            message = email.message_from_binary_file(f, policy=policy.default)
+
+        body_part = message.get_body(preferencelist=('plain', 'html'))
+        body = body_part.get_content() if body_part is not None else ''
+        subject = message.get('Subject', '') or '(Sem assunto)'
+        from_email = message.get('From', '')
+        return f"Assunto: {subject}\n\nDe: {from_email}\n\n{body.strip()}"
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def iter_email_files(directory):
+    """Caminhos dos .txt/.eml da pasta (recursivo), em ordem"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(('.txt', '.eml')):
+                yield os.path.join(root, name)
+
+
+# ===============================================
+# SAÍDA
+# ===============================================
+
+COLUMNS = ['file', 'category', 'confidence', 'productive_score', 'unproductive_score']
+
+
+def write_csv(rows, output):
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        count = 0
+        for row in rows:
+            writer.writerow([row[0], row[1], round(row[2] * 100, 2), row[3], row[4]])
+            count += 1
+    return count
+
+
+def write_parquet(rows, output, chunk_size=CHUNK_SIZE):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("❌ Saída .parquet requer pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ('file', pa.string()),
+        ('category', pa.string()),
+        ('confidence', pa.float64()),
+        ('productive_score', pa.int64()),
+        ('unproductive_score', pa.int64()),
+    ])
+
+    count = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            columns = list(zip(*chunk))
+            columns[2] = [round(value * 100, 2) for value in columns[2]]
+            writer.write_table(pa.Table.from_arrays([pa.array(c) for c in columns], schema=schema))
+            count += len(chunk)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classificação em massa por palavras-chave')
+    parser.add_argument('directory', help='Pasta com arquivos .txt / .eml')
+    parser.add_argument('output', help='Arquivo de saída (.csv ou .parquet)')
+    parser.add_argument('--raw', action='store_true',
+                        help='Não aplicar preprocess_text (o /classify aplica)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processos para pontuar os blocos em paralelo')
+    args = parser.parse_args()
+
+    paths = list(iter_email_files(args.directory))
+    texts = (read_email_file(path) for path in paths)
+
+    if not args.raw:
+        texts = (preprocess_text(text) for text in texts)
+
+    results = score_iter(texts, args.chunk_size, args.workers)
+    rows = ((path, *result) for path, result in zip(paths, results))
+
+    if args.output.endswith('.parquet'):
+        count = write_parquet(rows, args.output, args.chunk_size)
+    else:
+        count = write_csv(rows, args.output)
+
+    print(f"✅ {count} emails classificados → {args.output}")
+
+
+if __name__ == '__main__':
+    main()
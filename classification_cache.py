@@ -0,0 +1,154 @@
+"""
+Cache de resultados de classificação
+Chave: hash do texto pré-processado + rótulos candidatos
+Valor: (categoria, confiança, resposta sugerida)
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(processed_text, candidate_labels):
+    """Hash SHA-256 do texto pré-processado e dos rótulos candidatos"""
+    digest = hashlib.sha256()
+    digest.update(processed_text.encode('utf-8'))
+    for label in candidate_labels:
+        digest.update(b'\x00')
+        digest.update(label.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """
+    Cache LRU com expiração (TTL) e persistência opcional em SQLite.
+
+    A memória é limitada por max_entries; o banco SQLite (se configurado)
+    serve apenas para que um reinício não comece com o cache vazio.
+    """
+
+    def __init__(self, max_entries=10000, ttl=86400, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # chave -> (expira_em, valor)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db_path = db_path
+        self._inherited = []
+        self._db = self._connect() if db_path else None
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS classification_cache ("
+            " key TEXT PRIMARY KEY,"
+            " category TEXT NOT NULL,"
+            " confidence REAL NOT NULL,"
+            " suggested_response TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        db.execute("DELETE FROM classification_cache WHERE expires_at < ?", (time.time(),))
+        db.commit()
+        return db
+
+    def reopen(self):
+        """
+        Nova conexão no processo atual (chamar após um fork). A conexão
+        herdada não é fechada nem usada: o SQLite não a aceita entre processos.
+        """
+        if self._db is not None:
+            with self._lock:
+                self._inherited.append(self._db)
+                self._db = self._connect()
+
+    def get(self, key):
+        """Retorna (categoria, confiança, resposta) ou None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            value = self._load(key, now)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key, category, confidence, suggested_response):
+        """Armazena um resultado (e persiste, se houver banco)"""
+        value = (category, confidence, suggested_response)
+        expires_at = time.time() + self.ttl
+
+        with self._lock:
+            self._store(key, expires_at, value)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO classification_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, category, confidence, suggested_response, expires_at)
+                )
+                self._db.commit()
+
+    def _store(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key, now):
+        """Busca no SQLite e promove para a memória"""
+        if self._db is None:
+            return None
+
+        row = self._db.execute(
+            "SELECT category, confidence, suggested_response, expires_at"
+            " FROM classification_cache WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        if row is None or row[3] < now:
+            return None
+
+        value = (row[0], row[1], row[2])
+        self._store(key, row[3], value)
+        return value
+
+    def clear(self):
+        """Esvazia o cache (memória e banco)"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM classification_cache")
+                self._db.commit()
+
+    def stats(self):
+        """Contadores expostos no /health"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'persistent': self._db is not None
+            }
@@ -0,0 +1,188 @@
+"""
+Log de classificações em JSON Lines (só acrescenta, nunca reescreve)
+- Escritas em lote: as entradas ficam em buffer e vão para o disco juntas
+- Rotação por tamanho e/ou tempo (arquivos antigos recebem data/hora no nome)
+- Política de fsync configurável
+
+Migração do formato antigo (array JSON):
+    python classification_log.py migrate email_classifications.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+FSYNC_POLICIES = ('always', 'batch', 'never')
+
+
+class ClassificationLog:
+    """
+    Log append-only. Uma falha no meio da escrita afeta no máximo a última
+    linha (ignorada na leitura), nunca o histórico.
+
+    fsync: 'always' grava e sincroniza a cada entrada; 'batch' sincroniza a
+    cada lote gravado; 'never' deixa a cargo do sistema operacional.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, rotate_interval=None,
+                 backup_count=30, flush_every=50, flush_interval=5.0, fsync='batch'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync inválida: {fsync}. Use: {', '.join(FSYNC_POLICIES)}")
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.flush_every = 1 if fsync == 'always' else max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._opened_at = None
+        self._last_flush = time.monotonic()
+
+    def append(self, entry):
+        """Acrescenta uma entrada (dict); grava quando o lote enche ou o intervalo passa"""
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_every or \
+                    time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """Grava o que estiver em buffer"""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # Última linha cortada por uma queda no meio da gravação: termina ela
+        # antes, para a próxima entrada não ser colada (e perdida) nela
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write('\n')
+        # Ao reabrir um log existente, a idade conta a partir da última modificação
+        self._opened_at = os.path.getmtime(self.path) if self._file.tell() else time.time()
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        data = ''.join(self._buffer)
+        self._buffer.clear()
+
+        if self._file is None:
+            self._open()
+        if self._should_rotate(len(data.encode('utf-8'))):
+            self._rotate()
+
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync != 'never':
+            os.fsync(self._file.fileno())
+
+    def _should_rotate(self, pending_bytes):
+        size = self._file.tell()
+        if size == 0:
+            return False
+        if self.max_bytes and size + pending_bytes > self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.time() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self):
+        """Renomeia o arquivo atual para <log>.AAAAMMDD-HHMMSS e começa outro"""
+        self._file.close()
+
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        target = f"{self.path}.{stamp}"
+        counter = 1
+        while os.path.exists(target):
+            target = f"{self.path}.{stamp}-{counter}"
+            counter += 1
+        os.replace(self.path, target)
+
+        # Manter apenas os backup_count arquivos mais recentes
+        if self.backup_count:
+            for old in rotated_files(self.path)[:-self.backup_count]:
+                os.remove(old)
+
+        self._open()
+
+
+def rotated_files(path):
+    """Arquivos rotacionados do log, do mais antigo ao mais recente"""
+    return sorted(glob.glob(glob.escape(path) + '.*'))
+
+
+def iter_log_entries(path):
+    """Entradas de todos os arquivos do log (rotacionados + atual), em ordem"""
+    for file_path in rotated_files(path) + [path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # Linha incompleta (escrita interrompida)
+
+
+def migrate_json_array(source, destination):
+    """
+    Converte o log antigo (array JSON reescrito a cada email) para JSON Lines.
+    As entradas são acrescentadas ao destino; o original é renomeado para
+    <arquivo>.migrated. Retorna o número de entradas convertidas.
+    """
+    with open(source, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    if not isinstance(entries, list):
+        raise ValueError(f"{source} não contém um array JSON")
+
+    with open(destination, 'a', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(source, source + '.migrated')
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ferramentas do log de classificações')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate = subparsers.add_parser('migrate', help='Converte o log antigo (array JSON) para JSON Lines')
+    migrate.add_argument('source', help='Arquivo antigo (ex.: email_classifications.json)')
+    migrate.add_argument('--out', default=None, help='Log JSON Lines de destino (padrão: <source>l)')
+    args = parser.parse_args()
+
+    destination = args.out or args.source + 'l'
+    count = migrate_json_array(args.source, destination)
+    print(f"✅ {count} entradas migradas → {destination}")
+    print(f"   Original preservado em {args.source}.migrated")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Orçamento de tempo por requisição
+O prazo é definido no início da requisição (start_deadline) e cada etapa
+lenta (ex.: chamada à API) espera no máximo o que sobrou (remaining).
+Fora de uma requisição (jobs em segundo plano, scripts) não há prazo.
+"""
+
+import concurrent.futures
+import contextvars
+import time
+
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """O resultado não chegou dentro do orçamento da requisição"""
+
+
+def start_deadline(seconds):
+    """Prazo de `seconds` a partir de agora (None/0 = sem prazo); retorna o token para end_deadline"""
+    return _deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+def end_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining(limit=None):
+    """
+    Segundos que restam do prazo, no máximo `limit`.
+    Sem prazo ativo retorna `limit` (None = esperar sem limite).
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return limit
+    left = max(0.0, deadline - time.monotonic())
+    return left if limit is None else min(limit, left)
+
+
+def wait(future, limit=None):
+    """future.result() limitado ao prazo; DeadlineExceeded se o resultado não chegar a tempo"""
+    timeout = remaining(limit)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        raise DeadlineExceeded(f"Sem resposta em {timeout:.2f}s") from None
+
+
+async def wait_async(awaitable, limit=None):
+    """Versão assíncrona de wait() (o awaitable é cancelado se o prazo acabar)"""
+    import asyncio  # Só o modo ASGI usa; o servidor WSGI não paga a importação
+
+    timeout = remaining(limit)
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Sem resposta em {timeout:.2f}s") from None
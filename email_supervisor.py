@@ -0,0 +1,265 @@
+"""
+Supervisor de várias contas e pastas de email
+Cada (conta, pasta) roda em sua própria thread, com conexão IMAP e estado de
+reconexão (backoff) próprios. O limite de taxa (RATE_LIMIT) vale para a
+conta inteira, somando todas as suas pastas. Todas alimentam uma fila de
+classificação compartilhada por CLASSIFIER_BATCH_URL, que envia lotes ao
+/classify/batch em paralelo.
+
+Uso:
+    python email_supervisor.py accounts.json
+
+Formato do arquivo (chaves = atributos de EmailConfig, ver accounts.example.json):
+    {
+      "defaults": {"CLASSIFIER_BATCH_URL": "http://localhost:5000/classify/batch"},
+      "accounts": [
+        {"ACCOUNT_NAME": "suporte", "EMAIL_ADDRESS": "suporte@empresa.com",
+         "EMAIL_PASSWORD_ENV": "SUPORTE_IMAP_PASSWORD", "FOLDERS": ["INBOX", "Clientes"],
+         "RATE_LIMIT": 5}
+      ]
+    }
+"""
+
+import argparse
+import imaplib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+from classification_log import ClassificationLog
+from email_sync import EmailConfig, EmailSynchronizer, sync_metrics
+from near_duplicates import NearDuplicateIndex
+from processed_index import ProcessedIndex
+from rate_limit import RateLimiter
+
+# Chaves do arquivo que não são atributos de EmailConfig
+EXTRA_KEYS = ('FOLDERS', 'EMAIL_PASSWORD_ENV')
+
+
+def make_config(settings):
+    """EmailConfig com os valores do arquivo sobrepostos aos padrões"""
+    config = EmailConfig()
+    for key, value in settings.items():
+        if key in EXTRA_KEYS:
+            continue
+        if not hasattr(EmailConfig, key):
+            raise ValueError(f"Configuração desconhecida: {key}")
+        setattr(config, key, value)
+
+    if settings.get('EMAIL_PASSWORD_ENV'):
+        config.EMAIL_PASSWORD = os.environ.get(settings['EMAIL_PASSWORD_ENV'], '')
+    return config
+
+
+def load_accounts(path):
+    """
+    Lê o arquivo de contas. Retorna (config base, lista de configs), uma
+    config por (conta, pasta).
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    defaults = data.get('defaults', {})
+    configs = []
+    for account in data.get('accounts', []):
+        settings = {**defaults, **account}
+        settings.setdefault('ACCOUNT_NAME', settings.get('EMAIL_ADDRESS'))
+        for folder in settings.get('FOLDERS') or [EmailConfig.MAILBOX]:
+            configs.append(make_config({**settings, 'MAILBOX': folder}))
+
+    return make_config(defaults), configs
+
+
+class SharedClassifier:
+    """
+    Fila de classificação compartilhada entre as contas.
+
+    Os emails de todas as contas são reunidos em lotes (até batch_size ou
+    max_wait segundos) e cada lote é enviado em uma thread do pool, então
+    várias requisições ao classificador ficam em andamento ao mesmo tempo.
+    """
+
+    def __init__(self, classify_batch, batch_size=50, max_wait=0.2, workers=4):
+        self.classify_batch = classify_batch
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._sender = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='classifier')
+        self._worker = threading.Thread(target=self._run_batcher, name='classifier-batcher', daemon=True)
+        self._worker.start()
+
+    def classify(self, emails):
+        """Classifica os emails (bloqueia até o resultado); None para falhas"""
+        futures = []
+        for email_data in emails:
+            future = Future()
+            self._queue.put((email_data, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _send(self, batch):
+        try:
+            results = self.classify_batch([email_data for email_data, _ in batch])
+        except Exception as e:
+            print(f"   ❌ Erro na classificação: {e}")
+            results = [None] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run_batcher(self):
+        while True:
+            self._sender.submit(self._send, self._collect_batch())
+
+
+class MailboxWorker(threading.Thread):
+    """Uma (conta, pasta): conecta, sincroniza e reconecta com backoff exponencial"""
+
+    MIN_BACKOFF = 5
+    MAX_BACKOFF = 300
+
+    def __init__(self, sync):
+        self.sync = sync
+        self.name_label = sync.mailbox_key
+        super().__init__(name=f'sync-{self.name_label}', daemon=True)
+        self.backoff = self.MIN_BACKOFF
+        self.failures = 0
+        self.status = 'iniciando'
+
+    def wait_backoff(self):
+        # Jitter: contas que caíram juntas não reconectam todas ao mesmo tempo
+        delay = self.backoff * random.uniform(0.8, 1.2)
+        self.status = f'reconectando em {delay:.0f}s'
+        time.sleep(delay)
+        self.backoff = min(self.backoff * 2, self.MAX_BACKOFF)
+
+    def run(self):
+        while True:
+            if not self.sync.connect_imap():
+                self.failures += 1
+                self.wait_backoff()
+                continue
+
+            self.backoff = self.MIN_BACKOFF
+            self.status = 'conectado'
+            try:
+                self.sync.run_push_loop()
+            except (imaplib.IMAP4.abort, OSError) as e:
+                print(f"⚠️  [{self.name_label}] Conexão perdida: {e}")
+            except Exception as e:
+                print(f"❌ [{self.name_label}] Erro: {e}")
+
+            self.failures += 1
+            self.sync.disconnect_imap()
+            self.wait_backoff()
+
+
+class EmailSupervisor:
+    """Cria e acompanha um MailboxWorker por (conta, pasta)"""
+
+    def __init__(self, base_config, configs, classifier_workers=4):
+        # Índice e log compartilhados (um arquivo, escritas coordenadas)
+        self.processed_index = ProcessedIndex(base_config.PROCESSED_DB)
+        self.classification_log = ClassificationLog(
+            base_config.LOG_FILE,
+            max_bytes=base_config.LOG_MAX_BYTES,
+            rotate_interval=base_config.LOG_ROTATE_INTERVAL,
+            backup_count=base_config.LOG_BACKUP_COUNT,
+            flush_every=base_config.LOG_FLUSH_EVERY,
+            flush_interval=base_config.LOG_FLUSH_INTERVAL,
+            fsync=base_config.LOG_FSYNC
+        )
+
+        # Grupos de quase idênticos compartilhados: o mesmo aviso chega a várias contas
+        self.near_duplicates = NearDuplicateIndex(
+            max_distance=base_config.NEAR_DUPLICATE_DISTANCE,
+            max_clusters=base_config.NEAR_DUPLICATE_MAX_CLUSTERS
+        ) if base_config.NEAR_DUPLICATES else None
+
+        # Um limite de taxa por conta: as pastas da conta dividem o RATE_LIMIT
+        self.rate_limiters = {}
+        # Uma fila de classificação por destino (URL e orçamento), com o
+        # classify_batch do primeiro sincronizador que usa esse destino
+        self.classifiers = {}
+        self.synchronizers = []
+        for config in configs:
+            account = config.ACCOUNT_NAME or config.EMAIL_ADDRESS
+            if account not in self.rate_limiters:
+                self.rate_limiters[account] = RateLimiter(config.RATE_LIMIT)
+
+            sync = EmailSynchronizer(config, self.processed_index, self.classification_log,
+                                     near_duplicates=self.near_duplicates,
+                                     rate_limiter=self.rate_limiters[account])
+
+            target = (config.CLASSIFIER_BATCH_URL, config.CLASSIFY_BUDGET_MS)
+            if target not in self.classifiers:
+                self.classifiers[target] = SharedClassifier(
+                    sync.classify_batch,
+                    batch_size=base_config.BATCH_SIZE,
+                    workers=classifier_workers
+                )
+            sync.classifier = self.classifiers[target]
+            self.synchronizers.append(sync)
+
+        if not self.synchronizers:
+            raise ValueError("Nenhuma conta configurada")
+
+        self.workers = [MailboxWorker(sync) for sync in self.synchronizers]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def print_status(self):
+        print(f"\n📊 STATUS [{datetime.now().strftime('%H:%M:%S')}]")
+        for worker in self.workers:
+            print(f"   {worker.name_label}: {worker.status} (falhas: {worker.failures})")
+
+    def run(self, status_interval=300):
+        print(f"🚀 Supervisionando {len(self.workers)} caixas")
+        self.start()
+        try:
+            while True:
+                time.sleep(status_interval)
+                self.print_status()
+        except KeyboardInterrupt:
+            print("\n\n👋 Encerrando supervisor...")
+            self.classification_log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sincroniza várias contas e pastas em paralelo')
+    parser.add_argument('accounts', help='Arquivo JSON com as contas')
+    parser.add_argument('--classifier-workers', type=int, default=4,
+                        help='Requisições simultâneas ao classificador')
+    args = parser.parse_args()
+
+    base_config, configs = load_accounts(args.accounts)
+    if base_config.METRICS_ENABLED and base_config.METRICS_PORT:
+        sync_metrics.serve(base_config.METRICS_PORT)
+        print(f"📊 Métricas em http://localhost:{base_config.METRICS_PORT}/metrics")
+    EmailSupervisor(base_config, configs, args.classifier_workers).run()
+
+
+if __name__ == '__main__':
+    main()
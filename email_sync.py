@@ -5,12 +5,24 @@ Suporta: Gmail API e IMAP (Gmail, Outlook, Yahoo, etc.)
 
 import imaplib
 import email
-from email.header import decode_header
+import re
+import socket
 import time
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import json
 from datetime import datetime
-import os
+
+from classification_log import ClassificationLog
+from imap_fetch import format_uid_set, parse_fetch_response, find_text_part, decode_part, FlagBatcher
+from metrics import MetricsRegistry, start_trace, finish_trace
+from mime_body import decode_header_value, extract_body, html_to_text
+from near_duplicates import NearDuplicateIndex, fingerprint
+from processed_index import ProcessedIndex
+from rate_limit import RateLimiter
+from smtp_sender import SmtpSender, build_reply, auto_reply_skip_reason
+from text_preprocessing import preprocess_text
 
 # ===============================================
 # CONFIGURAÇÕES
@@ -26,6 +38,7 @@ class EmailConfig:
     # IMAP_SERVER = "imap.mail.yahoo.com"  # Yahoo
     
     IMAP_PORT = 993
+    IMAP_SSL = True  # False só para servidores locais de teste (ex.: fake_imap_server.py)
     EMAIL_ADDRESS = "seu-email@gmail.com"  # ALTERE AQUI
     EMAIL_PASSWORD = "sua-senha-app"  # ALTERE AQUI (senha de app, não senha normal)
     
@@ -33,13 +46,79 @@ class EmailConfig:
     GMAIL_API_ENABLED = False  # Deixe False por enquanto (requer configuração OAuth)
     
     # Configurações de sincronização
-    CHECK_INTERVAL = 60  # Verificar emails a cada 60 segundos
+    CHECK_INTERVAL = 60  # Intervalo máximo entre verificações (modo polling)
+    USE_IDLE = True  # Push via IMAP IDLE (se o servidor suportar; senão, polling)
+    IDLE_REFRESH = 25 * 60  # Renovar o IDLE antes dos 29 min em que servidores derrubam a conexão
+    POLL_MIN_INTERVAL = 5  # Polling adaptativo: começa aqui e dobra até CHECK_INTERVAL
+    FULL_SYNC_INTERVAL = 30 * 60  # Varredura completa de UNSEEN (pega emails marcados como não lidos de novo)
     AUTO_CLASSIFY = True  # Classificar automaticamente
-    AUTO_RESPOND = False  # Responder automaticamente (cuidado!)
-    MARK_AS_READ = False  # Marcar como lido após processar
+    AUTO_RESPOND = False  # Responder automaticamente (cuidado!; nunca a listas, envios em massa e respostas automáticas)
+    MARK_AS_READ = False  # Marcar como lido após processar (um UID STORE por ciclo)
+    
+    # SMTP - usado só com AUTO_RESPOND = True
+    SMTP_SERVER = "smtp.gmail.com"
+    # SMTP_SERVER = "smtp.office365.com"  # Outlook
+    SMTP_PORT = 587
+    SMTP_SECURITY = 'starttls'  # 'ssl' (porta 465), 'starttls' (porta 587) ou None (servidor local de teste)
+    SMTP_USERNAME = None  # None = EMAIL_ADDRESS
+    SMTP_PASSWORD = None  # None = EMAIL_PASSWORD
+    SMTP_POOL_SIZE = 2  # Conexões SMTP mantidas abertas
+    SMTP_RATE_LIMIT = 1  # Máximo de respostas enviadas por segundo (None = sem limite)
     
     # URL do classificador (quando estiver rodando)
     CLASSIFIER_URL = "http://localhost:5000/classify"
+    CLASSIFIER_BATCH_URL = "http://localhost:5000/classify/batch"
+    
+    # Classificação em lote (uma requisição para vários emails)
+    BATCH_CLASSIFY = True
+    BATCH_SIZE = 50  # Emails por requisição ao /classify/batch
+    CLASSIFY_BUDGET_MS = 0  # Prazo pedido ao classificador (?budget_ms=): 0 = esperar a API, None = padrão do servidor
+    
+    # Emails quase idênticos (mesmo modelo, nomes/números diferentes): só um por grupo é classificado
+    NEAR_DUPLICATES = True
+    NEAR_DUPLICATE_DISTANCE = 4  # Bits diferentes (de 64) aceitos no SimHash
+    NEAR_DUPLICATE_MAX_CLUSTERS = 10000
+    
+    # Download em lote: cabeçalhos + parte de texto (anexos não são baixados)
+    FETCH_BATCH_SIZE = 100  # Emails por UID FETCH
+    FETCH_MAX_BODY_BYTES = 64 * 1024  # Máximo baixado do corpo de cada email
+    BODY_MAX_CHARS = 10000  # Máximo de caracteres do corpo usados na classificação
+    
+    # Pipeline: a busca do próximo lote acontece enquanto os anteriores são classificados
+    CLASSIFY_WORKERS = 4  # Lotes classificados em paralelo
+    PIPELINE_DEPTH = 4  # Lotes baixados aguardando classificação (limita a memória)
+    
+    # Caixa monitorada e índice dos emails já processados (sobrevive a reinícios)
+    ACCOUNT_NAME = None  # Prefixo da caixa no índice (várias contas, ver email_supervisor.py)
+    MAILBOX = "inbox"
+    RATE_LIMIT = None  # Máximo de emails baixados por segundo (None = sem limite; por conta no supervisor)
+    PROCESSED_DB = "processed_emails.db"
+    PROCESSED_RETENTION_DAYS = 90  # UIDs abaixo do high-water mark mais antigos que isso são apagados (None = nunca)
+    PROCESSED_PRUNE_INTERVAL = 24 * 3600  # Limpeza do índice no máximo uma vez a cada N segundos
+    
+    # Log de classificações (JSON Lines, só acrescenta)
+    # Log antigo em array JSON? Migre com: python classification_log.py migrate email_classifications.json
+    LOG_FILE = "email_classifications.jsonl"
+    LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotaciona ao passar de 10MB
+    LOG_ROTATE_INTERVAL = None  # Rotação por tempo, em segundos (ex.: 86400 = diária)
+    LOG_BACKUP_COUNT = 30  # Arquivos rotacionados mantidos (0 = todos)
+    LOG_FLUSH_EVERY = 50  # Entradas por gravação em disco
+    LOG_FLUSH_INTERVAL = 5  # Ou a cada N segundos
+    LOG_FSYNC = 'batch'  # 'always', 'batch' ou 'never'
+    LOG_EMAIL_TEXT = True  # Guardar o texto classificado (treino do local_classifier.py --logs)
+    
+    # Métricas por etapa (busca, classificação, log); METRICS_PORT expõe GET /metrics (Prometheus)
+    METRICS_ENABLED = True
+    METRICS_PORT = None  # Ex.: 9100
+
+
+# Compartilhadas por todos os sincronizadores do processo (rótulo: caixa)
+sync_metrics = MetricsRegistry('email_sync', stage_labels=('mailbox',))
+disabled_metrics = MetricsRegistry('email_sync', enabled=False)
+
+# Nomes das etapas no resumo de cada ciclo
+STAGE_NAMES = {'search': 'busca', 'fetch': 'download', 'classify': 'classificação',
+               'log': 'log', 'flags': 'flags', 'smtp': 'respostas'}
 
 
 # ===============================================
@@ -49,10 +128,47 @@ class EmailConfig:
 class EmailSynchronizer:
     """Sincroniza emails usando IMAP ou Gmail API"""
     
-    def __init__(self, config):
+    def __init__(self, config, processed_index=None, classification_log=None, classifier=None,
+                 near_duplicates=None, rate_limiter=None):
+        """
+        processed_index, classification_log, classifier, near_duplicates e
+        rate_limiter podem ser compartilhados entre sincronizadores (ver
+        email_supervisor.py)
+        """
         self.config = config
         self.mail = None
-        self.processed_emails = set()  # IDs já processados
+        self.processed_index = processed_index or ProcessedIndex(config.PROCESSED_DB)  # UIDs já processados
+        self.mailbox_key = f"{config.ACCOUNT_NAME}/{config.MAILBOX}" if config.ACCOUNT_NAME else config.MAILBOX
+        self.uidvalidity = None
+        self.classifier = classifier
+        self.near_duplicates = near_duplicates
+        if near_duplicates is None and config.NEAR_DUPLICATES:
+            self.near_duplicates = NearDuplicateIndex(
+                max_distance=config.NEAR_DUPLICATE_DISTANCE,
+                max_clusters=config.NEAR_DUPLICATE_MAX_CLUSTERS
+            )
+        self.rate_limiter = rate_limiter or RateLimiter(config.RATE_LIMIT)
+        self.flag_batcher = FlagBatcher('(\\Seen)')
+        self.smtp_sender = None  # Criado no primeiro envio
+        self._sending = []  # Respostas em envio no ciclo atual
+        self._retry_from = None
+        self._last_prune = None  # time.monotonic() da última limpeza do índice
+        self.metrics = sync_metrics if config.METRICS_ENABLED else disabled_metrics
+        self.emails_processed = self.metrics.counter(
+            'emails_processed_total', 'Emails processados', ('mailbox',))
+        self.classification_failures = self.metrics.counter(
+            'classification_failures_total', 'Emails sem classificação (erro no classificador)', ('mailbox',))
+        self._idle_buffer = bytearray()
+        self._idle_tags = 0
+        self.classification_log = classification_log or ClassificationLog(
+            config.LOG_FILE,
+            max_bytes=config.LOG_MAX_BYTES,
+            rotate_interval=config.LOG_ROTATE_INTERVAL,
+            backup_count=config.LOG_BACKUP_COUNT,
+            flush_every=config.LOG_FLUSH_EVERY,
+            flush_interval=config.LOG_FLUSH_INTERVAL,
+            fsync=config.LOG_FSYNC
+        )
         
     def connect_imap(self):
         """Conecta ao servidor IMAP"""
@@ -60,10 +176,12 @@ class EmailSynchronizer:
             print(f"🔌 Conectando ao servidor IMAP: {self.config.IMAP_SERVER}...")
             
             # Conectar com SSL
-            self.mail = imaplib.IMAP4_SSL(
+            imap_class = imaplib.IMAP4_SSL if self.config.IMAP_SSL else imaplib.IMAP4
+            self.mail = imap_class(
                 self.config.IMAP_SERVER,
                 self.config.IMAP_PORT
             )
+            self.uidvalidity = None
             
             # Login
             self.mail.login(
@@ -86,43 +204,159 @@ class EmailSynchronizer:
             print(f"❌ Erro ao conectar: {e}")
             return False
     
-    def get_unread_emails(self):
-        """Busca emails não lidos"""
+    def search_unread(self, only_new=False):
+        """
+        UIDs dos emails não lidos ainda não processados. Com only_new, só os
+        que chegaram depois do último UID processado (sem selecionar a caixa de novo)
+        """
         try:
             # Selecionar caixa de entrada
-            self.mail.select('inbox')
+            if not only_new or self.uidvalidity is None:
+                self.select_mailbox()
             
-            # Buscar emails não lidos
-            status, messages = self.mail.search(None, 'UNSEEN')
+            # Buscar emails não lidos (por UID: estável entre sessões)
+            criteria = ['UNSEEN']
+            if only_new:
+                high_water = self.processed_index.high_water(self.mailbox_key, self.uidvalidity)
+                criteria = ['UID', f'{high_water + 1}:*', 'UNSEEN']
+            with self.span('search'):
+                status, messages = self.mail.uid('search', None, *criteria)
             
             if status != 'OK':
                 print("❌ Erro ao buscar emails")
                 return []
             
-            email_ids = messages[0].split()
-            
-            if not email_ids:
-                return []
+            # Ignorar emails já processados (antes de baixá-los)
+            email_ids = self.processed_index.filter_new(
+                self.mailbox_key, self.uidvalidity, messages[0].split()
+            )
             
-            print(f"📬 {len(email_ids)} emails não lidos encontrados")
+            if email_ids:
+                print(f"📬 {len(email_ids)} emails não lidos encontrados")
             
-            emails = []
-            for email_id in email_ids:
-                email_data = self.fetch_email(email_id)
-                if email_data:
-                    emails.append(email_data)
+            return email_ids
             
-            return emails
+        except imaplib.IMAP4.abort:
+            raise  # Conexão perdida: quem chamou reconecta
             
         except Exception as e:
             print(f"❌ Erro ao buscar emails: {e}")
             return []
     
+    def iter_email_batches(self, uids):
+        """Gera os emails em lotes de FETCH_BATCH_SIZE, baixando um lote por vez"""
+        batch_size = max(1, self.config.FETCH_BATCH_SIZE)
+        for start in range(0, len(uids), batch_size):
+            batch = uids[start:start + batch_size]
+            self.rate_limiter.acquire(len(batch))
+            with self.span('fetch'):
+                emails = self.fetch_emails(batch)
+            if emails:
+                yield emails
+    
+    def get_unread_emails(self, only_new=False):
+        """Busca emails não lidos (todos em memória; process_emails usa os lotes)"""
+        return [email_data for batch in self.iter_email_batches(self.search_unread(only_new))
+                for email_data in batch]
+    
+    def select_mailbox(self):
+        """Seleciona a caixa monitorada e confere o UIDVALIDITY"""
+        mailbox = self.config.MAILBOX
+        if ' ' in mailbox and not mailbox.startswith('"'):
+            mailbox = f'"{mailbox}"'
+        self.mail.select(mailbox)
+        
+        _, data = self.mail.response('UIDVALIDITY')
+        self.uidvalidity = int(data[0]) if data and data[0] else 0
+        self.mail.response('EXISTS')  # Descartar: só interessam os próximos
+        
+        if not self.processed_index.check_uidvalidity(self.mailbox_key, self.uidvalidity):
+            print("⚠️  UIDVALIDITY mudou: índice de emails processados reiniciado")
+    
+    def fetch_emails(self, uids):
+        """
+        Busca vários emails com poucos comandos: um UID FETCH para os
+        cabeçalhos e o BODYSTRUCTURE do lote e um por seção de texto
+        (normalmente '1' ou '1.1'). Emails fora do padrão usam fetch_email.
+        """
+        status, data = self.mail.uid(
+            'fetch', format_uid_set(uids), '(UID BODYSTRUCTURE BODY.PEEK[HEADER])'
+        )
+        if status != 'OK':
+            return []
+        
+        messages = {}
+        sections = {}  # seção -> UIDs
+        fallback = []
+        for message in parse_fetch_response(data):
+            uid = message.get('UID')
+            try:
+                text_part = find_text_part(message['BODYSTRUCTURE'], ('plain', 'html'))
+                header = message['BODY[HEADER]']
+            except Exception:
+                fallback.append(uid)
+                continue
+            
+            messages[uid] = (header, text_part)
+            if text_part is not None:
+                sections.setdefault(text_part[0], []).append(uid)
+        
+        # Só a parte de texto (text/plain ou, sem ela, text/html), e no máximo FETCH_MAX_BODY_BYTES dela
+        bodies = {}
+        for section, section_uids in sections.items():
+            item = f'BODY.PEEK[{section}]<0.{self.config.FETCH_MAX_BODY_BYTES}>'
+            status, data = self.mail.uid('fetch', format_uid_set(section_uids), f'(UID {item})')
+            if status != 'OK':
+                continue
+            for message in parse_fetch_response(data):
+                bodies[message.get('UID')] = message.get(f'BODY[{section}]<0>')
+        
+        emails = []
+        for uid in uids:
+            uid = int(uid)
+            if uid in messages:
+                header, text_part = messages[uid]
+                body = ''
+                if text_part is not None:
+                    _, params, encoding, _, subtype = text_part
+                    body = decode_part(bodies.get(uid), encoding, params.get('charset'))
+                    if subtype == 'html':
+                        body = html_to_text(body)
+                    body = body[:self.config.BODY_MAX_CHARS]
+                emails.append(self.build_email_data(uid, email.message_from_bytes(header), body))
+            elif uid in fallback:
+                email_data = self.fetch_email(uid)
+                if email_data:
+                    emails.append(email_data)
+        
+        return emails
+    
+    def build_email_data(self, email_id, email_message, body):
+        """Dicionário usado no restante do processamento"""
+        subject = self.decode_subject(email_message.get('Subject', ''))
+        from_email = email_message.get('From', '')
+        body = body.strip()
+        
+        return {
+            'id': str(email_id),
+            'subject': subject,
+            'from': from_email,
+            'date': email_message.get('Date', ''),
+            'message_id': email_message.get('Message-ID', ''),
+            # Cabeçalhos usados nas respostas automáticas (RFC 3834)
+            'references': email_message.get('References', ''),
+            'auto_submitted': email_message.get('Auto-Submitted', ''),
+            'precedence': email_message.get('Precedence', ''),
+            'list_id': email_message.get('List-Id', ''),
+            'body': body,
+            'full_text': f"Assunto: {subject}\n\nDe: {from_email}\n\n{body}"
+        }
+    
     def fetch_email(self, email_id):
-        """Busca detalhes de um email específico"""
+        """Busca detalhes de um email específico (pelo UID)"""
         try:
-            # Buscar email
-            status, msg_data = self.mail.fetch(email_id, '(RFC822)')
+            # Buscar email (PEEK: não marca como lido)
+            status, msg_data = self.mail.uid('fetch', str(email_id), '(BODY.PEEK[])')
             
             if status != 'OK':
                 return None
@@ -130,24 +364,10 @@ class EmailSynchronizer:
             # Parse do email
             email_message = email.message_from_bytes(msg_data[0][1])
             
-            # Extrair informações
-            subject = self.decode_subject(email_message.get('Subject', ''))
-            from_email = email_message.get('From', '')
-            date = email_message.get('Date', '')
-            
             # Extrair corpo do email
             body = self.get_email_body(email_message)
             
-            email_data = {
-                'id': email_id.decode(),
-                'subject': subject,
-                'from': from_email,
-                'date': date,
-                'body': body,
-                'full_text': f"Assunto: {subject}\n\nDe: {from_email}\n\n{body}"
-            }
-            
-            return email_data
+            return self.build_email_data(email_id, email_message, body)
             
         except Exception as e:
             print(f"❌ Erro ao processar email {email_id}: {e}")
@@ -159,38 +379,15 @@ class EmailSynchronizer:
             return "(Sem assunto)"
         
         try:
-            decoded = decode_header(subject)[0]
-            if isinstance(decoded[0], bytes):
-                return decoded[0].decode(decoded[1] or 'utf-8')
-            return decoded[0]
+            # Todas as partes (um assunto longo vem em vários trechos codificados)
+            return decode_header_value(subject)
         except:
             return subject
     
     def get_email_body(self, email_message):
-        """Extrai corpo do email"""
-        body = ""
-        
+        """Extrai corpo do email (text/plain ou HTML convertido; anexos ignorados)"""
         try:
-            if email_message.is_multipart():
-                # Email com múltiplas partes
-                for part in email_message.walk():
-                    content_type = part.get_content_type()
-                    
-                    if content_type == "text/plain":
-                        try:
-                            payload = part.get_payload(decode=True)
-                            if payload:
-                                body = payload.decode('utf-8', errors='ignore')
-                                break
-                        except:
-                            continue
-            else:
-                # Email simples
-                payload = email_message.get_payload(decode=True)
-                if payload:
-                    body = payload.decode('utf-8', errors='ignore')
-            
-            return body.strip()
+            return extract_body(email_message, self.config.BODY_MAX_CHARS).strip()
             
         except Exception as e:
             print(f"⚠️  Erro ao extrair corpo: {e}")
@@ -208,6 +405,7 @@ class EmailSynchronizer:
             response = requests.post(
                 self.config.CLASSIFIER_URL,
                 data=data,
+                params={'budget_ms': self.config.CLASSIFY_BUDGET_MS},
                 timeout=30
             )
             
@@ -233,110 +431,464 @@ class EmailSynchronizer:
             print(f"   ❌ Erro: {e}")
             return None
     
+    def classify_batch(self, emails):
+        """
+        Classifica vários emails em uma única requisição ao /classify/batch.
+        Retorna uma lista alinhada com a entrada (None para falhas).
+        """
+        try:
+            print(f"\n🤖 Classificando lote de {len(emails)} emails...")
+            
+            payload = [
+                {'id': email_data['id'], 'email_text': email_data['full_text']}
+                for email_data in emails
+            ]
+            
+            response = requests.post(
+                self.config.CLASSIFIER_BATCH_URL,
+                json=payload,
+                params={'budget_ms': self.config.CLASSIFY_BUDGET_MS},
+                timeout=30 + 2 * len(emails)
+            )
+            
+            if response.status_code != 200:
+                print(f"   ❌ Erro: {response.status_code}")
+                return [None] * len(emails)
+            
+            results = response.json().get('results', [])
+            classifications = []
+            for email_data, result in zip(emails, results):
+                if result.get('success'):
+                    print(f"   ✅ '{email_data['subject']}': {result['category']} ({result['confidence']}%)")
+                    classifications.append(result)
+                else:
+                    print(f"   ❌ '{email_data['subject']}': {result.get('error')}")
+                    classifications.append(None)
+            
+            # Completar caso o servidor tenha retornado menos resultados
+            classifications.extend([None] * (len(emails) - len(classifications)))
+            return classifications
+            
+        except requests.exceptions.ConnectionError:
+            print("   ⚠️  Classificador não está rodando!")
+            print("   💡 Execute: python app.py")
+            return [None] * len(emails)
+            
+        except Exception as e:
+            print(f"   ❌ Erro: {e}")
+            return [None] * len(emails)
+    
+    def classify_all(self, emails):
+        """
+        Classifica os emails. Com NEAR_DUPLICATES, emails quase idênticos a um
+        já classificado reaproveitam o resultado e, dentro do lote, só o
+        primeiro de cada grupo (representante) vai ao classificador.
+        """
+        if self.near_duplicates is None:
+            return self.classify_remote(emails)
+        
+        classifications = [None] * len(emails)
+        representatives = {}  # grupo -> posição do representante em `pending`
+        pending = []  # (emails a classificar, grupo)
+        members = []  # (posição no lote, índice em `pending`)
+        
+        for i, email_data in enumerate(emails):
+            # Mesmo texto que o /classify usa para o fingerprint (após preprocess_text)
+            value = fingerprint(preprocess_text(email_data['full_text']))
+            cluster_id, near = self.near_duplicates.assign(value) if value is not None else (None, None)
+            
+            if near is not None:
+                classifications[i] = {**near, 'near_duplicate': True}
+            elif cluster_id is not None and cluster_id in representatives:
+                members.append((i, representatives[cluster_id]))
+            else:
+                if cluster_id is not None:
+                    representatives[cluster_id] = len(pending)
+                members.append((i, len(pending)))
+                pending.append((email_data, cluster_id))
+        
+        results = self.classify_remote([email_data for email_data, _ in pending]) if pending else []
+        for (_, cluster_id), result in zip(pending, results):
+            # Resultado degradado (palavras-chave no lugar da API) não vale para o grupo
+            if result is not None and cluster_id is not None and not result.get('degraded'):
+                self.near_duplicates.set_result(cluster_id, result)
+        
+        for i, position in members:
+            result = results[position]
+            if result is not None and emails[i] is not pending[position][0]:
+                result = {**result, 'near_duplicate': True}
+            classifications[i] = result
+        
+        reused = sum(1 for c in classifications if c is not None and c.get('near_duplicate'))
+        if reused:
+            print(f"   🔁 {reused} emails quase idênticos a outros já classificados")
+        return classifications
+    
+    def classify_remote(self, emails):
+        """Classifica os emails em lotes de BATCH_SIZE (ou um a um, se desabilitado)"""
+        if self.classifier is not None:
+            return self.classifier.classify(emails)
+        
+        if not self.config.BATCH_CLASSIFY:
+            return [self.classify_email(email_data) for email_data in emails]
+        
+        classifications = []
+        batch_size = max(1, self.config.BATCH_SIZE)
+        for start in range(0, len(emails), batch_size):
+            classifications.extend(self.classify_batch(emails[start:start + batch_size]))
+        
+        return classifications
+    
+    def span(self, stage):
+        """Mede uma etapa (histograma email_sync_stage_seconds e resumo do ciclo)"""
+        return self.metrics.span(stage, mailbox=self.mailbox_key)
+    
     def mark_as_read(self, email_id):
-        """Marca email como lido"""
+        """Marca email como lido (gravado no próximo flush_flags)"""
+        self.flag_batcher.add([email_id])
+    
+    def flush_flags(self):
+        """Envia as marcações pendentes em poucos UID STORE"""
+        if not len(self.flag_batcher):
+            return
+        
+        count = len(self.flag_batcher)
         try:
-            self.mail.store(email_id, '+FLAGS', '\\Seen')
+            with self.span('flags'):
+                commands = self.flag_batcher.flush(self.mail)
+            print(f"👁️  {count} emails marcados como lidos ({commands} comando(s) STORE)")
         except Exception as e:
             print(f"⚠️  Erro ao marcar como lido: {e}")
     
+    def get_smtp_sender(self):
+        if self.smtp_sender is None:
+            self.smtp_sender = SmtpSender(
+                self.config.SMTP_SERVER,
+                self.config.SMTP_PORT,
+                username=self.config.SMTP_USERNAME or self.config.EMAIL_ADDRESS,
+                password=self.config.SMTP_PASSWORD or self.config.EMAIL_PASSWORD,
+                security=self.config.SMTP_SECURITY,
+                pool_size=self.config.SMTP_POOL_SIZE,
+                rate_limit=self.config.SMTP_RATE_LIMIT
+            )
+        return self.smtp_sender
+    
     def send_response(self, email_data, response_text):
         """
-        Envia resposta automática (CUIDADO!)
-        Desabilitado por padrão para segurança
+        Envia resposta automática (CUIDADO!) em segundo plano.
+        Só é chamado com AUTO_RESPOND = True. Emails automáticos, de listas
+        ou em massa não são respondidos (RFC 3834).
         """
-        print("⚠️  Envio automático desabilitado (configuração de segurança)")
-        print("💡 Para habilitar, implemente SMTP no código")
+        if not response_text:
+            return
+        
+        reason = auto_reply_skip_reason(email_data)
+        if reason:
+            print(f"   ⏭️  Sem resposta automática ({reason})")
+            return
+        
+        try:
+            message = build_reply(email_data, response_text, self.config.EMAIL_ADDRESS)
+            self._sending.append((email_data, self.get_smtp_sender().submit(message)))
+            print("   📤 Resposta na fila de envio")
+        except Exception as e:
+            print(f"   ❌ Erro ao preparar resposta: {e}")
+    
+    def wait_responses(self):
+        """Espera as respostas do ciclo serem enviadas"""
+        sent = 0
+        for email_data, future in self._sending:
+            try:
+                with self.span('smtp'):
+                    future.result()
+                sent += 1
+            except Exception as e:
+                print(f"❌ Erro ao responder \"{email_data['subject']}\": {e}")
         
-        # TODO: Implementar SMTP para envio
-        # import smtplib
-        # ...
+        if self._sending:
+            print(f"📤 {sent}/{len(self._sending)} respostas enviadas")
+        self._sending = []
     
     def save_classification_log(self, email_data, classification):
-        """Salva log das classificações"""
-        log_file = 'email_classifications.json'
-        
+        """Registra a classificação no log (gravado em lotes)"""
         try:
-            # Carregar logs existentes
-            if os.path.exists(log_file):
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            else:
-                logs = []
-            
-            # Adicionar novo log
-            log_entry = {
-                'timestamp': datetime.now().isoformat(),
-                'email_id': email_data['id'],
-                'subject': email_data['subject'],
-                'from': email_data['from'],
-                'category': classification.get('category'),
-                'confidence': classification.get('confidence'),
-                'response': classification.get('suggested_response')
-            }
-            
-            logs.append(log_entry)
-            
-            # Salvar
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
-            
-            print(f"   💾 Log salvo em {log_file}")
+            with self.span('log'):
+                self.classification_log.append({
+                    'timestamp': datetime.now().isoformat(),
+                    'email_id': email_data['id'],
+                    'subject': email_data['subject'],
+                    'from': email_data['from'],
+                    'category': classification.get('category'),
+                    'confidence': classification.get('confidence'),
+                    'response': classification.get('suggested_response'),
+                    'degraded': classification.get('degraded', False),
+                    **({'email_text': email_data['full_text']} if self.config.LOG_EMAIL_TEXT else {})
+                })
+            
+            print(f"   💾 Log registrado em {self.config.LOG_FILE}")
             
         except Exception as e:
             print(f"   ⚠️  Erro ao salvar log: {e}")
     
-    def process_emails(self):
-        """Processa emails não lidos"""
-        emails = self.get_unread_emails()
+    def process_emails(self, only_new=False):
+        """
+        Processa emails não lidos em pipeline; retorna quantos foram processados.
         
-        if not emails:
-            print("📭 Nenhum email novo")
+        - Busca (esta thread, dona da conexão IMAP): um lote por vez
+        - Classificação: até CLASSIFY_WORKERS lotes em paralelo
+        - Gravação (esta thread): log, resposta e flags, lote a lote, na ordem
+        - Fim do ciclo: um UID STORE para todas as flags; espera os envios SMTP
+        
+        No máximo PIPELINE_DEPTH lotes aguardam classificação: a busca espera
+        (contrapressão), então a memória fica limitada mesmo com milhares de emails.
+        """
+        token = start_trace()
+        try:
+            return self.run_pipeline(only_new)
+        finally:
+            self.print_stage_summary(finish_trace(token))
+    
+    def prune_processed_index(self):
+        """Limpa o índice de processados desta caixa (no máximo a cada PROCESSED_PRUNE_INTERVAL)"""
+        retention = self.config.PROCESSED_RETENTION_DAYS
+        if retention is None:
+            return
+        if self._last_prune is not None and time.monotonic() - self._last_prune < self.config.PROCESSED_PRUNE_INTERVAL:
             return
         
+        self._last_prune = time.monotonic()
+        try:
+            removed = self.processed_index.prune(retention * 86400, self.mailbox_key)
+            if removed:
+                print(f"🧹 {removed} UIDs antigos removidos do índice de processados")
+        except Exception as e:
+            print(f"⚠️  Erro ao limpar o índice de processados: {e}")
+    
+    def run_pipeline(self, only_new):
+        uids = self.search_unread(only_new)
+        self.prune_processed_index()
+        self._retry_from = None  # Menor UID deste ciclo que falhou na classificação
+        
+        if not uids:
+            print("📭 Nenhum email novo")
+            return 0
+        
         print(f"\n{'='*60}")
-        print(f"📨 PROCESSANDO {len(emails)} EMAILS")
+        print(f"📨 PROCESSANDO {len(uids)} EMAILS")
         print(f"{'='*60}")
         
-        for i, email_data in enumerate(emails, 1):
-            # Verificar se já foi processado
-            if email_data['id'] in self.processed_emails:
-                continue
-            
-            print(f"\n📧 Email {i}/{len(emails)}")
+        processed = 0
+        pending = deque()  # (lote, future da classificação)
+        depth = max(1, self.config.PIPELINE_DEPTH)
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.config.CLASSIFY_WORKERS)) as pool:
+            try:
+                for batch in self.iter_email_batches(uids):
+                    # Cópia do contexto: o tempo de classificação entra no resumo do ciclo
+                    future = pool.submit(contextvars.copy_context().run, self.classify_stage, batch)
+                    pending.append((batch, future))
+                    
+                    # Gravar os lotes prontos; esperar se o pipeline estiver cheio
+                    while pending and (len(pending) >= depth or pending[0][1].done()):
+                        batch, future = pending.popleft()
+                        processed += self.sink_stage(batch, future.result(), processed, len(uids))
+            finally:
+                # Mesmo se a busca falhar, o que já foi classificado é gravado
+                while pending:
+                    batch, future = pending.popleft()
+                    processed += self.sink_stage(batch, future.result(), processed, len(uids))
+                
+                # Gravar o restante do lote de logs
+                try:
+                    with self.span('log'):
+                        self.classification_log.flush()
+                except Exception as e:
+                    print(f"⚠️  Erro ao salvar log: {e}")
+                
+                self.flush_flags()
+                self.wait_responses()
+        
+        print(f"\n{'='*60}\n")
+        return processed
+    
+    def print_stage_summary(self, stages):
+        """Tempo de cada etapa no ciclo (classificação: somada entre os lotes paralelos)"""
+        if 'fetch' not in stages:
+            return
+        parts = [f"{STAGE_NAMES.get(stage, stage)} {seconds:.2f}s"
+                 for stage, (seconds, _) in stages.items()]
+        print(f"⏱️  {' · '.join(parts)}")
+    
+    def classify_stage(self, emails):
+        """Etapa de classificação de um lote (roda no pool)"""
+        if not self.config.AUTO_CLASSIFY:
+            return [None] * len(emails)
+        
+        with self.span('classify'):
+            classifications = self.classify_all(emails)
+        
+        failures = sum(1 for classification in classifications if classification is None)
+        if failures:
+            self.classification_failures.inc(failures, mailbox=self.mailbox_key)
+        return classifications
+    
+    def sink_stage(self, emails, classifications, offset, total):
+        """
+        Etapa final de um lote: log, resposta, flags e índice de processados.
+        Emails que o classificador não conseguiu classificar não são marcados
+        (nem como lidos): voltam no próximo ciclo.
+        """
+        done = []
+        for i, (email_data, classification) in enumerate(zip(emails, classifications), offset + 1):
+            print(f"\n📧 Email {i}/{total}")
             print(f"   De: {email_data['from']}")
             print(f"   Assunto: {email_data['subject']}")
             print(f"   Data: {email_data['date']}")
             
-            # Classificar
+            # Classificação
             if self.config.AUTO_CLASSIFY:
-                classification = self.classify_email(email_data)
+                if not classification:
+                    self._retry_from = min(int(email_data['id']), self._retry_from or float('inf'))
+                    print("   ⚠️  Não classificado: nova tentativa no próximo ciclo")
+                    continue
                 
-                if classification:
-                    # Salvar log
-                    self.save_classification_log(email_data, classification)
-                    
-                    # Responder automaticamente (se habilitado)
-                    if self.config.AUTO_RESPOND:
-                        self.send_response(email_data, classification['suggested_response'])
+                # Salvar log
+                self.save_classification_log(email_data, classification)
+                
+                # Responder automaticamente (se habilitado)
+                if self.config.AUTO_RESPOND:
+                    self.send_response(email_data, classification['suggested_response'])
             
             # Marcar como lido (se habilitado)
             if self.config.MARK_AS_READ:
-                self.mark_as_read(email_data['id'].encode())
-            
-            # Marcar como processado
-            self.processed_emails.add(email_data['id'])
+                self.mark_as_read(email_data['id'])
             
+            done.append(int(email_data['id']))
             print(f"   ✅ Processado")
         
-        print(f"\n{'='*60}\n")
+        # Marcar como processados (persistente); o high-water mark não passa
+        # do primeiro email que falhou, para o only_new buscá-lo de novo
+        if done:
+            high_water = max(done)
+            if self._retry_from is not None:
+                high_water = min(high_water, self._retry_from - 1)
+            self.processed_index.add_many(self.mailbox_key, self.uidvalidity, done, high_water=high_water)
+            self.emails_processed.inc(len(done), mailbox=self.mailbox_key)
+        return len(emails)
+    
+    # ------------------------------------------------
+    # IMAP IDLE (push)
+    # ------------------------------------------------
+    
+    def supports_idle(self):
+        return 'IDLE' in self.mail.capabilities
+    
+    def _read_line(self, deadline):
+        """
+        Lê uma linha direto do socket até o prazo (None se não chegar nada).
+        O arquivo interno do imaplib não suporta timeout sem ficar inutilizável.
+        """
+        sock = self.mail.sock
+        previous_timeout = sock.gettimeout()
+        
+        try:
+            while b'\r\n' not in self._idle_buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                sock.settimeout(remaining)
+                try:
+                    chunk = sock.recv(4096)
+                except socket.timeout:
+                    return None
+                if not chunk:
+                    raise imaplib.IMAP4.abort('Conexão encerrada pelo servidor')
+                self._idle_buffer += chunk
+        finally:
+            sock.settimeout(previous_timeout)
+        
+        line, _, rest = bytes(self._idle_buffer).partition(b'\r\n')
+        self._idle_buffer = bytearray(rest)
+        return line
+    
+    def idle_wait(self, timeout):
+        """
+        Entra em IDLE e espera uma notificação EXISTS (email novo) ou o
+        timeout. Retorna True se chegou email novo.
+        """
+        self._idle_tags += 1
+        tag = f'IDLE{self._idle_tags}'.encode()
+        self._idle_buffer.clear()
+        self.mail.send(tag + b' IDLE\r\n')
+        
+        line = self._read_line(time.monotonic() + 30)
+        if line is None or not line.startswith(b'+'):
+            raise imaplib.IMAP4.abort(f'IDLE recusado: {line!r}')
+        
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        while not new_mail:
+            line = self._read_line(deadline)
+            if line is None:
+                break  # Hora de renovar o IDLE
+            new_mail = re.match(rb'\* \d+ EXISTS', line) is not None
+        
+        # Encerrar o IDLE e consumir a resposta final
+        self.mail.send(b'DONE\r\n')
+        while True:
+            line = self._read_line(time.monotonic() + 30)
+            if line is None:
+                raise imaplib.IMAP4.abort('Sem resposta ao encerrar o IDLE')
+            if line.startswith(tag):
+                break
+            new_mail = new_mail or re.match(rb'\* \d+ EXISTS', line) is not None
+        
+        return new_mail
+    
+    def poll_for_changes(self):
+        """NOOP: o servidor informa EXISTS se a caixa mudou (sem SEARCH)"""
+        self.mail.noop()
+        _, data = self.mail.response('EXISTS')
+        return bool(data and data[0] is not None)
+    
+    def run_push_loop(self):
+        """
+        Loop principal: IDLE se o servidor suportar; senão, polling com
+        intervalo adaptativo (curto logo após emails, dobrando quando não há)
+        """
+        use_idle = self.config.USE_IDLE and self.supports_idle()
+        print(f"📡 Modo: {'IMAP IDLE (push)' if use_idle else 'polling adaptativo'}")
+        
+        self.process_emails()
+        last_full_sync = time.monotonic()
+        interval = self.config.POLL_MIN_INTERVAL
+        
+        while True:
+            if use_idle:
+                new_mail = self.idle_wait(self.config.IDLE_REFRESH)
+            else:
+                time.sleep(interval)
+                new_mail = self.poll_for_changes()
+            
+            if time.monotonic() - last_full_sync >= self.config.FULL_SYNC_INTERVAL:
+                print(f"🔍 Varredura completa... [{datetime.now().strftime('%H:%M:%S')}]")
+                self.process_emails()
+                last_full_sync = time.monotonic()
+            elif new_mail:
+                print(f"🔔 Email novo! [{datetime.now().strftime('%H:%M:%S')}]")
+                self.process_emails(only_new=True)
+            
+            if new_mail:
+                interval = self.config.POLL_MIN_INTERVAL
+            else:
+                interval = min(interval * 2, self.config.CHECK_INTERVAL)
     
     def run_continuous(self):
         """Executa sincronização contínua"""
         print(f"\n🚀 INICIANDO SINCRONIZAÇÃO DE EMAILS")
         print(f"{'='*60}")
         print(f"📧 Email: {self.config.EMAIL_ADDRESS}")
-        print(f"🔄 Intervalo: {self.config.CHECK_INTERVAL}s")
+        print(f"🔄 Intervalo máximo: {self.config.CHECK_INTERVAL}s (IDLE: {self.config.USE_IDLE})")
         print(f"🤖 Auto-classificar: {self.config.AUTO_CLASSIFY}")
         print(f"📤 Auto-responder: {self.config.AUTO_RESPOND}")
         print(f"{'='*60}\n")
@@ -351,9 +903,9 @@ class EmailSynchronizer:
             while True:
                 try:
                     print(f"🔍 Verificando emails... [{datetime.now().strftime('%H:%M:%S')}]")
-                    self.process_emails()
+                    self.run_push_loop()
                     
-                except imaplib.IMAP4.abort:
+                except (imaplib.IMAP4.abort, OSError):
                     print("⚠️  Conexão perdida. Reconectando...")
                     time.sleep(5)
                     if not self.connect_imap():
@@ -361,16 +913,21 @@ class EmailSynchronizer:
                 
                 except Exception as e:
                     print(f"❌ Erro: {e}")
-                
-                # Aguardar próxima verificação
-                time.sleep(self.config.CHECK_INTERVAL)
+                    time.sleep(self.config.CHECK_INTERVAL)
                 
         except KeyboardInterrupt:
             print("\n\n👋 Encerrando sincronização...")
             self.disconnect()
     
     def disconnect(self):
-        """Desconecta do servidor"""
+        """Desconecta do servidor e grava o log pendente"""
+        self.classification_log.close()
+        if self.smtp_sender is not None:
+            self.smtp_sender.close()
+        self.disconnect_imap()
+    
+    def disconnect_imap(self):
+        """Encerra só a conexão IMAP (o log pode ser compartilhado)"""
         try:
             if self.mail:
                 self.mail.logout()
@@ -412,6 +969,10 @@ def main():
     # Criar sincronizador
     sync = EmailSynchronizer(config)
     
+    if config.METRICS_ENABLED and config.METRICS_PORT:
+        sync_metrics.serve(config.METRICS_PORT)
+        print(f"📊 Métricas em http://localhost:{config.METRICS_PORT}/metrics")
+    
     # Executar
     sync.run_continuous()
 
@@ -0,0 +1,215 @@
+"""
+Servidor local que imita a Hugging Face Inference API (testes de carga)
+Responde nos formatos que o app lê:
+- zero-shot (parameters.candidate_labels): {"sequence", "labels", "scores"},
+  ou uma lista desses objetos quando "inputs" é uma lista
+- geração de texto: [{"generated_text": prompt + continuação}]
+
+Latência, erros e limites configuráveis:
+- latency + jitter (aleatório) por requisição, mais per_item por entrada do lote
+- error_rate: fração das requisições que recebem 503 ("model is loading")
+- max_rps: acima disso, na mesma janela de 1s, responde 429 (Retry-After: 1)
+
+Uso:
+    python fake_hf_server.py --port 8089 --latency 0.2 --jitter 0.1 --error-rate 0.02 --max-rps 50
+    HF_API_BASE=http://localhost:8089/models python app.py
+
+Em código (ex.: testes):
+    server = FakeHuggingFaceServer(port=0, latency=0.05).start()
+    client = HuggingFaceClient(api_base=server.api_base)
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from keyword_matcher import match_keywords, CLASSIFICATION_GROUPS
+
+GENERATED_REPLY = " Obrigado pelo contato. Recebemos sua mensagem e retornaremos em breve."
+
+
+def zero_shot_result(text, candidate_labels):
+    """
+    Resultado zero-shot determinístico: palavras-chave decidem o rótulo
+    'produtivo' ou 'improdutivo' (mesmos grupos do fallback do app)
+    """
+    hits = match_keywords(text, CLASSIFICATION_GROUPS)
+    productive = len(hits['produtivo']) > len(hits['improdutivo'])
+    margin = min(0.45, 0.1 * abs(len(hits['produtivo']) - len(hits['improdutivo'])) + 0.05)
+
+    def score(label):
+        is_productive = 'produtivo' in label.lower() and 'improdutivo' not in label.lower()
+        return 0.5 + margin if is_productive == productive else 0.5 - margin
+
+    scored = sorted(((score(label), label) for label in candidate_labels), reverse=True)
+    total = sum(value for value, _ in scored) or 1.0
+    return {
+        'sequence': text,
+        'labels': [label for _, label in scored],
+        'scores': [round(value / total, 4) for value, _ in scored]
+    }
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, como a API real
+
+    def do_POST(self):
+        server = self.server
+        model = self.path.split('/models/', 1)[-1].strip('/')
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        try:
+            payload = json.loads(body)
+            inputs = payload['inputs']
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {'error': 'Corpo inválido: esperado JSON com "inputs"'})
+            return
+
+        status = server.admit()
+        if status == 429:
+            self.send_json(429, {'error': 'Rate limit reached. Please slow down.'}, {'Retry-After': '1'})
+            return
+
+        count = len(inputs) if isinstance(inputs, list) else 1
+        server.record(count)
+        time.sleep(server.delay(count))
+
+        if status == 503:
+            self.send_json(503, {'error': f'Model {model} is currently loading', 'estimated_time': 20.0})
+            return
+
+        labels = (payload.get('parameters') or {}).get('candidate_labels')
+        if labels:
+            if isinstance(inputs, list):
+                result = [zero_shot_result(text, labels) for text in inputs]
+            else:
+                result = zero_shot_result(inputs, labels)
+        else:
+            prompts = inputs if isinstance(inputs, list) else [inputs]
+            result = [{'generated_text': prompt + GENERATED_REPLY} for prompt in prompts]
+
+        self.send_json(200, result)
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count_status(status)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeHuggingFaceServer(ThreadingHTTPServer):
+    """Servidor em memória; `stats()` conta requisições, entradas e status"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=8089, latency=0.0, jitter=0.0, per_item=0.0,
+                 error_rate=0.0, max_rps=None, seed=None):
+        super().__init__((host, port), InferenceHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.per_item = per_item
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.thread = None
+
+        self._window = 0
+        self._window_count = 0
+        self.requests = 0
+        self.inputs = 0
+        self.statuses = {}
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def api_base(self):
+        """Valor para HF_API_BASE / api_base dos clientes"""
+        return f"http://{self.server_address[0]}:{self.port}/models"
+
+    def admit(self):
+        """Status decidido para a próxima requisição: 200, 429 (limite) ou 503 (erro sorteado)"""
+        with self.lock:
+            if self.max_rps:
+                window = int(time.monotonic())
+                if window != self._window:
+                    self._window, self._window_count = window, 0
+                self._window_count += 1
+                if self._window_count > self.max_rps:
+                    return 429
+            return 503 if self.random.random() < self.error_rate else 200
+
+    def delay(self, count):
+        with self.lock:
+            jitter = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + jitter + self.per_item * count
+
+    def record(self, count):
+        with self.lock:
+            self.requests += 1
+            self.inputs += count
+
+    def count_status(self, status):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {'requests': self.requests, 'inputs': self.inputs, 'statuses': dict(self.statuses)}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name='fake-hf', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local no lugar da Hugging Face Inference API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.2, help='Segundos por requisição')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Até N segundos extras (aleatório)')
+    parser.add_argument('--per-item', type=float, default=0.0, help='Segundos extras por entrada do lote')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas 503 (0 a 1)')
+    parser.add_argument('--max-rps', type=float, help='Requisições por segundo antes de responder 429')
+    parser.add_argument('--seed', type=int, help='Semente do sorteio de latência e erros')
+    args = parser.parse_args()
+
+    server = FakeHuggingFaceServer(
+        host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        per_item=args.per_item, error_rate=args.error_rate, max_rps=args.max_rps, seed=args.seed
+    ).start()
+
+    print(f"🤗 Fake Hugging Face em {server.api_base}")
+    print(f"   Latência {args.latency}s (+ até {args.jitter}s), erros {args.error_rate:.0%}, "
+          f"limite {args.max_rps or 'nenhum'} req/s")
+    print(f"💡 Execute: HF_API_BASE={server.api_base} python app.py")
+
+    try:
+        while True:
+            time.sleep(10)
+            print(f"   📊 {server.stats()}")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
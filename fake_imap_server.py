@@ -0,0 +1,430 @@
+"""
+Servidor IMAP local de teste (sem SSL, tudo em memória)
+Implementa o subconjunto usado pelo email_sync: LOGIN, SELECT, UID SEARCH,
+UID FETCH (RFC822, BODYSTRUCTURE, BODY.PEEK[seção]<parcial>), UID STORE,
+NOOP, IDLE e LOGOUT
+
+Uso:
+    python fake_imap_server.py --port 1143 --emails exemplos/
+
+    # email_sync.EmailConfig: IMAP_SERVER = "localhost", IMAP_PORT = 1143, IMAP_SSL = False
+
+Em código (ex.: testes):
+    server = FakeImapServer(port=0, idle=True)
+    server.start()
+    server.deliver(b"Subject: Teste\\r\\n\\r\\nCorpo")
+"""
+
+import argparse
+import email
+import os
+import re
+import socketserver
+import threading
+import time
+from email.policy import compat32
+from email.utils import formatdate
+
+
+class Message:
+    def __init__(self, uid, raw, flags=()):
+        self.uid = uid
+        self.raw = raw
+        self.flags = set(flags)
+
+
+class Mailbox:
+    def __init__(self, uidvalidity):
+        self.uidvalidity = uidvalidity
+        self.uidnext = 1
+        self.messages = []
+
+    def append(self, raw, flags=()):
+        message = Message(self.uidnext, raw, flags)
+        self.uidnext += 1
+        self.messages.append(message)
+        return message
+
+    def max_uid(self):
+        return self.messages[-1].uid if self.messages else 0
+
+
+def parse_uid_set(spec, max_uid):
+    """'1,3,5:7', '10:*' -> função que diz se um UID pertence ao conjunto"""
+    ranges = []
+    for part in spec.split(','):
+        low, _, high = part.partition(':')
+        low = max_uid if low == '*' else int(low)
+        high = low if not high else (max_uid if high == '*' else int(high))
+        ranges.append((min(low, high), max(low, high)))
+    return lambda uid: any(low <= uid <= high for low, high in ranges)
+
+
+def parse_message(raw):
+    return email.message_from_bytes(raw, policy=compat32)
+
+
+def _quote(value):
+    if value is None:
+        return b'NIL'
+    return b'"' + str(value).replace('\\', '\\\\').replace('"', '\\"').encode('utf-8') + b'"'
+
+
+def _raw_payload(part):
+    """Conteúdo da parte como está na mensagem (ainda codificado)"""
+    return part.get_payload().encode('utf-8', 'surrogateescape')
+
+
+def bodystructure(part):
+    """BODYSTRUCTURE (RFC 3501) de uma mensagem do pacote email"""
+    if part.is_multipart():
+        children = b''.join(bodystructure(child) for child in part.get_payload())
+        return b'(' + children + b' ' + _quote(part.get_content_subtype().upper()) + b')'
+
+    params = part.get_params()[1:] if part.get_params() else []
+    params = b'(' + b' '.join(_quote(k.upper()) + b' ' + _quote(v) for k, v in params) + b')' if params else b'NIL'
+    payload = _raw_payload(part)
+    fields = [
+        _quote(part.get_content_maintype().upper()),
+        _quote(part.get_content_subtype().upper()),
+        params,
+        b'NIL', b'NIL',
+        _quote((part.get('Content-Transfer-Encoding') or '7BIT').upper()),
+        str(len(payload)).encode()
+    ]
+    if part.get_content_maintype() == 'text':
+        fields.append(str(payload.count(b'\n')).encode())
+
+    disposition = part.get_content_disposition()
+    filename = part.get_filename()
+    fields.append(b'NIL')  # MD5
+    if disposition:
+        extra = b'(' + _quote('FILENAME') + b' ' + _quote(filename) + b')' if filename else b'NIL'
+        fields.append(b'(' + _quote(disposition.upper()) + b' ' + extra + b')')
+    else:
+        fields.append(b'NIL')
+    return b'(' + b' '.join(fields) + b')'
+
+
+def fetch_section(raw, item):
+    """Conteúdo de RFC822 / BODY[HEADER] / BODY[TEXT] / BODY[1.2]<0.N>; retorna (bytes, nome na resposta)"""
+    if item == 'RFC822':
+        return raw, 'RFC822'
+
+    match = re.match(r'BODY(?:\.PEEK)?\[([^\]]*)\](?:<(\d+)\.(\d+)>)?', item)
+    section, offset, length = match.groups()
+    header, _, text = raw.partition(b'\r\n\r\n')
+
+    if section == '':
+        content = raw
+    elif section == 'HEADER':
+        content = header + b'\r\n\r\n'
+    elif section == 'TEXT':
+        content = text
+    else:
+        part = parse_message(raw)
+        for number in section.split('.'):
+            if part.is_multipart():
+                part = part.get_payload()[int(number) - 1]
+        content = _raw_payload(part)
+
+    name = f'BODY[{section}]'
+    if offset is not None:
+        content = content[int(offset):int(offset) + int(length)]
+        name += f'<{offset}>'
+    return content, name
+
+
+class ImapHandler(socketserver.StreamRequestHandler):
+    """Uma conexão de cliente"""
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.selected = None
+        self.idling = False
+
+    def send(self, data):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def send_line(self, line):
+        self.send(line.encode('utf-8') + b'\r\n')
+
+    def handle(self):
+        self.send_line('* OK Fake IMAP pronto')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+
+            parts = line.decode('utf-8').rstrip('\r\n').split(' ', 2)
+            if len(parts) < 2:
+                continue
+            tag, command = parts[0], parts[1].upper()
+            args = parts[2] if len(parts) > 2 else ''
+
+            if self.server.latency:
+                time.sleep(self.server.latency)
+
+            handler = getattr(self, f'cmd_{command}', None)
+            if handler is None:
+                self.send_line(f'{tag} BAD Comando não suportado: {command}')
+                continue
+
+            with self.server.lock:
+                self.server.commands.append(command if command != 'UID' else f"UID {args.split(' ')[0].upper()}")
+
+            if handler(tag, args) is False:
+                break
+
+    def cmd_CAPABILITY(self, tag, args):
+        capabilities = 'IMAP4rev1 UIDPLUS' + (' IDLE' if self.server.idle else '')
+        self.send_line(f'* CAPABILITY {capabilities}')
+        self.send_line(f'{tag} OK CAPABILITY completed')
+
+    def cmd_LOGIN(self, tag, args):
+        self.send_line(f'{tag} OK LOGIN completed')
+
+    def cmd_NOOP(self, tag, args):
+        self.report_exists()
+        self.send_line(f'{tag} OK NOOP completed')
+
+    def cmd_LOGOUT(self, tag, args):
+        self.send_line('* BYE Até logo')
+        self.send_line(f'{tag} OK LOGOUT completed')
+        return False
+
+    def cmd_SELECT(self, tag, args):
+        name = args.strip('"').upper()
+        mailbox = self.server.mailbox(name)
+        self.selected = name
+        self.known_exists = len(mailbox.messages)
+        self.send_line(f'* {len(mailbox.messages)} EXISTS')
+        self.send_line('* 0 RECENT')
+        self.send_line(f'* OK [UIDVALIDITY {mailbox.uidvalidity}] UIDs válidos')
+        self.send_line(f'* OK [UIDNEXT {mailbox.uidnext}] Próximo UID')
+        self.send_line(f'{tag} OK [READ-WRITE] SELECT completed')
+
+    cmd_EXAMINE = cmd_SELECT
+
+    def report_exists(self):
+        """Informa EXISTS se a caixa cresceu desde a última notificação"""
+        if self.selected is None:
+            return
+        count = len(self.server.mailbox(self.selected).messages)
+        if count != self.known_exists:
+            self.known_exists = count
+            self.send_line(f'* {count} EXISTS')
+
+    def cmd_IDLE(self, tag, args):
+        self.send_line('+ idling')
+        self.idling = True
+        with self.server.lock:
+            self.server.idlers.add(self)
+
+        try:
+            self.report_exists()
+            line = self.rfile.readline()
+        finally:
+            with self.server.lock:
+                self.server.idlers.discard(self)
+            self.idling = False
+
+        if not line:
+            return False
+        if line.strip().upper() != b'DONE':
+            self.send_line(f'{tag} BAD Esperado DONE')
+        else:
+            self.send_line(f'{tag} OK IDLE terminated')
+
+    def cmd_UID(self, tag, args):
+        subcommand, _, rest = args.partition(' ')
+        subcommand = subcommand.upper()
+        if self.selected is None:
+            self.send_line(f'{tag} NO Nenhuma caixa selecionada')
+            return
+
+        mailbox = self.server.mailbox(self.selected)
+        if subcommand == 'SEARCH':
+            self.uid_search(tag, mailbox, rest)
+        elif subcommand == 'FETCH':
+            self.uid_fetch(tag, mailbox, rest)
+        elif subcommand == 'STORE':
+            self.uid_store(tag, mailbox, rest)
+        else:
+            self.send_line(f'{tag} BAD UID {subcommand} não suportado')
+
+    def uid_search(self, tag, mailbox, criteria):
+        tokens = criteria.upper().split()
+        matches = list(mailbox.messages)
+
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token == 'UNSEEN':
+                matches = [m for m in matches if '\\Seen' not in m.flags]
+            elif token == 'SEEN':
+                matches = [m for m in matches if '\\Seen' in m.flags]
+            elif token == 'UID':
+                i += 1
+                in_set = parse_uid_set(tokens[i], mailbox.max_uid())
+                matches = [m for m in matches if in_set(m.uid)]
+            elif token != 'ALL' and re.fullmatch(r'[\d:*,]+', token):
+                in_set = parse_uid_set(token, len(mailbox.messages))
+                matches = [m for n, m in enumerate(mailbox.messages, 1) if in_set(n) and m in matches]
+            i += 1
+
+        self.send_line('* SEARCH' + ''.join(f' {m.uid}' for m in matches))
+        self.send_line(f'{tag} OK SEARCH completed')
+
+    def uid_fetch(self, tag, mailbox, rest):
+        uid_spec, _, items = rest.partition(' ')
+        items = re.findall(r'BODY(?:\.PEEK)?\[[^\]]*\](?:<\d+\.\d+>)?|[^\s()]+', items.upper())
+        in_set = parse_uid_set(uid_spec, mailbox.max_uid())
+
+        for number, message in enumerate(mailbox.messages, 1):
+            if not in_set(message.uid):
+                continue
+
+            data = [f'UID {message.uid}'.encode()]
+            for item in items:
+                if item == 'FLAGS':
+                    data.append(f"FLAGS ({' '.join(sorted(message.flags))})".encode())
+                elif item == 'RFC822.SIZE':
+                    data.append(f'RFC822.SIZE {len(message.raw)}'.encode())
+                elif item == 'BODYSTRUCTURE':
+                    data.append(b'BODYSTRUCTURE ' + bodystructure(parse_message(message.raw)))
+                elif item == 'RFC822' or item.startswith('BODY'):
+                    content, name = fetch_section(message.raw, item)
+                    data.append(f'{name} {{{len(content)}}}'.encode() + b'\r\n' + content)
+                    if '.PEEK' not in item:
+                        message.flags.add('\\Seen')
+                    self.server.bytes_sent += len(content)
+
+            self.send(f'* {number} FETCH ('.encode() + b' '.join(data) + b')\r\n')
+
+        self.send_line(f'{tag} OK FETCH completed')
+
+    def uid_store(self, tag, mailbox, rest):
+        uid_spec, mode, flags = rest.split(' ', 2)
+        flags = set(flags.strip('()').split())
+        in_set = parse_uid_set(uid_spec, mailbox.max_uid())
+
+        for number, message in enumerate(mailbox.messages, 1):
+            if not in_set(message.uid):
+                continue
+            if mode.upper().startswith('+'):
+                message.flags |= flags
+            elif mode.upper().startswith('-'):
+                message.flags -= flags
+            else:
+                message.flags = set(flags)
+            if '.SILENT' not in mode.upper():
+                self.send_line(f"* {number} FETCH (UID {message.uid} FLAGS ({' '.join(sorted(message.flags))}))")
+
+        self.send_line(f'{tag} OK STORE completed')
+
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    """
+    Servidor em memória. deliver() adiciona um email e notifica (EXISTS)
+    os clientes em IDLE; `commands` registra os comandos recebidos.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=1143, idle=True, uidvalidity=1, latency=0.0):
+        super().__init__((host, port), ImapHandler)
+        self.idle = idle
+        self.latency = latency
+        self.uidvalidity = uidvalidity
+        self.mailboxes = {}
+        self.idlers = set()
+        self.commands = []
+        self.bytes_sent = 0  # Bytes de conteúdo (RFC822/BODY[...]) enviados em FETCH
+        self.lock = threading.RLock()
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def mailbox(self, name='INBOX'):
+        with self.lock:
+            return self.mailboxes.setdefault(name.upper(), Mailbox(self.uidvalidity))
+
+    def deliver(self, raw, mailbox='INBOX', flags=()):
+        """Entrega um email (bytes) e acorda os clientes em IDLE"""
+        with self.lock:
+            message = self.mailbox(mailbox).append(raw, flags)
+            idlers = list(self.idlers)
+
+        for handler in idlers:
+            if handler.selected == mailbox.upper():
+                handler.report_exists()
+        return message.uid
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name='fake-imap', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def make_message(subject, body, sender='remetente@exemplo.com'):
+    """Email RFC 822 simples (UTF-8)"""
+    return (
+        f"From: {sender}\r\n"
+        f"Subject: {subject}\r\n"
+        f"Date: {formatdate(localtime=True)}\r\n"
+        "MIME-Version: 1.0\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        "Content-Transfer-Encoding: 8bit\r\n"
+        "\r\n"
+        f"{body}\r\n"
+    ).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor IMAP local para testes do email_sync')
+    parser.add_argument('--port', type=int, default=1143)
+    parser.add_argument('--emails', help='Pasta com .txt para carregar na caixa de entrada')
+    parser.add_argument('--no-idle', action='store_true', help='Não anunciar suporte a IDLE')
+    parser.add_argument('--every', type=float, default=0,
+                        help='Reentregar um email de exemplo a cada N segundos')
+    args = parser.parse_args()
+
+    server = FakeImapServer(port=args.port, idle=not args.no_idle).start()
+
+    samples = []
+    if args.emails:
+        for name in sorted(os.listdir(args.emails)):
+            if name.endswith('.txt'):
+                with open(os.path.join(args.emails, name), encoding='utf-8') as f:
+                    samples.append(make_message(name, f.read()))
+        for raw in samples:
+            server.deliver(raw)
+
+    print(f"📮 Fake IMAP em localhost:{server.port} ({len(samples)} emails, IDLE: {server.idle})")
+
+    try:
+        count = 0
+        while True:
+            time.sleep(args.every or 3600)
+            if args.every and samples:
+                server.deliver(samples[count % len(samples)])
+                count += 1
+                print(f"   ✉️  Email entregue ({count})")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+"""
+Configuração do gunicorn (lida automaticamente: Procfile -> gunicorn wsgi:app)
+Com preload_app o app é importado e aquecido (wsgi.py) uma vez no processo
+mestre, antes do fork: cada worker já nasce com os módulos, regex e
+templates prontos (copy-on-write) e só reabre o que não atravessa um fork.
+Número de workers: variável WEB_CONCURRENCY (lida pelo próprio gunicorn).
+"""
+
+import os
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import after_fork
+        after_fork()
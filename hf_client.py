@@ -0,0 +1,237 @@
+"""
+Cliente da Hugging Face Inference API
+Conexões reaproveitadas (keep-alive), agrupamento de requisições em micro-lotes
+e um circuit breaker por modelo (falhas seguidas suspendem as chamadas)
+"""
+
+import threading
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from circuit_breaker import CircuitBreaker
+
+HF_API_BASE = "https://api-inference.huggingface.co/models"
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+TEXT_GENERATION_MODEL = "gpt2"
+
+
+class HuggingFaceAPIError(Exception):
+    """Resposta de erro (status HTTP diferente de 200) da Inference API"""
+
+    def __init__(self, status_code, message=''):
+        super().__init__(f"Erro API Hugging Face: {status_code} {message}".strip())
+        self.status_code = status_code
+
+
+class HuggingFaceClient:
+    """
+    Cliente com pool de conexões compartilhado.
+
+    Chamadas concorrentes de zero_shot() são reunidas em micro-lotes
+    (até max_batch_size textos ou max_wait segundos de espera) e enviadas
+    em uma única requisição, já que a API aceita uma lista de entradas.
+    """
+
+    def __init__(self, api_token='', api_base=HF_API_BASE, max_batch_size=8,
+                 max_wait=0.01, timeout=30, pool_size=10, breaker_threshold=5, breaker_reset=30):
+        self.api_base = api_base.rstrip('/')
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+        # Circuit breaker por modelo: API fora do ar não prende cada chamada até o timeout
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+        # Sessão criada no primeiro uso: `requests` não pesa na inicialização
+        self.api_token = api_token
+        self._session = None
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        # Lotes são enviados em paralelo (um lote lento não segura os próximos)
+        self.pool_size = pool_size
+        self._sender = None
+
+    @property
+    def session(self):
+        """Sessão HTTP compartilhada (pool de conexões keep-alive)"""
+        if self._session is None:
+            with self._worker_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    if self.api_token:
+                        session.headers["Authorization"] = f"Bearer {self.api_token}"
+                    self._session = session
+        return self._session
+
+    def model_url(self, model):
+        """URL do modelo na Inference API"""
+        return f"{self.api_base}/{model}"
+
+    def breaker(self, model):
+        """Circuit breaker do modelo (criado no primeiro uso)"""
+        with self._breakers_lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(
+                    model, failure_threshold=self.breaker_threshold, reset_timeout=self.breaker_reset
+                )
+            return breaker
+
+    def breaker_stats(self):
+        """Estado dos circuit breakers, por modelo (exposto no /health)"""
+        with self._breakers_lock:
+            breakers = dict(self._breakers)
+        return {model: breaker.stats() for model, breaker in breakers.items()}
+
+    # ------------------------------------------------
+    # Chamadas diretas
+    # ------------------------------------------------
+
+    def post(self, model, payload, timeout=None):
+        """
+        POST para o modelo; lança HuggingFaceAPIError se status != 200 e
+        CircuitOpenError (sem tocar a rede) se o modelo vem falhando
+        """
+        breaker = self.breaker(model)
+        breaker.before_call()
+        try:
+            response = self.session.post(
+                self.model_url(model),
+                json=payload,
+                timeout=timeout or self.timeout
+            )
+
+            if response.status_code != 200:
+                raise HuggingFaceAPIError(response.status_code)
+
+            result = response.json()
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        breaker.record_success()
+        return result
+
+    def zero_shot_many(self, texts, candidate_labels):
+        """
+        Classificação zero-shot de vários textos, em requisições de até
+        max_batch_size entradas. Retorna uma lista alinhada com `texts`.
+        """
+        results = []
+        for start in range(0, len(texts), self.max_batch_size):
+            chunk = texts[start:start + self.max_batch_size]
+            result = self.post(ZERO_SHOT_MODEL, {
+                "inputs": chunk if len(chunk) > 1 else chunk[0],
+                "parameters": {"candidate_labels": list(candidate_labels)}
+            })
+
+            # Uma única entrada retorna um objeto; várias retornam uma lista
+            if isinstance(result, dict):
+                result = [result]
+
+            if len(result) != len(chunk):
+                raise HuggingFaceAPIError(200, 'resposta com tamanho inesperado')
+
+            results.extend(result)
+
+        return results
+
+    def text_generation(self, prompt, parameters=None, timeout=None):
+        """Geração de texto (ex.: GPT-2)"""
+        return self.post(TEXT_GENERATION_MODEL, {
+            "inputs": prompt,
+            "parameters": parameters or {}
+        }, timeout=timeout)
+
+    # ------------------------------------------------
+    # Micro-lotes
+    # ------------------------------------------------
+
+    def zero_shot(self, text, candidate_labels, timeout=None):
+        """
+        Classificação zero-shot de um texto. A chamada bloqueia até o
+        micro-lote do qual ela faz parte ser respondido (ou até `timeout`
+        segundos: concurrent.futures.TimeoutError).
+        """
+        return self.submit_zero_shot(text, candidate_labels).result(timeout=timeout)
+
+    def submit_zero_shot(self, text, candidate_labels):
+        """Enfileira o texto no próximo micro-lote; retorna um Future com o resultado"""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, tuple(candidate_labels), future))
+        return future
+
+    def submit_zero_shot_many(self, texts, candidate_labels):
+        """zero_shot_many em segundo plano (pool de envio); retorna um Future"""
+        self._ensure_worker()
+        return self._sender.submit(self.zero_shot_many, texts, candidate_labels)
+
+    def _ensure_worker(self):
+        """Inicia a thread de micro-lotes na primeira chamada (e após fork)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._sender = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='hf-sender')
+                self._worker = threading.Thread(
+                    target=self._run_batcher,
+                    name='hf-microbatcher',
+                    daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self):
+        """Espera o primeiro item e junta os que chegarem dentro de max_wait"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _send_group(self, labels, items):
+        """Envia um micro-lote e entrega o resultado de cada chamador"""
+        futures = [future for _, future in items]
+        try:
+            results = self.zero_shot_many([text for text, _ in items], labels)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def _run_batcher(self):
+        while True:
+            batch = self._collect_batch()
+
+            # Agrupar por conjunto de rótulos (cada grupo é uma chamada)
+            groups = {}
+            for text, labels, future in batch:
+                groups.setdefault(labels, []).append((text, future))
+
+            for labels, items in groups.items():
+                self._sender.submit(self._send_group, labels, items)
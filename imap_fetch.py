@@ -0,0 +1,188 @@
+"""
+Utilitários para FETCH em lote via IMAP
+- Conjuntos compactos de UIDs ('1:50,52,60:70')
+- Leitura das respostas de FETCH do imaplib (listas, strings, literais)
+- BODYSTRUCTURE: localizar a parte de texto sem baixar anexos
+- Alteração de flags em lote (um STORE para vários UIDs)
+"""
+
+import re
+
+from mime_body import decode_text, decode_transfer
+
+_TOKEN = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}$|([^\s()"\[]+(?:\[[^\]]*\])?(?:<[\d.]+>)?))')
+_FETCH_START = re.compile(rb'^\d+ \(')
+
+
+def format_uid_set(uids):
+    """[1, 2, 3, 5, 7, 8] -> '1:3,5,7:8'"""
+    ranges = []
+    for uid in sorted({int(uid) for uid in uids}):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ','.join(str(low) if low == high else f'{low}:{high}' for low, high in ranges)
+
+
+def _tokenize(text, literal, tokens):
+    """Acrescenta os tokens de `text`; um {n} no fim é trocado pelo literal"""
+    position = 0
+    text = text.rstrip(b'\r\n')
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            break
+        position = match.end()
+        opened, closed, quoted, literal_size, atom = match.groups()
+        if opened:
+            tokens.append('(')
+        elif closed:
+            tokens.append(')')
+        elif quoted is not None:
+            tokens.append(re.sub(rb'\\(.)', rb'\1', quoted))
+        elif literal_size is not None:
+            tokens.append(literal)
+        else:
+            tokens.append(None if atom.upper() == b'NIL' else atom.decode('ascii', 'replace'))
+
+
+def _build(tokens, index):
+    """Tokens -> listas aninhadas; retorna (lista, próximo índice)"""
+    items = []
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if token == '(':
+            item, index = _build(tokens, index)
+            items.append(item)
+        elif token == ')':
+            return items, index
+        else:
+            items.append(token)
+    return items, index
+
+
+def parse_fetch_response(data):
+    """
+    Resposta de mail.uid('fetch', ...) -> lista de dicts por mensagem,
+    ex.: {'UID': 12, 'BODYSTRUCTURE': [...], 'BODY[HEADER]': b'...'}
+    """
+    responses = []
+    tokens = None
+
+    for element in data:
+        if element is None:
+            continue
+        text, literal = element if isinstance(element, tuple) else (element, None)
+
+        if _FETCH_START.match(text):
+            tokens = []
+            responses.append(tokens)
+            text = text.split(b' ', 1)[1]  # Número de sequência
+        if tokens is not None:
+            _tokenize(text, literal, tokens)
+
+    messages = []
+    for tokens in responses:
+        items, _ = _build(tokens, 0)
+        items = items[0] if items and isinstance(items[0], list) else items
+
+        message = {}
+        for name, value in zip(items[::2], items[1::2]):
+            name = name.upper() if isinstance(name, str) else str(name)
+            if name == 'UID':
+                value = int(value)
+            message[name] = value
+        messages.append(message)
+
+    return messages
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value or ''
+
+
+def _params(value):
+    """("CHARSET" "utf-8" ...) -> {'charset': 'utf-8'}"""
+    if not isinstance(value, list):
+        return {}
+    return {_text(k).lower(): _text(v) for k, v in zip(value[::2], value[1::2])}
+
+
+def iter_parts(structure, prefix=''):
+    """
+    Percorre um BODYSTRUCTURE. Gera (seção, tipo, subtipo, parâmetros,
+    codificação, tamanho, disposição) de cada parte não-multipart.
+    """
+    if structure and isinstance(structure[0], list):
+        number = 0
+        for part in structure:
+            if not isinstance(part, list):
+                break  # Fim das partes: subtipo e extensões do multipart
+            number += 1
+            yield from iter_parts(part, f'{prefix}{number}.')
+        return
+
+    maintype = _text(structure[0]).lower()
+    subtype = _text(structure[1]).lower()
+    encoding = _text(structure[5]).lower() if len(structure) > 5 else '7bit'
+    size = int(structure[6]) if len(structure) > 6 and structure[6] else 0
+
+    # Extensões: text/* tem o número de linhas antes (md5, disposição, ...)
+    extension = 8 if maintype == 'text' else 7
+    if maintype == 'message' and subtype == 'rfc822':
+        extension = 10
+    disposition = structure[extension + 1] if len(structure) > extension + 1 else None
+    disposition = _text(disposition[0]).lower() if isinstance(disposition, list) and disposition else None
+
+    yield (prefix.rstrip('.') or '1', maintype, subtype, _params(structure[2]), encoding, size, disposition)
+
+
+def find_text_part(structure, subtypes=('plain',)):
+    """
+    Primeira parte de texto (não anexo) com um dos subtipos, na ordem de
+    preferência. Retorna (seção, parâmetros, codificação, tamanho, subtipo) ou None.
+    """
+    parts = [part for part in iter_parts(structure)
+             if part[1] == 'text' and part[6] != 'attachment']
+    for subtype in subtypes:
+        for section, _, part_subtype, params, encoding, size, _ in parts:
+            if part_subtype == subtype:
+                return section, params, encoding, size, subtype
+    return None
+
+
+def decode_part(data, encoding, charset):
+    """Decodifica o conteúdo de uma parte (também se vier truncado por FETCH parcial)"""
+    return decode_text(decode_transfer(data, encoding), charset)
+
+class FlagBatcher:
+    """
+    Acumula UIDs e altera as flags de todos com poucos UID STORE
+    ('1:50,52,60:70'), em vez de um comando por email.
+    """
+
+    def __init__(self, flags='(\\Seen)', max_uids=1000):
+        self.flags = flags
+        self.max_uids = max_uids  # UIDs por comando (linhas muito longas são recusadas)
+        self._uids = set()
+
+    def __len__(self):
+        return len(self._uids)
+
+    def add(self, uids):
+        self._uids.update(int(uid) for uid in uids)
+
+    def flush(self, mail):
+        """Envia os STORE pendentes; retorna quantos comandos foram enviados"""
+        uids = sorted(self._uids)
+        commands = 0
+        for start in range(0, len(uids), self.max_uids):
+            chunk = uids[start:start + self.max_uids]
+            mail.uid('store', format_uid_set(chunk), '+FLAGS.SILENT', self.flags)
+            self._uids.difference_update(chunk)
+            commands += 1
+        return commands
@@ -0,0 +1,294 @@
+"""
+Fila de jobs de classificação (envio assíncrono + consulta de status)
+- Fila de prioridade em memória drenada por um pool limitado de threads
+- Estado e resultados em SQLite: sobrevivem a um reinício do worker e podem
+  ser consultados por qualquer processo que use o mesmo banco
+"""
+
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+JOB_STATUSES = ('queued', 'running', 'done', 'error')
+FINISHED_STATUSES = ('done', 'error')
+
+
+class JobQueueFull(Exception):
+    """A fila atingiu o limite de jobs pendentes"""
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Jobs persistidos em SQLite (':memory:' mantém tudo só no processo).
+    O arquivo enviado fica no banco até o job terminar.
+    """
+
+    def __init__(self, db_path=':memory:'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._inherited = []
+        self._db = self._connect()
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        if self.db_path != ':memory:':
+            # Leituras (polling) não bloqueiam a escrita dos workers
+            db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " priority INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " file_data BLOB,"
+            " result TEXT,"
+            " error TEXT,"
+            " owner_pid INTEGER,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, created_at)")
+        db.commit()
+        return db
+
+    def reopen(self):
+        """
+        Nova conexão no processo atual (chamar após um fork). A conexão
+        herdada não é fechada nem usada: o SQLite não a aceita entre processos.
+        """
+        if self.db_path != ':memory:':
+            with self._lock:
+                self._inherited.append(self._db)
+                self._db = self._connect()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            self._db.commit()
+            return cursor
+
+    def create(self, job_id, priority, payload, file_data=None):
+        self._execute(
+            "INSERT INTO jobs (id, status, priority, payload, file_data, created_at)"
+            " VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, priority, json.dumps(payload), file_data, time.time())
+        )
+
+    def delete(self, job_id):
+        self._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def claim(self, job_id, pid):
+        """
+        Marca o job como 'running' se ainda estiver na fila (atômico entre
+        processos). Retorna (payload, arquivo) ou None se outro worker o pegou.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'running', owner_pid = ?, started_at = ?"
+                " WHERE id = ? AND status = 'queued'",
+                (pid, time.time(), job_id)
+            )
+            self._db.commit()
+            if cursor.rowcount != 1:
+                return None
+
+            row = self._db.execute("SELECT payload, file_data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return json.loads(row[0]), row[1]
+
+    def finish(self, job_id, result=None, error=None):
+        """Grava o resultado (ou o erro) e descarta o arquivo enviado"""
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, file_data = NULL, finished_at = ?"
+            " WHERE id = ?",
+            ('error' if error is not None else 'done',
+             json.dumps(result) if result is not None else None,
+             error, time.time(), job_id)
+        )
+
+    def get(self, job_id):
+        """Status do job (sem o arquivo) ou None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, status, priority, result, error, created_at, started_at, finished_at"
+                " FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        job = {
+            'job_id': row[0],
+            'status': row[1],
+            'priority': row[2],
+            'created_at': row[5],
+            'started_at': row[6],
+            'finished_at': row[7]
+        }
+        if row[3] is not None:
+            job['result'] = json.loads(row[3])
+        if row[4] is not None:
+            job['error'] = row[4]
+        return job
+
+    def recover(self):
+        """
+        Jobs a retomar após um reinício: os que estavam na fila e os que
+        estavam em execução em um processo que não existe mais
+        """
+        with self._lock:
+            for job_id, pid in self._db.execute(
+                "SELECT id, owner_pid FROM jobs WHERE status = 'running'"
+            ).fetchall():
+                if pid is None or not _pid_alive(pid):
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'queued', owner_pid = NULL, started_at = NULL"
+                        " WHERE id = ? AND status = 'running'",
+                        (job_id,)
+                    )
+            self._db.commit()
+
+            return self._db.execute(
+                "SELECT id, priority FROM jobs WHERE status = 'queued' ORDER BY priority, created_at"
+            ).fetchall()
+
+    def purge(self, finished_before):
+        """Remove jobs terminados antes do instante indicado"""
+        self._execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'error') AND finished_at < ?",
+            (finished_before,)
+        )
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+
+class JobQueue:
+    """
+    Fila de prioridade (menor número sai primeiro; empate por ordem de
+    chegada) drenada por `workers` threads que chamam handler(payload, arquivo).
+
+    As threads são iniciadas no primeiro uso (e de novo após um fork do
+    gunicorn); nesse momento os jobs pendentes no banco são retomados.
+    """
+
+    def __init__(self, handler, store, workers=4, max_pending=1000, retention=3600):
+        self.handler = handler
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.retention = retention
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._last_purge = 0.0
+
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_workers(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+
+            self._queue = queue.PriorityQueue()
+            for job_id, priority in self.store.recover():
+                self._queue.put((priority, next(self._sequence), job_id))
+
+            self._threads = [
+                threading.Thread(target=self._run_worker, name=f'job-worker-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, payload, file_data=None, priority=10):
+        """Enfileira um job e retorna o ID; lança JobQueueFull se a fila estiver cheia"""
+        self._ensure_workers()
+        self._purge_expired()
+
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFull(f'Fila cheia ({self.max_pending} jobs pendentes)')
+
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, priority, payload, file_data)
+        self._queue.put((priority, next(self._sequence), job_id))
+        return job_id
+
+    def get(self, job_id):
+        self._ensure_workers()
+        return self.store.get(job_id)
+
+    def wait_for_change(self, timeout):
+        """Espera algum job deste processo mudar de status (ou o timeout)"""
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def _purge_expired(self):
+        now = time.time()
+        if now - self._last_purge >= 60:
+            self._last_purge = now
+            self.store.purge(now - self.retention)
+
+    def _run_worker(self):
+        while True:
+            _, _, job_id = self._queue.get()
+
+            claimed = self.store.claim(job_id, os.getpid())
+            if claimed is None:
+                continue  # Já executado por outro processo
+            self._notify()
+
+            payload, file_data = claimed
+            try:
+                result = self.handler(payload, file_data)
+            except Exception as e:
+                self.store.finish(job_id, error=str(e))
+                self.failed += 1
+            else:
+                self.store.finish(job_id, result=result)
+                self.completed += 1
+            self._notify()
+
+    def stats(self):
+        """Contadores expostos no /health"""
+        return {
+            'workers': self.workers,
+            'pending': self._queue.qsize(),
+            'max_pending': self.max_pending,
+            'completed': self.completed,
+            'failed': self.failed,
+            'jobs': self.store.counts()
+        }
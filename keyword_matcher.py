@@ -0,0 +1,228 @@
+"""
+Motor de palavras-chave compilado uma única vez na importação
+O texto é percorrido uma única vez por análise (Aho-Corasick ou uma regex
+em trie), sem diferenciar acentos, para todas as palavras-chave de todos
+os grupos
+"""
+
+import itertools
+import re
+import threading
+import unicodedata
+
+try:
+    import ahocorasick  # pyahocorasick (opcional): autômato em C, mais rápido que a regex
+except ImportError:
+    ahocorasick = None
+
+# Grupos de palavras-chave (categoria / modelo de resposta -> palavras)
+KEYWORD_GROUPS = {
+    # Palavras-chave para emails produtivos
+    'produtivo': [
+        'suporte', 'problema', 'erro', 'ajuda', 'dúvida', 'solicitação',
+        'urgente', 'status', 'atualização', 'prazo', 'pendência', 'requisição',
+        'sistema', 'acesso', 'senha', 'login', 'configuração', 'bug',
+        'relatório', 'documento', 'análise', 'aprovação', 'revisão',
+        'reunião', 'projeto', 'tarefa', 'demanda', 'ticket'
+    ],
+    # Palavras-chave para emails improdutivos
+    'improdutivo': [
+        'feliz', 'parabéns', 'aniversário', 'natal', 'ano novo', 'obrigado',
+        'agradecimento', 'festa', 'celebração', 'feriado', 'abraço', 'beijo'
+    ],
+    # Modelos de resposta para emails produtivos
+    'resposta_status': ['status', 'andamento', 'atualização'],
+    'resposta_problema': ['problema', 'erro', 'bug', 'defeito'],
+    'resposta_duvida': ['dúvida', 'pergunta', 'como', 'ajuda'],
+}
+
+
+def fold_text(text):
+    """Minúsculas e sem acentos ('Atualização' -> 'atualizacao')"""
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def _compile_keywords(groups):
+    """
+    Pré-compila cada palavra-chave distinta como (palavra sem acento,
+    palavra acentuada, grupos)
+    """
+    compiled = {}
+    for group, words in groups.items():
+        for word in words:
+            word = unicodedata.normalize('NFC', word.lower())
+            folded = fold_text(word)
+
+            if folded not in compiled:
+                compiled[folded] = (folded, word, set())
+
+            compiled[folded][2].add(group)
+
+    return list(compiled.values())
+
+
+_KEYWORDS = _compile_keywords(KEYWORD_GROUPS)
+
+# Conjuntos de grupos usados por classify_email_simple e generate_response
+CLASSIFICATION_GROUPS = ('produtivo', 'improdutivo')
+RESPONSE_GROUPS = ('resposta_status', 'resposta_problema', 'resposta_duvida')
+
+_KEYWORDS_BY_GROUPS = {}
+
+
+def compiled_keywords(groups):
+    """
+    Palavras-chave distintas de um conjunto de grupos (calculado uma vez).
+    Cada item: (sem acento, acentuada, grupos).
+    """
+    key = frozenset(groups)
+    if key not in _KEYWORDS_BY_GROUPS:
+        _KEYWORDS_BY_GROUPS[key] = [kw for kw in _KEYWORDS if kw[2] & key]
+    return _KEYWORDS_BY_GROUPS[key]
+
+
+def _is_word_char(char):
+    # Acento combinante (texto em NFD) faz parte da palavra
+    return char.isalnum() or char == '_' or unicodedata.combining(char) > 0
+
+
+def _spellings(keyword):
+    """
+    Grafias aceitas de uma palavra-chave (minúsculas): cada letra acentuada
+    composta, decomposta (NFD) ou sem acento ('dúvida' -> 'dúvida',
+    'du\u0301vida', 'duvida'), sem normalizar o texto a cada análise
+    """
+    options = [
+        {char, unicodedata.normalize('NFD', char), fold_text(char) or char}
+        for char in keyword[1]
+    ]
+    return {''.join(chars) for chars in itertools.product(*options)}
+
+
+def _trie_pattern(words):
+    """Alternativa única em forma de trie ('erro|ext' -> 'e(?:rro|xt)'): sem retrocesso entre palavras"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+# Início de palavra na regex: sem letra, dígito, '_' ou acento combinante antes
+_WORD_START = r'(?<![\w\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f])'
+
+
+class _Matcher:
+    """
+    Todas as grafias de todas as palavras-chave em uma única estrutura,
+    percorrida uma vez por texto (em minúsculas):
+    - pyahocorasick instalado: autômato Aho-Corasick (em C)
+    - senão: uma regex com as grafias em trie; a busca em lookahead devolve
+      também as que se sobrepõem (mais lenta que a varredura antiga)
+    Nos dois casos a palavra precisa começar no início de uma palavra do texto.
+    """
+
+    def __init__(self, keywords):
+        self.folded = {}  # grafia -> palavra-chave sem acento
+        for keyword in keywords:
+            for spelling in _spellings(keyword):
+                self.folded[spelling] = keyword[0]
+        spellings = sorted(self.folded)
+
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for spelling in spellings:
+                self.automaton.add_word(spelling, (len(spelling), self.folded[spelling]))
+            self.automaton.make_automaton()
+        else:
+            self.automaton = None
+            self.pattern = re.compile(_WORD_START + '(?=(' + _trie_pattern(spellings) + '))')
+            # A regex devolve a grafia mais longa em cada posição: as mais
+            # curtas que são prefixo dela também estão lá
+            self.prefixes = {
+                spelling: {self.folded[other] for other in spellings if spelling.startswith(other)}
+                for spelling in spellings
+            }
+
+    def find(self, text_lower):
+        """Palavras-chave (sem acento) presentes no texto"""
+        found = set()
+
+        if self.automaton is not None:
+            for end, (length, folded) in self.automaton.iter(text_lower):
+                if folded in found:
+                    continue
+                start = end - length + 1
+                if start == 0 or not _is_word_char(text_lower[start - 1]):
+                    found.add(folded)
+        else:
+            for spelling in set(self.pattern.findall(text_lower)):
+                found.update(self.prefixes[spelling])
+
+        return found
+
+
+_MATCHER = _Matcher(_KEYWORDS)
+# Grupo -> palavras-chave sem acento (interseção direta com a análise)
+_GROUP_WORDS = {
+    group: frozenset(keyword[0] for keyword in compiled_keywords((group,)))
+    for group in KEYWORD_GROUPS
+}
+_last_scan = threading.local()
+
+
+def find_keywords(text):
+    """
+    Palavras-chave (sem acento, de todos os grupos) presentes no texto, em
+    uma passada e sem reaproveitar análises (ex.: bulk_score.py)
+    """
+    return _MATCHER.find(text.lower())
+
+
+def _scan(text):
+    """
+    Palavras-chave (sem acento, de todos os grupos) presentes no texto, em
+    uma passada. classify_email_simple e generate_response analisam o mesmo
+    texto em seguida: a última análise de cada thread é reaproveitada.
+    """
+    if getattr(_last_scan, 'text', None) is not text:
+        _last_scan.found = find_keywords(text)
+        _last_scan.text = text
+    return _last_scan.found
+
+
+def match_keywords(text, groups=None):
+    """
+    Retorna {grupo: conjunto de palavras-chave encontradas} para os grupos
+    pedidos (todos os de KEYWORD_GROUPS, por padrão).
+
+    Uma palavra-chave precisa começar no início de uma palavra e pode ter
+    sufixo ('erro' casa 'erros', mas não 'terror'). O texto é percorrido
+    uma vez só, para todas as palavras-chave de todos os grupos.
+    """
+    found = _scan(text)
+    return {group: found & _GROUP_WORDS[group] for group in (groups or KEYWORD_GROUPS)}
+
+
+def first_matching_group(text, groups):
+    """
+    Primeiro grupo (na ordem dada) com alguma palavra-chave no texto, ou
+    None, como uma cadeia de if/elif (sobre a mesma passada de match_keywords)
+    """
+    found = _scan(text)
+
+    for group in groups:
+        if not found.isdisjoint(_GROUP_WORDS[group]):
+            return group
+
+    return None
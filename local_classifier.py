@@ -0,0 +1,200 @@
+"""
+Classificador local (CPU, em processo)
+Features TF-IDF com hashing + regressão logística, pesos em arrays NumPy
+
+Treinamento:
+    python local_classifier.py --exemplos exemplos --logs email_classifications.jsonl*
+"""
+
+import argparse
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+from keyword_matcher import fold_text
+
+DEFAULT_MODEL_PATH = os.path.join('models', 'local_classifier.npz')
+N_FEATURES = 2 ** 18
+
+TOKEN_RE = re.compile(r'[a-z0-9]{2,}')
+
+
+def tokenize(text):
+    """Palavras (sem acento, minúsculas) e bigramas"""
+    words = TOKEN_RE.findall(fold_text(text))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hash_features(text, n_features=N_FEATURES):
+    """
+    Contagem de termos por índice (hashing trick, crc32).
+    Retorna (índices, contagens) como arrays NumPy.
+    """
+    counts = {}
+    for token in tokenize(text):
+        index = zlib.crc32(token.encode('utf-8')) % n_features
+        counts[index] = counts.get(index, 0) + 1
+
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    return indices, values
+
+
+class LocalClassifier:
+    """Regressão logística binária (1 = Produtivo) sobre TF-IDF com hashing"""
+
+    def __init__(self, weights, bias, idf):
+        self.weights = weights
+        self.bias = float(bias)
+        self.idf = idf
+        self.n_features = len(weights)
+
+    def _vectorize(self, text):
+        """TF-IDF esparso (log1p do tf, normalização L2)"""
+        indices, values = hash_features(text, self.n_features)
+        values = np.log1p(values) * self.idf[indices]
+        norm = np.sqrt(values @ values)
+        if norm > 0:
+            values /= norm
+        return indices, values
+
+    def predict_proba(self, text):
+        """Probabilidade de o email ser Produtivo"""
+        indices, values = self._vectorize(text)
+        z = values @ self.weights[indices] + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def classify(self, text):
+        """Retorna (categoria, confiança), no mesmo formato dos outros métodos"""
+        p = float(self.predict_proba(text))
+        if p >= 0.5:
+            return "Produtivo", p
+        return "Improdutivo", 1.0 - p
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=np.array(self.bias), idf=self.idf)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['weights'], data['bias'], data['idf'])
+
+    @classmethod
+    def train(cls, texts, labels, n_features=N_FEATURES, epochs=200,
+              learning_rate=0.5, l2=1e-4):
+        """
+        Treina com gradiente descendente em lote completo.
+        `labels`: 1 para Produtivo, 0 para Improdutivo.
+        """
+        hashed = [hash_features(text, n_features) for text in texts]
+        y = np.asarray(labels, dtype=np.float64)
+        n = len(hashed)
+
+        # IDF suavizado
+        document_freq = np.zeros(n_features)
+        for indices, _ in hashed:
+            document_freq[indices] += 1
+        idf = np.log((1 + n) / (1 + document_freq)) + 1
+
+        model = cls(np.zeros(n_features), 0.0, idf)
+        rows = [model._vectorize(text) for text in texts]
+
+        for _ in range(epochs):
+            grad_w = np.zeros(n_features)
+            grad_b = 0.0
+            for (indices, values), target in zip(rows, y):
+                z = values @ model.weights[indices] + model.bias
+                error = 1.0 / (1.0 + np.exp(-z)) - target
+                grad_w[indices] += error * values
+                grad_b += error
+
+            model.weights -= learning_rate * (grad_w / n + l2 * model.weights)
+            model.bias -= learning_rate * grad_b / n
+
+        return model
+
+
+# ===============================================
+# DADOS DE TREINAMENTO
+# ===============================================
+
+def load_exemplos(directory):
+    """Arquivos email_produtivo_*.txt / email_improdutivo_*.txt"""
+    texts, labels = [], []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.txt'):
+            continue
+        if name.startswith('email_produtivo'):
+            label = 1
+        elif name.startswith('email_improdutivo'):
+            label = 0
+        else:
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            texts.append(f.read())
+        labels.append(label)
+    return texts, labels
+
+
+def load_labeled_log(path):
+    """
+    Log de classificações (array JSON ou JSON Lines). Usa o texto
+    classificado ('email_text' ou 'text') e 'category'. Entradas só com o
+    assunto ficam de fora (o /classify pontua o email inteiro), assim como
+    as de fallback por palavras-chave ('degraded'), que não são rótulos reais.
+    """
+    with open(path, encoding='utf-8') as f:
+        content = f.read().strip()
+
+    if content.startswith('['):
+        entries = json.loads(content)
+    else:
+        entries = []
+        for line in content.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # Linha vazia ou incompleta (escrita interrompida)
+
+    texts, labels = [], []
+    for entry in entries:
+        text = entry.get('email_text') or entry.get('text')
+        category = entry.get('category')
+        if not text or entry.get('degraded') or category not in ('Produtivo', 'Improdutivo'):
+            continue
+        texts.append(text)
+        labels.append(1 if category == 'Produtivo' else 0)
+    return texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Treina o classificador local')
+    parser.add_argument('--exemplos', default='exemplos', help='Pasta com os emails de exemplo')
+    parser.add_argument('--logs', nargs='*', default=[], help='Logs rotulados (JSON ou JSON Lines)')
+    parser.add_argument('--out', default=DEFAULT_MODEL_PATH, help='Arquivo .npz de saída')
+    parser.add_argument('--epochs', type=int, default=200)
+    args = parser.parse_args()
+
+    texts, labels = load_exemplos(args.exemplos) if args.exemplos else ([], [])
+    for path in args.logs:
+        log_texts, log_labels = load_labeled_log(path)
+        texts += log_texts
+        labels += log_labels
+
+    if len(set(labels)) < 2:
+        parser.error('São necessários exemplos das duas categorias')
+
+    print(f"🧠 Treinando com {len(texts)} emails ({sum(labels)} produtivos)...")
+    model = LocalClassifier.train(texts, labels, epochs=args.epochs)
+    model.save(args.out)
+
+    correct = sum((model.classify(t)[0] == 'Produtivo') == bool(l) for t, l in zip(texts, labels))
+    print(f"✅ Modelo salvo em {args.out} (acurácia no treino: {correct / len(texts):.1%})")
+
+
+if __name__ == '__main__':
+    main()
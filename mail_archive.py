@@ -0,0 +1,217 @@
+"""
+Leitura de caixas de email exportadas, uma mensagem por vez
+- mbox (.mbox/.mbx): lido linha a linha, sem carregar o arquivo
+- .eml: uma mensagem
+- .zip: cada .eml/.mbox/.txt de dentro, descompactado sob demanda
+- Mensagens acima de max_message_bytes são cortadas (o corpo de texto
+  vem antes dos anexos; o restante é descartado sem ficar em memória)
+
+Classificar um arquivo (CLI, resultados em NDJSON conforme ficam prontos):
+    python mail_archive.py caixa.mbox > resultados.ndjson
+    python mail_archive.py export.zip --url http://localhost:5000 --output resultados.ndjson
+"""
+
+import argparse
+import email
+import json
+import os
+import re
+import sys
+import zipfile
+from email.policy import compat32
+
+from mime_body import decode_header_value, decode_text, extract_body
+
+ARCHIVE_EXTENSIONS = ('mbox', 'mbx', 'eml', 'zip')
+MAX_MESSAGE_BYTES = 2 * 1024 * 1024
+BODY_MAX_CHARS = 10000  # Como EmailConfig.BODY_MAX_CHARS
+
+LINE_CHUNK = 64 * 1024  # Linhas maiores são lidas em pedaços
+_ESCAPED_FROM = re.compile(rb'^>+From ')
+
+
+class ArchiveMessage:
+    """Mensagem lida do arquivo: bytes RFC 822 (`raw`) ou texto puro (`text`, de um .txt)"""
+
+    __slots__ = ('index', 'source', 'raw', 'text', 'truncated')
+
+    def __init__(self, index, source, raw=None, text=None, truncated=False):
+        self.index = index
+        self.source = source
+        self.raw = raw
+        self.text = text
+        self.truncated = truncated
+
+    def parse(self, max_chars=BODY_MAX_CHARS):
+        """
+        Cabeçalhos e texto para a classificação; `email_text` segue o
+        formato do email_sync ("Assunto: ...\\n\\nDe: ...\\n\\ncorpo")
+        """
+        if self.raw is None:
+            return {'subject': '', 'from': '', 'date': '', 'message_id': '', 'email_text': self.text}
+
+        message = email.message_from_bytes(self.raw, policy=compat32)
+        subject = decode_header_value(message.get('Subject', '')) or '(Sem assunto)'
+        from_email = decode_header_value(message.get('From', ''))
+        body = (extract_body(message, max_chars) or '').strip()
+        return {
+            'subject': subject,
+            'from': from_email,
+            'date': message.get('Date', ''),
+            'message_id': message.get('Message-ID', ''),
+            'email_text': f"Assunto: {subject}\n\nDe: {from_email}\n\n{body}"
+        }
+
+
+def archive_kind(filename):
+    """Tipo do arquivo pela extensão ('mbox', 'eml' ou 'zip'); ValueError se não suportado"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in ARCHIVE_EXTENSIONS:
+        raise ValueError(f"Formato não suportado: {filename}. Use: {', '.join(ARCHIVE_EXTENSIONS)}")
+    return 'mbox' if extension == 'mbx' else extension
+
+
+def iter_mbox(stream, max_message_bytes=MAX_MESSAGE_BYTES):
+    """
+    Mensagens (bytes, cortada?) de um mbox binário. Uma mensagem começa em
+    uma linha "From " no início do arquivo ou depois de uma linha em branco;
+    linhas ">From " (mboxrd) perdem um '>'.
+    """
+    lines = []
+    size = 0
+    truncated = False
+    started = False
+    at_line_start = True
+    previous_blank = True
+
+    while True:
+        line = stream.readline(LINE_CHUNK)
+        if not line:
+            break
+
+        if at_line_start and previous_blank and line.startswith(b'From '):
+            if started:
+                yield b''.join(lines), truncated
+            lines, size, truncated, started = [], 0, False, True
+        elif started:
+            if at_line_start and _ESCAPED_FROM.match(line):
+                line = line[1:]
+            if size + len(line) <= max_message_bytes:
+                lines.append(line)
+                size += len(line)
+            else:
+                truncated = True
+
+        ends_line = line.endswith(b'\n')
+        if at_line_start:
+            previous_blank = line in (b'\n', b'\r\n')
+        at_line_start = ends_line
+
+    if started:
+        yield b''.join(lines), truncated
+
+
+def read_limited(stream, max_message_bytes=MAX_MESSAGE_BYTES):
+    """Até max_message_bytes do stream (o restante é lido e descartado); retorna (bytes, cortada?)"""
+    data = stream.read(max_message_bytes)
+    truncated = False
+    while stream.read(LINE_CHUNK):
+        truncated = True
+    return data, truncated
+
+
+def _iter_zip(fileobj, max_message_bytes):
+    """(nome, bytes, texto, cortada?) de cada .eml/.mbox/.txt do zip"""
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('.'):
+                continue
+
+            extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+            with archive.open(info) as entry:
+                if extension in ('mbox', 'mbx'):
+                    for number, (raw, truncated) in enumerate(iter_mbox(entry, max_message_bytes), 1):
+                        yield f"{name}#{number}", raw, None, truncated
+                elif extension == 'eml':
+                    raw, truncated = read_limited(entry, max_message_bytes)
+                    yield name, raw, None, truncated
+                elif extension == 'txt':
+                    data, truncated = read_limited(entry, max_message_bytes)
+                    yield name, None, decode_text(data), truncated
+
+
+def iter_messages(fileobj, filename, max_message_bytes=MAX_MESSAGE_BYTES):
+    """
+    ArchiveMessage de cada email do arquivo, na ordem em que aparecem.
+    `fileobj` é binário; para .zip precisa permitir seek (arquivo em disco).
+    """
+    kind = archive_kind(filename)
+
+    if kind == 'mbox':
+        items = ((f"{filename}#{number}", raw, None, truncated)
+                 for number, (raw, truncated) in enumerate(iter_mbox(fileobj, max_message_bytes), 1))
+    elif kind == 'eml':
+        raw, truncated = read_limited(fileobj, max_message_bytes)
+        items = [(filename, raw, None, truncated)]
+    else:
+        items = _iter_zip(fileobj, max_message_bytes)
+
+    for index, (source, raw, text, truncated) in enumerate(items):
+        yield ArchiveMessage(index, source, raw=raw, text=text, truncated=truncated)
+
+
+def iter_remote_results(path, url, backend=None, timeout=None):
+    """Envia o arquivo ao POST /classify/archive e repassa as linhas NDJSON recebidas"""
+    import requests
+
+    params = {'filename': os.path.basename(path)}
+    if backend:
+        params['backend'] = backend
+
+    with open(path, 'rb') as f:
+        response = requests.post(
+            url.rstrip('/') + '/classify/archive', params=params, data=f, stream=True, timeout=timeout,
+            headers={'Content-Type': 'application/octet-stream'}
+        )
+    with response:
+        if response.status_code != 200:
+            raise RuntimeError(f"Erro {response.status_code}: {response.text[:200]}")
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classifica uma caixa de email exportada (mbox, .eml ou .zip)')
+    parser.add_argument('path', help='Arquivo .mbox, .eml ou .zip')
+    parser.add_argument('--url', help='Servidor do classificador (padrão: classificar neste processo)')
+    parser.add_argument('--backend', help='Backend de classificação (huggingface, local, keywords)')
+    parser.add_argument('--workers', type=int, help='Classificações em paralelo (modo local)')
+    parser.add_argument('--output', help='Arquivo NDJSON de saída (padrão: saída padrão)')
+    args = parser.parse_args()
+
+    if args.url:
+        results = iter_remote_results(args.path, args.url, args.backend)
+    else:
+        from app import ARCHIVE_WORKERS, classify_archive, validate_backend
+
+        stream = open(args.path, 'rb')
+        messages = iter_messages(stream, os.path.basename(args.path))
+        results = classify_archive(messages, validate_backend(args.backend), args.workers or ARCHIVE_WORKERS,
+                                   progress=stream.tell)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+            if result.get('type') == 'summary':
+                print(f"✅ {result['classified']} emails classificados, {result['errors']} erros "
+                      f"em {result['elapsed_ms'] / 1000:.1f}s", file=sys.stderr)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
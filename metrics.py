@@ -0,0 +1,270 @@
+"""
+Métricas no formato texto do Prometheus (sem dependências)
+- Contadores e histogramas com rótulos
+- Spans: tempo de cada etapa (histograma <namespace>_stage_seconds) e, se
+  houver um trace ativo (uma requisição), o total por etapa nesse trace
+- Desativado (enabled=False): métricas e spans viram objetos que não fazem nada
+
+Uso:
+    metrics = MetricsRegistry('email_classifier')
+    FALLBACKS = metrics.counter('fallback_total', 'Fallbacks', ('reason',))
+    with metrics.span('preprocess'):
+        ...
+    FALLBACKS.inc(reason='hf_error')
+    metrics.render()  # texto para GET /metrics
+"""
+
+import contextvars
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Segundos (de 1ms a 1min) e tamanhos (256 caracteres a 16M)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+# Trace da requisição atual: etapa -> [segundos, chamadas]
+_trace = contextvars.ContextVar('metrics_trace', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # rótulos -> [contagens por faixa, soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total_sum, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_sum{labels} {_format_value(total_sum)}')
+                lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Gauge:
+    """Valor lido na hora do render: `read()` retorna um número ou {rótulo: número}"""
+
+    def __init__(self, name, help, read, labelname=None):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelname = labelname
+
+    def render(self):
+        try:
+            value = self.read()
+        except Exception:
+            return []
+
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        if isinstance(value, dict):
+            for label, item in sorted(value.items()):
+                lines.append(f'{self.name}{_format_labels((self.labelname,), (label,))} {_format_value(item)}')
+        elif value is not None:
+            lines.append(f'{self.name} {_format_value(value)}')
+        return lines
+
+
+class Span:
+    """Mede uma etapa: histograma de etapas + trace da requisição (se houver)"""
+
+    __slots__ = ('histogram', 'stage', 'labels', 'started')
+
+    def __init__(self, histogram, stage, labels):
+        self.histogram = histogram
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed, stage=self.stage, **self.labels)
+
+        trace = _trace.get()
+        if trace is not None:
+            totals = trace.setdefault(self.stage, [0.0, 0])
+            totals[0] += elapsed
+            totals[1] += 1
+        return False
+
+
+class _NullMetric:
+    """Contador/histograma/span desativado"""
+
+    def inc(self, amount=1, **labels):
+        pass
+
+    def observe(self, value, **labels):
+        pass
+
+    def value(self, **labels):
+        return 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry:
+    def __init__(self, namespace, enabled=True, stage_labels=()):
+        self.namespace = namespace
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.stage_seconds = self.histogram(
+            'stage_seconds', 'Duração de cada etapa (segundos)', ('stage',) + tuple(stage_labels)
+        )
+
+    def _register(self, name, factory, replace=False):
+        """Métrica já registrada com esse nome (ou uma nova); replace=True troca a existente"""
+        if not self.enabled:
+            return NULL_METRIC
+        full_name = f'{self.namespace}_{name}'
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None or replace:
+                metric = self._metrics[full_name] = factory(full_name)
+            return metric
+
+    def counter(self, name, help='', labelnames=()):
+        return self._register(name, lambda full_name: Counter(full_name, help, labelnames))
+
+    def histogram(self, name, help='', labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(name, lambda full_name: Histogram(full_name, help, labelnames, buckets))
+
+    def gauge(self, name, help, read, labelname=None, replace=False):
+        return self._register(name, lambda full_name: Gauge(full_name, help, read, labelname), replace)
+
+    def span(self, stage, **labels):
+        if not self.enabled:
+            return NULL_METRIC
+        return Span(self.stage_seconds, stage, labels)
+
+    def render(self):
+        """Todas as métricas no formato texto do Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='0.0.0.0'):
+        """GET /metrics em uma thread (processos sem servidor web, ex.: email_sync)"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+        return server
+
+
+def start_trace():
+    """Começa a registrar os spans do contexto atual (ex.: uma requisição)"""
+    return _trace.set({})
+
+
+def current_trace():
+    """Etapas registradas até agora no trace atual: {etapa: (segundos, chamadas)}"""
+    return {stage: tuple(totals) for stage, totals in (_trace.get() or {}).items()}
+
+
+def finish_trace(token):
+    """Encerra o trace; retorna {etapa: (segundos, chamadas)}"""
+    trace = current_trace()
+    _trace.reset(token)
+    return trace
+
+
+def server_timing(trace):
+    """Trace -> valor do cabeçalho Server-Timing (milissegundos por etapa)"""
+    return ', '.join(f'{stage};dur={seconds * 1000:.2f}' for stage, (seconds, _) in trace.items())
@@ -0,0 +1,142 @@
+"""
+Extração do corpo de emails (MIME)
+- Respeita o charset declarado (com alternativas para charsets errados)
+- Prefere text/plain; sem ele, converte text/html em texto
+- Não decodifica anexos
+- Para ao juntar max_chars caracteres
+"""
+
+import base64
+import binascii
+import html
+import quopri
+import re
+from email.header import decode_header
+
+# Quanto do conteúdo codificado é lido por caractere desejado
+# (UTF-8 usa até 4 bytes por caractere; quoted-printable até 3x isso; HTML tem marcação)
+RAW_BYTES_PER_CHAR = {'plain': 12, 'html': 40}
+
+_HTML_DROP = re.compile(r'<(script|style|head|title)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_HTML_BREAK = re.compile(r'<(?:br|/p|/div|/tr|/h[1-6]|/blockquote|hr)\b[^>]*>', re.IGNORECASE)
+_HTML_ITEM = re.compile(r'<li\b[^>]*>', re.IGNORECASE)
+_HTML_TAG = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'[ \t\r\f\v\xa0]+')
+_BLANK_LINES = re.compile(r'\n\s*\n\s*\n+')
+
+
+def decode_text(data, charset=None):
+    """
+    Bytes -> texto no charset declarado. Sem charset (ou charset inválido),
+    tenta UTF-8 e cai para Windows-1252, comum em emails em português.
+    """
+    if charset:
+        try:
+            return data.decode(charset.strip().strip('"'), errors='replace')
+        except LookupError:
+            pass
+
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError as error:
+        # Caractere cortado no fim (FETCH parcial ou limite de tamanho)
+        if error.reason == 'unexpected end of data':
+            return data[:error.start].decode('utf-8', errors='replace')
+        return data.decode('cp1252', errors='replace')
+
+
+def decode_header_value(value):
+    """Cabeçalho com palavras codificadas (=?utf-8?b?...?=) como texto; junta todos os trechos"""
+    if not value:
+        return ''
+    return ''.join(
+        decode_text(text, charset) if isinstance(text, bytes) else text
+        for text, charset in decode_header(str(value))
+    )
+
+
+def decode_transfer(data, encoding):
+    """Desfaz base64 / quoted-printable (também em conteúdo truncado)"""
+    data = data or b''
+    try:
+        if encoding == 'base64':
+            data = re.sub(rb'[^A-Za-z0-9+/=]', b'', data)
+            data = base64.b64decode(data[:len(data) - len(data) % 4])
+        elif encoding == 'quoted-printable':
+            data = quopri.decodestring(data)
+    except (binascii.Error, ValueError):
+        pass
+    return data
+
+
+def html_to_text(markup, max_chars=None):
+    """Conversão rápida de HTML em texto (sem parser: expressões regulares)"""
+    text = _HTML_DROP.sub(' ', markup)
+    text = _HTML_ITEM.sub('\n- ', text)
+    text = _HTML_BREAK.sub('\n', text)
+    text = _HTML_TAG.sub(' ', text)
+    text = html.unescape(text)
+    text = _SPACES.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    text = _BLANK_LINES.sub('\n\n', text).strip()
+    return text[:max_chars] if max_chars else text
+
+
+def _is_attachment(part):
+    disposition = (part.get('Content-Disposition') or '').split(';')[0].strip().lower()
+    return disposition == 'attachment' or (disposition == 'inline' and part.get_filename())
+
+
+def _iter_text_parts(message):
+    """Partes text/plain e text/html, sem entrar em anexos nem decodificá-los"""
+    stack = [message]
+    while stack:
+        part = stack.pop()
+        if part.is_multipart():
+            stack.extend(reversed(part.get_payload()))
+            continue
+        if part.get_content_maintype() != 'text' or _is_attachment(part):
+            continue
+        subtype = part.get_content_subtype()
+        if subtype in ('plain', 'html'):
+            yield subtype, part
+
+
+def _decode_payload(part, max_raw):
+    """Decodifica só o início do conteúdo da parte (até max_raw caracteres codificados)"""
+    encoding = (part.get('Content-Transfer-Encoding') or '7bit').strip().lower()
+    if encoding in ('base64', 'quoted-printable'):
+        # Corta antes de decodificar: o restante nem é processado
+        payload = part.get_payload(decode=False)
+        payload = payload[:max_raw] if max_raw else payload
+        payload = decode_transfer(payload.encode('ascii', errors='replace'), encoding)
+    else:
+        payload = part.get_payload(decode=True) or b''
+        payload = payload[:max_raw] if max_raw else payload
+
+    return decode_text(payload, part.get_content_charset())
+
+
+def extract_body(message, max_chars=None):
+    """
+    Corpo de um email.message.Message como texto: a primeira parte text/plain
+    ou, se não houver, a primeira text/html convertida em texto.
+    """
+    parts = {}
+    for subtype, part in _iter_text_parts(message):
+        parts.setdefault(subtype, part)
+        if subtype == 'plain':
+            break
+
+    for subtype in ('plain', 'html'):
+        part = parts.get(subtype)
+        if part is None:
+            continue
+
+        max_raw = max_chars * RAW_BYTES_PER_CHAR[subtype] if max_chars else None
+        text = _decode_payload(part, max_raw)
+        if subtype == 'html':
+            return html_to_text(text, max_chars)
+        return text[:max_chars] if max_chars else text
+
+    return ''
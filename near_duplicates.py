@@ -0,0 +1,171 @@
+"""
+Agrupamento de emails quase idênticos (SimHash + LSH)
+Emails gerados por sistemas (avisos, notificações, newsletters) mudam só
+em nomes, números de ticket ou datas: o cache exato não os reconhece, mas
+o SimHash deles fica a poucos bits de distância. Cada grupo (cluster) é
+classificado uma vez, pelo primeiro email (representante); os demais
+reaproveitam o resultado.
+
+- Impressão digital: SimHash de 64 bits sobre trigramas de palavras (números viram '0')
+- Busca: 64 bits divididos em max_distance + 1 faixas; dois emails a até
+  max_distance bits de distância coincidem em pelo menos uma faixa inteira
+- Memória limitada: no máximo max_clusters grupos (LRU) e resultados com TTL
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+BITS = 64
+MASK = (1 << BITS) - 1
+SHINGLE_SIZE = 3
+MAX_CHARS = 8000  # Só o começo do email entra na impressão digital
+MIN_FEATURES = 8  # Textos curtos demais: o cache exato já resolve
+
+_TOKEN = re.compile(r'\w+')
+_NUMBER = re.compile(r'\d+')
+_SHIFTS = None
+
+
+def _numpy():
+    """NumPy importado no primeiro uso (não pesa na inicialização do servidor)"""
+    global _SHIFTS
+    import numpy as np
+    if _SHIFTS is None:
+        _SHIFTS = np.arange(BITS, dtype=np.uint64)
+    return np
+
+
+def fingerprint(text):
+    """SimHash do texto; None se o texto for curto demais para comparar"""
+    words = _TOKEN.findall(_NUMBER.sub('0', text[:MAX_CHARS].lower()))
+    # hash() do Python: bem distribuído e rápido (o índice vive só neste processo)
+    features = {
+        hash(' '.join(words[i:i + SHINGLE_SIZE])) & MASK
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+    if len(features) < MIN_FEATURES:
+        return None
+
+    np = _numpy()
+    hashes = np.fromiter(features, dtype=np.uint64, count=len(features))
+    ones = ((hashes[:, None] >> _SHIFTS) & np.uint64(1)).sum(axis=0)
+    value = 0
+    for bit in np.flatnonzero(ones * 2 > len(features)):
+        value |= 1 << int(bit)
+    return value
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+
+class Cluster:
+    __slots__ = ('fingerprint', 'results', 'members')
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.results = {}  # variante (ex.: backend) -> (expira_em, resultado)
+        self.members = 1
+
+
+class NearDuplicateIndex:
+    """
+    Índice em memória de grupos de emails quase idênticos, seguro entre threads.
+    `variant` separa resultados que não podem ser trocados entre si (ex.:
+    backends de classificação diferentes).
+    """
+
+    def __init__(self, max_distance=4, max_clusters=10000, ttl=86400):
+        self.max_distance = max_distance
+        self.max_clusters = max_clusters
+        self.ttl = ttl
+
+        self.bands = max_distance + 1
+        self._band_bits = -(-BITS // self.bands)  # Divisão arredondada para cima
+        self._tables = [{} for _ in range(self.bands)]  # valor da faixa -> ids dos grupos
+        self._clusters = OrderedDict()  # id -> Cluster (ordem LRU)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _band_keys(self, value):
+        mask = (1 << self._band_bits) - 1
+        return [(value >> (band * self._band_bits)) & mask for band in range(self.bands)]
+
+    def _nearest(self, value, keys):
+        best, best_distance = None, self.max_distance + 1
+        for table, key in zip(self._tables, keys):
+            for cluster_id in table.get(key, ()):
+                distance = hamming_distance(value, self._clusters[cluster_id].fingerprint)
+                if distance < best_distance:
+                    best, best_distance = cluster_id, distance
+        return best
+
+    def _evict(self):
+        cluster_id, cluster = self._clusters.popitem(last=False)
+        for table, key in zip(self._tables, self._band_keys(cluster.fingerprint)):
+            members = table.get(key)
+            if members is not None:
+                members.discard(cluster_id)
+                if not members:
+                    del table[key]
+        self.evictions += 1
+
+    def assign(self, value, variant=None):
+        """
+        Grupo da impressão digital (criado se não houver um próximo o bastante).
+        Retorna (id do grupo, resultado já conhecido ou None).
+        """
+        now = time.time()
+        keys = self._band_keys(value)
+
+        with self._lock:
+            cluster_id = self._nearest(value, keys)
+            if cluster_id is not None:
+                self._clusters.move_to_end(cluster_id)
+                cluster = self._clusters[cluster_id]
+                cluster.members += 1
+
+                entry = cluster.results.get(variant)
+                if entry is not None and entry[0] > now:
+                    self.hits += 1
+                    return cluster_id, entry[1]
+                self.misses += 1
+                return cluster_id, None
+
+            cluster_id = self._next_id
+            self._next_id += 1
+            self._clusters[cluster_id] = Cluster(value)
+            for table, key in zip(self._tables, keys):
+                table.setdefault(key, set()).add(cluster_id)
+            while len(self._clusters) > self.max_clusters:
+                self._evict()
+
+            self.misses += 1
+            return cluster_id, None
+
+    def set_result(self, cluster_id, result, variant=None):
+        """Resultado da classificação do representante, reaproveitado pelo grupo"""
+        with self._lock:
+            cluster = self._clusters.get(cluster_id)
+            if cluster is not None:
+                cluster.results[variant] = (time.time() + self.ttl, result)
+
+    def stats(self):
+        """Contadores expostos no /health"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'clusters': len(self._clusters),
+                'max_clusters': self.max_clusters,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
@@ -0,0 +1,121 @@
+"""
+Extração de texto de PDFs
+- 'early': para assim que houver texto suficiente para a classificação
+- 'full': extrai todas as páginas, em paralelo (pool de processos) nos PDFs grandes
+"""
+
+import io
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+EXTRACTION_MODES = ('early', 'full')
+
+# O classificador usa os primeiros 512 caracteres; a margem cobre o
+# pré-processamento e o fallback por palavras-chave
+EARLY_STOP_CHARS = int(os.getenv('PDF_EARLY_STOP_CHARS', '4096'))
+
+# Abaixo disso, o custo de iniciar processos não compensa
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '16'))
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(os.cpu_count() or 1)))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def import_pypdf():
+    """PyPDF2 importado no primeiro PDF (requisições só de texto não pagam a importação)"""
+    import PyPDF2
+    return PyPDF2
+
+
+def _get_pool():
+    """Pool de processos compartilhado (recriado após fork do gunicorn)"""
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _extract_pages(reader, first, last):
+    """Extrai as páginas [first, last) e mede o tempo de cada uma"""
+    texts = []
+    timings = []
+    for number in range(first, last):
+        started = time.perf_counter()
+        texts.append(reader.pages[number].extract_text() or '')
+        timings.append(round((time.perf_counter() - started) * 1000, 2))
+    return texts, timings
+
+
+def _extract_page_range(pdf_bytes, first, last):
+    """Executado no processo filho: reabre o PDF e extrai um intervalo"""
+    reader = import_pypdf().PdfReader(io.BytesIO(pdf_bytes))
+    return _extract_pages(reader, first, last)
+
+
+def _read_source(pdf_source):
+    """Bytes do PDF (caminho ou arquivo binário)"""
+    if isinstance(pdf_source, (str, os.PathLike)):
+        with open(pdf_source, 'rb') as f:
+            return f.read()
+    pdf_source.seek(0)
+    return pdf_source.read()
+
+
+def extract_pdf_text(pdf_source, mode='early', max_chars=EARLY_STOP_CHARS):
+    """
+    Extrai texto de um PDF (caminho ou arquivo binário).
+    Retorna (texto, estatísticas) com tempo por página e páginas puladas.
+    """
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Modo de extração inválido: {mode}. Use: {', '.join(EXTRACTION_MODES)}")
+
+    started = time.perf_counter()
+    reader = import_pypdf().PdfReader(pdf_source)
+    total_pages = len(reader.pages)
+
+    if mode == 'early':
+        texts = []
+        timings = []
+        collected = 0
+        for number in range(total_pages):
+            page_texts, page_timings = _extract_pages(reader, number, number + 1)
+            texts += page_texts
+            timings += page_timings
+            collected += len(page_texts[0])
+            if collected >= max_chars:
+                break
+
+    elif total_pages < PARALLEL_MIN_PAGES or PDF_WORKERS <= 1:
+        texts, timings = _extract_pages(reader, 0, total_pages)
+
+    else:
+        # Um intervalo contíguo de páginas por tarefa; a ordem é preservada
+        pdf_bytes = _read_source(pdf_source)
+        step = -(-total_pages // (PDF_WORKERS * 2))
+        futures = [
+            _get_pool().submit(_extract_page_range, pdf_bytes, first, min(first + step, total_pages))
+            for first in range(0, total_pages, step)
+        ]
+        texts = []
+        timings = []
+        for future in futures:
+            page_texts, page_timings = future.result()
+            texts += page_texts
+            timings += page_timings
+
+    stats = {
+        'mode': mode,
+        'pages_total': total_pages,
+        'pages_extracted': len(texts),
+        'pages_skipped': total_pages - len(texts),
+        'page_times_ms': timings,
+        'total_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+    return ''.join(texts), stats
@@ -0,0 +1,159 @@
+"""
+Índice persistente de emails já processados
+Chave: (caixa, UIDVALIDITY, UID) — UIDs não mudam quando mensagens são
+removidas, ao contrário dos números de sequência do IMAP
+"""
+
+import sqlite3
+import threading
+import time
+
+# Limite de parâmetros por consulta no SQLite
+_CHUNK = 500
+
+
+class ProcessedIndex:
+    """
+    Tabela SQLite sem rowid (B-tree ordenada pela chave): busca em O(log n)
+    e memória constante, mesmo com milhões de entradas.
+
+    Guarda também o maior UID processado (high-water mark) de cada caixa.
+    Se o UIDVALIDITY de uma caixa mudar, os UIDs antigos deixam de valer e
+    são descartados. prune() limita o tamanho: apaga gerações antigas de
+    UIDVALIDITY e UIDs abaixo do high-water mark mais velhos que a retenção.
+    """
+
+    def __init__(self, db_path='processed_emails.db'):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            " mailbox TEXT NOT NULL,"
+            " uidvalidity INTEGER NOT NULL,"
+            " uid INTEGER NOT NULL,"
+            " processed_at REAL NOT NULL,"
+            " PRIMARY KEY (mailbox, uidvalidity, uid)) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS mailbox_state ("
+            " mailbox TEXT PRIMARY KEY,"
+            " uidvalidity INTEGER NOT NULL,"
+            " high_water INTEGER NOT NULL)"
+        )
+        self._db.commit()
+
+    def check_uidvalidity(self, mailbox, uidvalidity):
+        """
+        Registra o UIDVALIDITY atual da caixa. Retorna False (e limpa o
+        índice da caixa) se ele mudou desde a última execução.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT uidvalidity FROM mailbox_state WHERE mailbox = ?", (mailbox,)
+            ).fetchone()
+
+            if row is not None and row[0] == uidvalidity:
+                return True
+
+            self._db.execute("DELETE FROM processed WHERE mailbox = ?", (mailbox,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO mailbox_state VALUES (?, ?, 0)", (mailbox, uidvalidity)
+            )
+            self._db.commit()
+            return row is None
+
+    def contains(self, mailbox, uidvalidity, uid):
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM processed WHERE mailbox = ? AND uidvalidity = ? AND uid = ?",
+                (mailbox, uidvalidity, int(uid))
+            ).fetchone() is not None
+
+    def filter_new(self, mailbox, uidvalidity, uids):
+        """UIDs da lista que ainda não foram processados (ordem preservada)"""
+        uids = [int(uid) for uid in uids]
+        seen = set()
+
+        with self._lock:
+            for start in range(0, len(uids), _CHUNK):
+                chunk = uids[start:start + _CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                seen.update(uid for (uid,) in self._db.execute(
+                    f"SELECT uid FROM processed WHERE mailbox = ? AND uidvalidity = ?"
+                    f" AND uid IN ({placeholders})",
+                    (mailbox, uidvalidity, *chunk)
+                ))
+
+        return [uid for uid in uids if uid not in seen]
+
+    def add_many(self, mailbox, uidvalidity, uids, high_water=None):
+        """
+        Marca UIDs como processados e avança o high-water mark até
+        `high_water` (padrão: o maior UID da lista)
+        """
+        uids = [int(uid) for uid in uids]
+        if not uids:
+            return
+        if high_water is None:
+            high_water = max(uids)
+
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO processed VALUES (?, ?, ?, ?)",
+                [(mailbox, uidvalidity, uid, now) for uid in uids]
+            )
+            self._db.execute(
+                "INSERT INTO mailbox_state VALUES (?, ?, ?)"
+                " ON CONFLICT (mailbox) DO UPDATE SET high_water = MAX(high_water, excluded.high_water)"
+                " WHERE uidvalidity = excluded.uidvalidity",
+                (mailbox, uidvalidity, high_water)
+            )
+            self._db.commit()
+
+    def high_water(self, mailbox, uidvalidity):
+        """Maior UID processado na caixa (0 se nenhum)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT high_water FROM mailbox_state WHERE mailbox = ? AND uidvalidity = ?",
+                (mailbox, uidvalidity)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def prune(self, max_age, mailbox=None, now=None):
+        """
+        Apaga (de uma caixa ou de todas) os UIDs de UIDVALIDITY que não é
+        mais o atual e os processados há mais de `max_age` segundos que
+        estão abaixo do high-water mark (o only_new não os busca de novo).
+        Retorna quantas linhas foram apagadas.
+        """
+        cutoff = (now if now is not None else time.time()) - max_age
+        where, params = ("AND p.mailbox = ?", (mailbox,)) if mailbox is not None else ("", ())
+
+        with self._lock:
+            stale = self._db.execute(
+                "DELETE FROM processed AS p WHERE NOT EXISTS ("
+                " SELECT 1 FROM mailbox_state s"
+                " WHERE s.mailbox = p.mailbox AND s.uidvalidity = p.uidvalidity) " + where,
+                params
+            ).rowcount
+            expired = self._db.execute(
+                "DELETE FROM processed AS p WHERE processed_at < ? AND uid <= ("
+                " SELECT high_water FROM mailbox_state s"
+                " WHERE s.mailbox = p.mailbox AND s.uidvalidity = p.uidvalidity) " + where,
+                (cutoff, *params)
+            ).rowcount
+            self._db.commit()
+        return stale + expired
+
+    def count(self, mailbox=None):
+        with self._lock:
+            if mailbox is None:
+                return self._db.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+            return self._db.execute(
+                "SELECT COUNT(*) FROM processed WHERE mailbox = ?", (mailbox,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,42 @@
+"""
+Limite de taxa (token bucket) compartilhável entre threads
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Até `rate` operações por segundo, com rajadas de até `burst`.
+    rate=None (ou 0) desativa o limite.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate
+        self.burst = max(1.0, float(burst if burst is not None else (rate or 1)))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        """Bloqueia até haver `n` fichas disponíveis; retorna o tempo esperado"""
+        if not self.rate:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                # Pedidos maiores que a rajada consomem a rajada inteira
+                needed = min(n, self.burst)
+                if self._tokens >= needed:
+                    self._tokens -= needed
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
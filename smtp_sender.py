@@ -0,0 +1,186 @@
+"""
+Envio de respostas por SMTP
+- Conexões persistentes reaproveitadas (pool), reabertas se caírem
+- Limite de envios por segundo
+- Envio em segundo plano (submit) com fila limitada
+- Respostas automáticas conforme a RFC 3834 (Auto-Submitted, sem responder
+  a listas, envios em massa e outras respostas automáticas)
+
+Teste local (sem enviar emails de verdade, mostra as mensagens no terminal):
+    python -m smtpd -n -c DebuggingServer localhost:1025      (Python até 3.11)
+    python -m aiosmtpd -n -l localhost:1025                    (pip install aiosmtpd)
+    # EmailConfig: SMTP_SERVER = "localhost", SMTP_PORT = 1025, SMTP_SECURITY = None
+"""
+
+import queue
+import smtplib
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import make_msgid, parseaddr
+
+from rate_limit import RateLimiter
+
+SECURITY_MODES = ('ssl', 'starttls', None)
+
+# Erros em que vale reabrir a conexão e tentar de novo
+RETRYABLE_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+# Precedence de listas e envios em massa (RFC 3834, seção 2)
+BULK_PRECEDENCE = ('bulk', 'list', 'junk')
+
+
+def auto_reply_skip_reason(email_data):
+    """
+    Motivo para não responder automaticamente a um email (RFC 3834), ou
+    None: Auto-Submitted diferente de 'no' (outra resposta automática),
+    Precedence bulk/list/junk ou cabeçalho List-Id (lista de discussão)
+    """
+    auto_submitted = (email_data.get('auto_submitted') or '').split(';')[0].strip().lower()
+    if auto_submitted and auto_submitted != 'no':
+        return f"Auto-Submitted: {auto_submitted}"
+
+    precedence = (email_data.get('precedence') or '').strip().lower()
+    if precedence in BULK_PRECEDENCE:
+        return f"Precedence: {precedence}"
+
+    list_id = (email_data.get('list_id') or '').strip()
+    if list_id:
+        return f"List-Id: {list_id}"
+
+    return None
+
+
+def build_reply(email_data, response_text, from_address):
+    """
+    Resposta automática a um email: Auto-Submitted: auto-replied (RFC 3834)
+    e a mesma conversa (In-Reply-To / References)
+    """
+    message = EmailMessage()
+    subject = email_data.get('subject') or ''
+    message['Subject'] = subject if subject.lower().startswith('re:') else f"Re: {subject}"
+    message['From'] = from_address
+    message['To'] = parseaddr(email_data['from'])[1] or email_data['from']
+    message['Message-ID'] = make_msgid()
+    message['Auto-Submitted'] = 'auto-replied'
+
+    original_id = (email_data.get('message_id') or '').strip()
+    if original_id:
+        # RFC 5322: References do original seguido do Message-ID respondido
+        references = (email_data.get('references') or '').split()
+        if original_id not in references:
+            references.append(original_id)
+        message['In-Reply-To'] = original_id
+        message['References'] = ' '.join(references)
+
+    message.set_content(response_text)
+    return message
+
+
+class SmtpSender:
+    """
+    Pool de até pool_size conexões SMTP abertas uma vez e reaproveitadas.
+    Uma conexão que falhar é descartada e o envio é repetido em uma nova.
+    """
+
+    def __init__(self, host, port=587, username=None, password=None, security='starttls',
+                 pool_size=2, rate_limit=None, timeout=30, max_retries=2, max_pending=100):
+        if security not in SECURITY_MODES:
+            raise ValueError(f"Segurança SMTP inválida: {security}. Use: ssl, starttls ou None")
+
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.security = security
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.rate_limiter = RateLimiter(rate_limit)
+        self._idle = queue.LifoQueue()  # Conexões livres (a mais recente primeiro)
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='smtp')
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+        self.sent = 0
+        self.failed = 0
+        self.reconnects = 0
+
+    def _connect(self):
+        if self.security == 'ssl':
+            connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                          context=ssl.create_default_context())
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == 'starttls':
+                connection.starttls(context=ssl.create_default_context())
+
+        # Servidores locais de teste não anunciam AUTH: envia sem login
+        connection.ehlo_or_helo_if_needed()
+        if self.username and connection.has_extn('auth'):
+            connection.login(self.username, self.password or '')
+        return connection
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def send(self, message):
+        """Envia (bloqueia); lança a exceção do SMTP se todas as tentativas falharem"""
+        self.rate_limiter.acquire()
+
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = None
+
+            attempt = 0
+            while True:
+                try:
+                    if connection is None:
+                        connection = self._connect()
+                    connection.send_message(message)
+                    break
+                except RETRYABLE_ERRORS:
+                    if connection is not None:
+                        self._discard(connection)
+                        connection = None
+                    attempt += 1
+                    self.reconnects += 1
+                    if attempt > self.max_retries:
+                        self.failed += 1
+                        raise
+                except Exception:
+                    # Erro do próprio email (ex.: destinatário recusado): a conexão continua boa
+                    if connection is not None:
+                        self._idle.put(connection)
+                    self.failed += 1
+                    raise
+
+            self._idle.put(connection)
+            self.sent += 1
+
+    def submit(self, message):
+        """Envia em segundo plano; bloqueia se houver max_pending envios na fila"""
+        self._pending.acquire()
+        future = self._executor.submit(self.send, message)
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def close(self):
+        """Espera os envios pendentes e encerra as conexões"""
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.quit()
+            except Exception:
+                self._discard(connection)
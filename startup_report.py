@@ -0,0 +1,164 @@
+"""
+Relatório de inicialização (cold start) do classificador
+- Importações: `python -X importtime -c "import app"` em um processo novo,
+  tempo próprio de cada módulo somado por pacote (--module email_sync para
+  o processo de sincronização)
+- Etapas, em processos novos: importar o app, aquecer (app.warmup) e o
+  primeiro /classify com sucesso, com e sem aquecimento
+- Meta: tempo do início do processo até o primeiro /classify respondido
+  (STARTUP_TARGET_MS, padrão 1000ms); acima dela o comando termina com código 1
+
+Uso:
+    python app.py --startup-report
+    python startup_report.py --runs 5 --target-ms 1000 --top 10
+    python startup_report.py --module email_sync --imports-only
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_TARGET_MS = float(os.getenv('STARTUP_TARGET_MS', '1000'))
+
+SAMPLE_EMAIL = (
+    "Bom dia! Poderiam enviar o relatório financeiro do trimestre e confirmar "
+    "o prazo de entrega do projeto? Precisamos da resposta até sexta-feira."
+)
+
+
+def probe_env(tmp_dir):
+    """Ambiente dos processos medidos: sem arquivos no projeto, sem cache persistido"""
+    env = dict(os.environ)
+    env['JOBS_DB'] = os.path.join(tmp_dir, 'jobs.db')
+    env.pop('CLASSIFICATION_CACHE_DB', None)
+    return env
+
+
+def import_breakdown(env, module='app', top=10):
+    """Tempo próprio das importações (ms) somado por pacote, do maior para o menor"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        # "import time: <próprio us> | <acumulado us> | <módulo>"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(own) / 1000
+
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:top], sum(packages.values())
+
+
+def run_probe(env, warm, backend):
+    """
+    Processo novo até o primeiro /classify: retorna as etapas medidas dentro
+    dele e o total visto de fora (inclui a partida do interpretador)
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--probe', '--backend', backend]
+    if not warm:
+        command.append('--no-warmup')
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    total = (time.perf_counter() - started) * 1000
+    process.communicate()
+
+    if process.returncode != 0 or not line:
+        raise RuntimeError(f"Processo de medição falhou (código {process.returncode})")
+
+    phases = json.loads(line)
+    phases['total'] = round(total, 2)
+    return phases
+
+
+def probe(warm, backend):
+    """Executado no processo medido: importa o app, aquece e faz o primeiro /classify"""
+    phases = {}
+
+    started = time.perf_counter()
+    import app as email_app
+    phases['import_app'] = round((time.perf_counter() - started) * 1000, 2)
+
+    if warm:
+        started = time.perf_counter()
+        email_app.warmup()
+        phases['warmup'] = round((time.perf_counter() - started) * 1000, 2)
+
+    started = time.perf_counter()
+    response = email_app.app.test_client().post('/classify', data={
+        'email_text': SAMPLE_EMAIL, 'backend': backend
+    })
+    if response.status_code != 200 or not response.get_json().get('success'):
+        print(f"/classify falhou: {response.status_code} {response.get_data(as_text=True)[:200]}", file=sys.stderr)
+        return 1
+    phases['first_classify'] = round((time.perf_counter() - started) * 1000, 2)
+
+    print(json.dumps(phases), flush=True)
+    return 0
+
+
+def median_phases(runs):
+    return {name: round(statistics.median(run[name] for run in runs), 2) for name in runs[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tempo de inicialização até o primeiro /classify')
+    parser.add_argument('--runs', type=int, default=3, help='Processos medidos por modo (mediana)')
+    parser.add_argument('--module', default='app', help='Módulo do detalhamento das importações')
+    parser.add_argument('--imports-only', action='store_true', help='Só o detalhamento das importações')
+    parser.add_argument('--top', type=int, default=10, help='Pacotes listados no detalhamento das importações')
+    parser.add_argument('--target-ms', type=float, default=STARTUP_TARGET_MS,
+                        help='Meta para o primeiro /classify com aquecimento (ms)')
+    parser.add_argument('--backend', default='keywords',
+                        help='Backend do /classify medido (padrão: keywords, sem rede)')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--no-warmup', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        return probe(not args.no_warmup, args.backend)
+
+    with tempfile.TemporaryDirectory(prefix='startup-') as tmp_dir:
+        env = probe_env(tmp_dir)
+
+        packages, imports_total = import_breakdown(env, args.module, args.top)
+        print(f"📦 Importações de {args.module}: {imports_total:.0f}ms (tempo próprio por pacote)")
+        for package, ms in packages:
+            print(f"   {package:<28} {ms:8.1f}ms")
+        if args.imports_only:
+            return 0
+
+        results = {}
+        for mode, warm in (('sem aquecimento', False), ('com aquecimento', True)):
+            results[mode] = median_phases([run_probe(env, warm, args.backend) for _ in range(args.runs)])
+
+    print(f"\n⏱️  Até o primeiro /classify (mediana de {args.runs} processos, backend {args.backend}):")
+    for mode, phases in results.items():
+        steps = ', '.join(f"{name} {ms:.0f}ms" for name, ms in phases.items() if name != 'total')
+        print(f"   {mode:<16} {phases['total']:7.0f}ms  ({steps})")
+
+    total = results['com aquecimento']['total']
+    if total > args.target_ms:
+        print(f"\n⚠️  Acima da meta: {total:.0f}ms > {args.target_ms:.0f}ms")
+        return 1
+
+    print(f"\n✅ Dentro da meta: {total:.0f}ms <= {args.target_ms:.0f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,10 +11,21 @@ const errorText = document.getElementById('errorText');
 const resultsSection = document.getElementById('resultsSection');
 const newAnalysisBtn = document.getElementById('newAnalysisBtn');
 const copyBtn = document.getElementById('copyBtn');
+const archiveSection = document.getElementById('archiveSection');
+const archiveProgressFill = document.getElementById('archiveProgressFill');
+const archiveStatus = document.getElementById('archiveStatus');
+const archiveSummary = document.getElementById('archiveSummary');
+const archiveList = document.getElementById('archiveList');
+const newArchiveBtn = document.getElementById('newArchiveBtn');
+
+// Caixas de email exportadas vão para /classify/archive (resultados em NDJSON)
+const ARCHIVE_EXTENSIONS = ['mbox', 'mbx', 'eml', 'zip'];
+const ARCHIVE_LIST_LIMIT = 500; // Linhas mostradas na lista (o resumo conta todas)
 
 // Estado atual
 let currentTab = 'text';
 let selectedFile = null;
+let archiveState = null; // Contagens da caixa de email em andamento
 
 // Inicialização
 document.addEventListener('DOMContentLoaded', () => {
@@ -101,17 +112,17 @@ function handleFileSelect() {
         return;
     }
 
-    // Validar tipo de arquivo
+    // Validar tipo de arquivo (.mbox/.eml não têm tipo MIME no navegador)
     const allowedTypes = ['text/plain', 'application/pdf'];
-    if (!allowedTypes.includes(file.type)) {
-        showError('Formato de arquivo não suportado. Use .txt ou .pdf');
+    if (!allowedTypes.includes(file.type) && !isArchive(file)) {
+        showError('Formato de arquivo não suportado. Use .txt, .pdf, .mbox, .eml ou .zip');
         fileInput.value = '';
         return;
     }
 
-    // Validar tamanho (16MB)
+    // Validar tamanho (16MB; caixas de email não têm limite)
     const maxSize = 16 * 1024 * 1024;
-    if (file.size > maxSize) {
+    if (file.size > maxSize && !isArchive(file)) {
         showError('Arquivo muito grande. O tamanho máximo é 16MB');
         fileInput.value = '';
         return;
@@ -149,10 +160,15 @@ function clearFile() {
     fileInfo.classList.remove('active');
 }
 
+function isArchive(file) {
+    const extension = file.name.includes('.') ? file.name.split('.').pop().toLowerCase() : '';
+    return ARCHIVE_EXTENSIONS.includes(extension);
+}
+
 function formatFileSize(bytes) {
     if (bytes === 0) return '0 Bytes';
     const k = 1024;
-    const sizes = ['Bytes', 'KB', 'MB'];
+    const sizes = ['Bytes', 'KB', 'MB', 'GB'];
     const i = Math.floor(Math.log(bytes) / Math.log(k));
     return Math.round(bytes / Math.pow(k, i) * 100) / 100 + ' ' + sizes[i];
 }
@@ -181,6 +197,11 @@ async function handleSubmit() {
         return;
     }
 
+    if (currentTab === 'file' && isArchive(selectedFile)) {
+        await classifyArchive(selectedFile);
+        return;
+    }
+
     // Preparar dados
     const formData = new FormData();
     
@@ -194,17 +215,19 @@ async function handleSubmit() {
     showLoading();
 
     try {
-        const response = await fetch('/classify', {
+        // Enfileirar e acompanhar o job (PDFs grandes não estouram o timeout)
+        const response = await fetch('/jobs', {
             method: 'POST',
             body: formData
         });
 
-        const data = await response.json();
+        const job = await response.json();
 
         if (!response.ok) {
-            throw new Error(data.error || 'Erro ao processar email');
+            throw new Error(job.error || 'Erro ao processar email');
         }
 
+        const data = await waitForJob(job.status_url);
         displayResults(data);
     } catch (error) {
         console.error('Erro:', error);
@@ -214,6 +237,151 @@ async function handleSubmit() {
     }
 }
 
+// Consultar o status do job até terminar (intervalo crescente, até 2s)
+async function waitForJob(statusUrl) {
+    let delay = 250;
+
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, delay));
+        delay = Math.min(delay * 1.5, 2000);
+
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+
+        if (!response.ok || job.status === 'error') {
+            throw new Error(job.error || 'Erro ao processar email');
+        }
+
+        if (job.status === 'done') {
+            return job.result;
+        }
+    }
+}
+
+// Classificar uma caixa de email: cada linha NDJSON é mostrada assim que chega
+async function classifyArchive(file) {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    startArchive(file);
+
+    try {
+        const response = await fetch('/classify/archive', {
+            method: 'POST',
+            body: formData
+        });
+
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.error || 'Erro ao processar arquivo');
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop(); // Linha incompleta fica para o próximo pedaço
+
+            lines.filter(line => line.trim()).forEach(line => displayArchiveLine(JSON.parse(line), file));
+        }
+
+        if (buffer.trim()) {
+            displayArchiveLine(JSON.parse(buffer), file);
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        showError(error.message || 'Erro ao processar sua solicitação. Tente novamente.');
+    } finally {
+        submitBtn.disabled = false;
+    }
+}
+
+function startArchive(file) {
+    archiveState = { classified: 0, errors: 0, listed: 0, categories: {} };
+
+    submitBtn.disabled = true;
+    resultsSection.style.display = 'none';
+    archiveList.innerHTML = '';
+    archiveSummary.innerHTML = '';
+    archiveProgressFill.style.width = '0%';
+    archiveStatus.textContent = `Enviando ${file.name} (${formatFileSize(file.size)})...`;
+
+    archiveSection.style.display = 'block';
+    archiveSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+function displayArchiveLine(line, file) {
+    if (line.type === 'result') {
+        archiveState.classified += 1;
+        archiveState.categories[line.category] = (archiveState.categories[line.category] || 0) + 1;
+        addArchiveItem(line.category, line.subject || line.source, `${line.confidence}%`);
+    } else if (line.type === 'error') {
+        archiveState.errors += 1;
+        addArchiveItem(null, line.source || file.name, line.error);
+    }
+
+    // Progresso pelos bytes já lidos do arquivo no servidor
+    const percent = line.bytes_read && file.size ? Math.min(100, Math.round(line.bytes_read / file.size * 100)) : 0;
+    archiveProgressFill.style.width = `${line.type === 'summary' ? 100 : percent}%`;
+
+    if (line.type === 'summary') {
+        archiveStatus.textContent = `${line.classified} emails classificados, ${line.errors} erros em ${(line.elapsed_ms / 1000).toFixed(1)}s`;
+    } else {
+        archiveStatus.textContent = `${archiveState.classified} emails classificados (${percent}%)`;
+    }
+
+    renderArchiveSummary();
+}
+
+function renderArchiveSummary() {
+    const badges = Object.entries(archiveState.categories).map(([category, count]) => `
+        <div class="classification-badge">
+            <span class="badge-label">${category}</span>
+            <span class="badge-value ${category === 'Produtivo' ? 'productive' : 'unproductive'}">${count}</span>
+        </div>
+    `);
+
+    if (archiveState.errors) {
+        badges.push(`
+            <div class="classification-badge">
+                <span class="badge-label">Erros</span>
+                <span class="badge-value">${archiveState.errors}</span>
+            </div>
+        `);
+    }
+
+    archiveSummary.innerHTML = badges.join('');
+}
+
+function addArchiveItem(category, title, detail) {
+    if (archiveState.listed >= ARCHIVE_LIST_LIMIT) return;
+    archiveState.listed += 1;
+
+    // textContent: assunto e remetente vêm do email, não do servidor
+    const item = document.createElement('li');
+
+    const badge = document.createElement('span');
+    badge.className = 'archive-category ' + (category === 'Produtivo' ? 'productive' : category ? 'unproductive' : 'archive-error');
+    badge.textContent = category || 'Erro';
+
+    const subject = document.createElement('span');
+    subject.className = 'archive-subject';
+    subject.textContent = title;
+
+    const info = document.createElement('span');
+    info.className = category ? 'archive-status' : 'archive-status archive-error';
+    info.textContent = detail;
+
+    item.append(badge, subject, info);
+    archiveList.appendChild(item);
+}
+
 // Mostrar resultados
 function displayResults(data) {
     // Preencher preview do email
@@ -285,16 +453,19 @@ function setupCopyButton() {
 
 // Configurar nova análise
 function setupNewAnalysis() {
-    newAnalysisBtn.addEventListener('click', () => {
-        // Limpar formulário
-        document.getElementById('emailText').value = '';
-        clearFile();
-        
-        // Esconder resultados
-        resultsSection.style.display = 'none';
-        
-        // Voltar ao topo
-        window.scrollTo({ top: 0, behavior: 'smooth' });
+    [newAnalysisBtn, newArchiveBtn].forEach(button => {
+        button.addEventListener('click', () => {
+            // Limpar formulário
+            document.getElementById('emailText').value = '';
+            clearFile();
+            
+            // Esconder resultados
+            resultsSection.style.display = 'none';
+            archiveSection.style.display = 'none';
+            
+            // Voltar ao topo
+            window.scrollTo({ top: 0, behavior: 'smooth' });
+        });
     });
 }
 
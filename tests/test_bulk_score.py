@@ -0,0 +1,55 @@
+"""
+bulk_score.py deve dar o mesmo resultado de classify_email_simple,
+inclusive para texto com acentos decompostos (NFD)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unicodedata
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# O app cria a fila de jobs e o cache na importação: bancos temporários
+_TMP = tempfile.mkdtemp()
+os.environ.setdefault('JOBS_DB', os.path.join(_TMP, 'jobs.db'))
+os.environ.setdefault('CLASSIFICATION_CACHE_ENABLED', '0')
+
+from app import classify_email_simple  # noqa: E402
+from bulk_score import score_texts  # noqa: E402
+from keyword_matcher import KEYWORD_GROUPS, CLASSIFICATION_GROUPS  # noqa: E402
+
+WORDS = [word for group in CLASSIFICATION_GROUPS for word in KEYWORD_GROUPS[group]] + [
+    'terror', 'Erros', 'ATUALIZAÇÃO', 'incomodo', 'texto', 'qualquer', 'café', 'çerro'
+]
+SEPARATORS = [' ', '', '.', '\n', ', ', 'x']
+
+
+def random_texts(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(WORDS) + rng.choice(SEPARATORS) for _ in range(rng.randint(1, 12)))
+        for _ in range(count)
+    ]
+
+
+def assert_same_as_simple(texts):
+    categories, confidences, _, _ = score_texts(texts)
+    for text, category, confidence in zip(texts, categories.tolist(), confidences.tolist()):
+        expected_category, expected_confidence = classify_email_simple(text)
+        assert (category, confidence) == (expected_category, pytest.approx(expected_confidence)), repr(text)
+
+
+@pytest.mark.parametrize('form', ['NFC', 'NFD'])
+def test_bulk_matches_classify_email_simple(form):
+    assert_same_as_simple([unicodedata.normalize(form, text) for text in random_texts(2000)])
+
+
+def test_nfd_accented_keywords():
+    text = unicodedata.normalize('NFD', 'revisão relatório')
+    categories, _, productive, _ = score_texts([text])
+    assert categories.tolist() == ['Produtivo'] == [classify_email_simple(text)[0]]
+    assert productive.tolist() == [2]
@@ -0,0 +1,21 @@
+"""
+Pré-processamento do texto dos emails
+Módulo leve (só `re`): usado pelo app e por ferramentas offline como o
+bulk_score.py sem carregar o Flask e os clientes da API
+"""
+
+import re
+
+_WHITESPACE = re.compile(r'\s+')
+_SPECIAL_CHARS = re.compile(r'[^\w\s\.\,\!\?\-]')
+
+
+def preprocess_text(text):
+    """Pré-processa o texto do email (NLP básico)"""
+    # Remover espaços extras
+    text = _WHITESPACE.sub(' ', text).strip()
+
+    # Remover caracteres especiais mantendo pontuação básica
+    text = _SPECIAL_CHARS.sub('', text)
+
+    return text
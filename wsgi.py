@@ -1,5 +1,11 @@
+import os
 
-from app import app
+from app import app, warmup
+
+# Aquecimento antes da primeira requisição; com preload_app (gunicorn.conf.py)
+# roda uma vez no processo mestre e os workers herdam o resultado no fork
+if os.getenv('WARMUP', '1') != '0':
+    print(f"🔥 Aquecimento (ms): {warmup()}")
 
 if __name__ == "__main__":
-    app.run()
\ No newline at end of file
+    app.run()